@@ -1,24 +1,96 @@
-import openai
+import asyncio
 import os
+import io
+import re
+import json
+import time
 import wave
 import base64
 import uvicorn
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 from dotenv import load_dotenv
+from tts_cache import TTSCache, cache_key
+from audio_codec import MulawStreamEncoder, mulaw_wav
+from model_gateway import ModelGateway
+from hiring_classifier import DEFAULT_THRESHOLD, classify_hiring
+from response_cache import ResponseCache
+from audio_ingest import AudioUpload, UploadTooLarge, split_wav
+from speech_polish import SpeechPolisher
+from metrics import instrument
+from shared.http_metrics import request_timings  # metrics puts shared/ on the path
 
 load_dotenv()
 
 app = FastAPI()
 
+# Request and model latency histograms at GET /metrics; each response's
+# Server-Timing header breaks its time down into queue, llm, tts and asr
+instrument(app)
+
 BOSON_API_KEY = os.getenv("BOSON_API_KEY")
 
-client = openai.Client(api_key=BOSON_API_KEY, base_url="https://hackathon.boson.ai/v1")
+TTS_MODEL = "higgs-audio-generation-Hackathon"
+ASR_MODEL = "higgs-audio-understanding-Hackathon"
+LLM_MODEL = "Qwen3-32B-non-thinking-Hackathon"
+
+# All model calls are async and capped per model, so one slow request never
+# stalls the others; see model_gateway.py and GET /model_gateway/stats
+models = ModelGateway(
+    api_key=BOSON_API_KEY,
+    base_url="https://hackathon.boson.ai/v1",
+    limits={
+        TTS_MODEL: int(os.getenv("MODEL_CONCURRENCY_TTS", "4")),
+        ASR_MODEL: int(os.getenv("MODEL_CONCURRENCY_ASR", "4")),
+        LLM_MODEL: int(os.getenv("MODEL_CONCURRENCY_LLM", "8")),
+    },
+    stages={TTS_MODEL: "tts", ASR_MODEL: "asr", LLM_MODEL: "llm"}
+)
+
+# Synthesized audio, content-addressed by (text, voice, format) - see tts_cache.py
+tts_cache = TTSCache()
+
+# "wav" is Boson's full-rate 24 kHz PCM; "mulaw" is 8 kHz μ-law, what a phone
+# line carries anyway, about 6x smaller and played by Twilio without transcoding
+AUDIO_FORMATS = ("wav", "mulaw")
+
+# Said at the end of every call, so it is pinned and never evicted
+CLOSING_TEXT = "Thank you so much for your time. Have a great day!"
+for audio_format in AUDIO_FORMATS:
+    tts_cache.pin(CLOSING_TEXT, "en_woman_1", audio_format)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Replies to common utterances ("Hello?", "Who is this?"), per campaign context - see response_cache.py
+response_cache = ResponseCache(
+    variants=int(os.getenv("RESPONSE_CACHE_VARIANTS", "3")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", str(6 * 3600))),
+    max_keys=int(os.getenv("RESPONSE_CACHE_MAX_KEYS", "2000"))
+)
+
+# Uploaded recordings are handled in memory: capped in size, and long WAVs
+# are transcribed in pieces of at most TRANSCRIBE_CHUNK_SECONDS, concurrently
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "30"))
+
+# Answers the local classifier is at least this sure about skip the LLM (see hiring_classifier.py)
+HIRING_CLASSIFIER_THRESHOLD = float(os.getenv("HIRING_CLASSIFIER_THRESHOLD", str(DEFAULT_THRESHOLD)))
+
+# Synthesized speech is trimmed of dead air and leveled before it is cached - see speech_polish.py
+speech_polisher = SpeechPolisher(
+    max_pause=float(os.getenv("SPEECH_MAX_PAUSE", "0.5")),
+    target_dbfs=float(os.getenv("SPEECH_TARGET_DBFS", "-20"))
+)
+
+# PCM bytes per chunk handed to the resampler when streaming (100 ms at 24 kHz)
+TTS_STREAM_CHUNK = int(os.getenv("TTS_STREAM_CHUNK", "4800"))
 
 class TTSRequest(BaseModel):
     text: str
     voice: Optional[str] = "en_woman_1"
+    format: Literal["wav", "mulaw"] = "wav"
 
 class BusinessInput(BaseModel):
     business_name: str
@@ -40,71 +112,126 @@ def generate_call_script(business_name: str, location: str, role: str, employmen
     return base_script
 """
 
-def encode_audio_to_base64(file_path: str) -> str: 
-    with open(file_path, "rb") as audio_file:
-        return base64.b64encode(audio_file.read()).decode("utf-8")
-
-
-def generate_tts_audio(text: str, voice: str = "en_woman_1", output_filename: str = "output_audio.wav") -> str:
+async def synthesize_wav(text: str, voice: str = "en_woman_1") -> bytes:
+    """WAV bytes for `text`, from the TTS cache when this line was said before"""
+    cached = tts_cache.get(text, voice, "wav")
+    if cached is not None:
+        print(f"⚡ TTS cache hit: {text[:50]}...")
+        return cached
 
+    print(f"Generating TTS for text: {text[:50]}...")
+    
+    pcm = await models.speech(TTS_MODEL, voice, text, response_format="pcm")
+    pcm = polish_speech(pcm)
+    
+    wav_bytes = pcm_to_wav(pcm)
+    tts_cache.put(text, voice, "wav", wav_bytes)
+    return wav_bytes
+
+
+async def synthesize_audio(text: str, voice: str = "en_woman_1", audio_format: str = "wav") -> bytes:
+    """`text` as a WAV in `audio_format` (see AUDIO_FORMATS), each format cached on its own"""
+    if audio_format == "wav":
+        return await synthesize_wav(text, voice)
+    cached = tts_cache.get(text, voice, audio_format)
+    if cached is not None:
+        print(f"⚡ TTS cache hit ({audio_format}): {text[:50]}...")
+        return cached
+
+    with wave.open(io.BytesIO(await synthesize_wav(text, voice)), "rb") as wav_file:
+        pcm = wav_file.readframes(wav_file.getnframes())
+    audio = mulaw_wav(pcm, input_rate=24000)
+    tts_cache.put(text, voice, audio_format, audio)
+    return audio
+
+
+def polish_speech(pcm: bytes) -> bytes:
+    """Trim silence, cap pauses and level loudness of 24 kHz PCM, logging the durations"""
+    pcm, report = speech_polisher.process(pcm, rate=24000)
+    print(f"✂️ Speech {report['before']:.2f}s → {report['after']:.2f}s "
+          f"({report['pauses_capped']} pauses capped, {report['gain_db']:+.1f} dB)")
+    return pcm
+
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    """Wrap Boson's raw 24 kHz 16-bit mono PCM in a WAV header"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)  
+        wav_file.setsampwidth(2)  
+        wav_file.setframerate(24000)  
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+async def stream_mulaw(text: str, voice: str = "en_woman_1"):
+    """Yield `text` as 8 kHz μ-law (Twilio Media Streams' format) while it is synthesized.
+
+    Each PCM chunk is resampled and sent on as soon as Boson returns it. The
+    whole utterance is added to the TTS cache at the end, so the next time it
+    is said (streamed or not) nothing is synthesized.
+    """
+    encoder = MulawStreamEncoder(input_rate=24000, output_rate=8000)
+
+    cached = tts_cache.get(text, voice, "wav")
+    if cached is not None:
+        print(f"⚡ TTS cache hit (stream): {text[:50]}...")
+        with wave.open(io.BytesIO(cached), "rb") as wav_file:
+            pcm = wav_file.readframes(wav_file.getnframes())
+        for start in range(0, len(pcm), TTS_STREAM_CHUNK):
+            yield encoder.encode(pcm[start:start + TTS_STREAM_CHUNK])
+        yield encoder.flush()
+        return
+
+    print(f"Streaming TTS for text: {text[:50]}...")
+    pcm_chunks = []
+    async for chunk in models.speech_stream(TTS_MODEL, voice, text, response_format="pcm", chunk_size=TTS_STREAM_CHUNK):
+        pcm_chunks.append(chunk)
+        mulaw = encoder.encode(chunk)
+        if mulaw:
+            yield mulaw
+    yield encoder.flush()
+    # Too late to trim what was just streamed, but later plays get the polished clip
+    tts_cache.put(text, voice, "wav", pcm_to_wav(polish_speech(b"".join(pcm_chunks))))
+
+
+async def generate_tts_audio(text: str, voice: str = "en_woman_1") -> str:
+    """Synthesize `text` and return its audio id; the audio is served at /audio/{id}"""
     try:
-        print(f"Generating TTS for text: {text[:50]}...")
-        
-        response = client.audio.speech.create(
-            model="higgs-audio-generation-Hackathon",
-            voice=voice,
-            input=text,
-            response_format="pcm"
-        )
-        
-        audio_data = response.content
-        
-        with wave.open(output_filename, "wb") as wav_file:
-            wav_file.setnchannels(1)  
-            wav_file.setsampwidth(2)  
-            wav_file.setframerate(24000)  
-            wav_file.writeframes(audio_data)
-        
-        print(f"✓ Audio saved to: {output_filename}")
-        return output_filename
+        await synthesize_wav(text, voice)
+        audio_id = cache_key(text, voice, "wav")
+        print(f"✓ Audio ready: /audio/{audio_id}")
+        return audio_id
     
     except Exception as e:
         print(f"✗ TTS Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"TTS generation error: {str(e)}")
 
 
-def transcribe_audio(audio_path: str) -> str:
+async def read_audio_upload(upload: UploadFile) -> AudioUpload:
+    """The upload's bytes and base64, read in memory; 413 if it is over MAX_UPLOAD_BYTES"""
+    try:
+        return await AudioUpload.read(upload, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def transcribe_audio(audio: AudioUpload) -> str:
   
     try:
-        print(f"Transcribing audio: {audio_path}")
+        print(f"Transcribing audio: {audio.filename} ({len(audio.data)} bytes)")
+        
+        # Long WAV recordings are split at quiet points and the pieces transcribed side by side
+        pieces = split_wav(audio.data, TRANSCRIBE_CHUNK_SECONDS) if audio.format == "wav" else None
+        if pieces and len(pieces) > 1:
+            print(f"Long recording: transcribing {len(pieces)} chunks")
+            texts = await asyncio.gather(*(
+                transcribe_base64(base64.b64encode(piece).decode("ascii"), "wav") for piece in pieces
+            ))
+            transcription = " ".join(text.strip() for text in texts if text)
+        else:
+            transcription = await transcribe_base64(audio.base64, audio.format)
         
-        # Encode audio to base64
-        audio_base64 = encode_audio_to_base64(audio_path)
-        file_format = audio_path.split(".")[-1]
-        
-        # Call Higgs Audio Understanding API
-        response = client.chat.completions.create(
-            model="higgs-audio-understanding-Hackathon",
-            messages=[
-                {"role": "system", "content": "Transcribe this audio accurately."},
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_audio",
-                            "input_audio": {
-                                "data": audio_base64,
-                                "format": file_format,
-                            },
-                        },
-                    ],
-                },
-            ],
-            max_completion_tokens=256,
-            temperature=0.0,
-        )
-        
-        transcription = response.choices[0].message.content
         print(f"Transcription: {transcription}")
         return transcription
     
@@ -112,7 +239,32 @@ def transcribe_audio(audio_path: str) -> str:
         print(f"✗ ASR Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"ASR transcription error: {str(e)}")
 
-def generate_adaptive_greeting(greeting: str, business_info: BusinessInput) -> str: 
+
+async def transcribe_base64(audio_base64: str, file_format: str) -> str:
+    # Call Higgs Audio Understanding API
+    return await models.chat(
+        ASR_MODEL,
+        messages=[
+            {"role": "system", "content": "Transcribe this audio accurately."},
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "input_audio",
+                        "input_audio": {
+                            "data": audio_base64,
+                            "format": file_format,
+                        },
+                    },
+                ],
+            },
+        ],
+        max_completion_tokens=256,
+        temperature=0.0,
+    )
+
+
+async def generate_adaptive_greeting(greeting: str, business_info: BusinessInput) -> str: 
     try: 
         system_prompt = """You are making an automated call to ask about hiring.
 The business just answered the phone. Respond naturally to their greeting, then immediately ask if they're hiring.
@@ -134,8 +286,8 @@ Additional notes: {business_info.notes if business_info.notes else "None"}
 They answered the phone with: "{greeting}"
 
 What should I say?"""
-        response = client.chat.completions.create(
-            model ="Qwen3-32B-non-thinking-Hackathon",
+        adaptive_response = await models.chat(
+            LLM_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -144,7 +296,7 @@ What should I say?"""
             temperature=0.7
             )
         
-        adaptive_response = response.choices[0].message.content.strip()
+        adaptive_response = adaptive_response.strip()
         print(f"\n🤖 Generated response: {adaptive_response}")
         return adaptive_response
 
@@ -152,10 +304,141 @@ What should I say?"""
         print(f"✗ LLM Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Response generation error: {str(e)}")
     
-def parse_hiring_status (response: str) -> dict: 
+def conversation_messages(their_message: str, business_name: str, role: str, employment_type: str, location: str) -> list:
+    """Prompt for a natural reply to whatever the business just said"""
+    system_prompt = """You are a friendly professional recruiter making a phone call.
+
+Your goal: Have a natural conversation and find out if they're hiring for the position.
+
+CRITICAL RULES:
+1. ALWAYS answer their questions directly and naturally first
+2. Be warm, human, and conversational
+3. Keep responses SHORT (1-2 sentences max)
+4. After answering, smoothly transition to asking about hiring
+5. Sound like a real person having a conversation, not a robot
+
+Examples:
+- They say "Hello?" → "Hi! I'm calling to see if you're hiring for Software Engineers."
+- They say "Who is this?" → "Oh hi! I'm a recruiter reaching out. Are you folks currently hiring for any Software Engineer positions?"
+- They say "Can I ask who this is?" → "Of course! I'm calling to ask about job openings. Are you hiring for Software Engineers right now?"
+- They say "What company are you from?" → "I'm reaching out on behalf of candidates. Are you currently looking for Software Engineers?"
+- They say "What position?" → "Full-time Software Engineer in Toronto. Is that something you have open?"
+- They say "How's your day?" → "Pretty good, thanks for asking! I'm calling to see if you're hiring for Software Engineers."
+- They say "We might be" → "Oh great! Do you have an open Software Engineer position right now?"
+- They say "Send an email" → "Sure thing! Just to confirm, are you currently hiring for Software Engineers?"
+- They say "I'm busy" → "No problem, quick question - are you hiring for Software Engineers? Just yes or no."
+
+Be natural, friendly, and human. Actually answer what they ask, then bring it back to hiring.
+
+Just respond with the message - no labels or formatting."""
+
+    user_prompt = f"""Position: {employment_type} {role}
+Location: {location}
+Business: {business_name}
+
+They just said: "{their_message}"
+
+How do I respond naturally?"""
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+async def respond_and_speak(their_message: str, business_name: str, role: str, employment_type: str, location: str, voice: str = "en_woman_1", audio_format: str = "wav"):
+    """Yield NDJSON lines: the spoken reply to `their_message`, one segment per sentence.
+
+    LLM tokens are streamed and cut at sentence boundaries; each finished
+    sentence goes to TTS straight away while the LLM carries on writing.
+    Segments are yielded in order as soon as their audio is ready, then a
+    final {"done": true} line with the whole reply. A cached reply to a
+    common utterance skips the LLM and goes straight to TTS.
+    """
+    start = time.perf_counter()
+    reply_key = ResponseCache.key(their_message, role, employment_type, location)
+    cached = response_cache.get(reply_key)
+    pending = []  # (index, sentence, TTS task), in speaking order
+    sent = 0
+
+    def speak_sentence(sentence):
+        pending.append((sent + len(pending), sentence, asyncio.create_task(synthesize_audio(sentence, voice, audio_format))))
+
+    async def ready_segments(wait=False):
+        nonlocal sent
+        while pending and (wait or pending[0][2].done()):
+            index, sentence, task = pending.pop(0)
+            audio = await task
+            sent += 1
+            print(f"🗣️ Segment {index} ready after {time.perf_counter() - start:.2f}s: {sentence[:50]}")
+            yield json.dumps({
+                "index": index,
+                "text": sentence,
+                "audio_id": cache_key(sentence, voice, audio_format),
+                "audio": base64.b64encode(audio).decode("ascii"),
+                "elapsed": round(time.perf_counter() - start, 3)
+            }) + "\n"
+
+    async def cached_reply():
+        yield cached
+
+    try:
+        reply, buffer = "", ""
+        if cached:
+            print(f"\n⚡ Cached response: {cached}")
+            deltas = cached_reply()
+        else:
+            deltas = models.chat_stream(
+                LLM_MODEL,
+                messages=conversation_messages(their_message, business_name, role, employment_type, location),
+                max_tokens=100,
+                temperature=0.8
+            )
+        async for delta in deltas:
+            reply += delta
+            buffer += delta
+            *sentences, buffer = SENTENCE_END.split(buffer)
+            for sentence in sentences:
+                if sentence.strip():
+                    speak_sentence(sentence.strip())
+            async for line in ready_segments():
+                yield line
+        if buffer.strip():
+            speak_sentence(buffer.strip())
+        async for line in ready_segments(wait=True):
+            yield line
+
+        print(f"\n💬 Spoken response: {reply.strip()}")
+        if not cached:
+            response_cache.put(reply_key, reply.strip(), business_name)
+        yield json.dumps({
+            "done": True,
+            "text": reply.strip(),
+            "cached": bool(cached),
+            "segments": sent,
+            "elapsed": round(time.perf_counter() - start, 3),
+            "timings": request_timings()  # the Server-Timing header went out before any of this ran
+        }) + "\n"
+    except Exception as e:
+        # Headers are already out, so failures are reported in-band
+        print(f"✗ Respond-and-speak Error: {str(e)}")
+        yield json.dumps({"error": str(e)}) + "\n"
+    finally:
+        for _, _, task in pending:
+            task.cancel()
+
+async def parse_hiring_status (response: str) -> dict: 
     """
     Parse their answer to determine hiring status
+    
+    Plain answers are settled by the local classifier in microseconds; only
+    the ones it isn't sure about go to the LLM
     """
+    local = classify_hiring(response)
+    if local["probability"] >= HIRING_CLASSIFIER_THRESHOLD:
+        print(f"⚡ Local hiring classifier: {local['status']} ({local['probability']:.2f}) {local['cues']}")
+        return {**local, "source": "local"}
+    print(f"🤔 Local classifier unsure ({local['status']}, {local['probability']:.2f}), asking the LLM")
+
     try:
         system_prompt = """Analyze this business response to determine their hiring status.
 
@@ -169,8 +452,8 @@ Examples:
 - "No" → STATUS: NOT_HIRING, CONFIDENCE: HIGH, DETAILS: Not hiring
 - "What position?" → STATUS: UNCERTAIN, CONFIDENCE: LOW, DETAILS: Asked for clarification"""
 
-        response_text = client.chat.completions.create(
-            model="Qwen3-32B-non-thinking-Hackathon",
+        analysis = await models.chat(
+            LLM_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Business said: \"{response}\""}
@@ -179,14 +462,14 @@ Examples:
             temperature=0.3
         )
         
-        analysis = response_text.choices[0].message.content
         print(f"\n📊 Raw LLM Response:\n{analysis}\n")
         
         # Parse response
         result = {
             "status": "UNCERTAIN",
             "confidence": "LOW",
-            "details": ""
+            "details": "",
+            "source": "llm"
         }
         
         for line in analysis.strip().split('\n'):
@@ -225,22 +508,77 @@ async def generate_audio_endpoint(request: TTSRequest):
     Example:
     {
         "text": "Hello, are you currently hiring?",
-        "voice": "en_woman_1"
+        "voice": "en_woman_1",
+        "format": "mulaw"
     }
     
     Available voices: en_woman_1, en_man, belinda, mabel, chadwick, vex, zh_man_sichuan
+    Formats: wav (24 kHz PCM, the default) or mulaw (8 kHz μ-law WAV, for phone calls)
+    
+    Returns the WAV itself; the X-Audio-Id header names it for GET /audio/{id}
     """
     try:
-        audio_path = generate_tts_audio(request.text, request.voice)
-        return {
-            "success": True,
-            "message": "Audio generated successfully",
-            "audio_path": audio_path,
-            "text": request.text,
-            "voice": request.voice
-        }
+        audio = await synthesize_audio(request.text, request.voice, request.format)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"✗ TTS Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"TTS generation error: {str(e)}")
+    return Response(
+        content=audio,
+        media_type="audio/wav",
+        headers={"X-Audio-Id": cache_key(request.text, request.voice, request.format)}
+    )
+
+@app.post("/generate_audio_stream")
+async def generate_audio_stream_endpoint(request: TTSRequest):
+    """
+    Streaming TTS for Twilio Media Streams
+    
+    Same body as /generate_audio, but returns raw 8 kHz μ-law (no header),
+    sent chunk by chunk while the audio is still being synthesized
+    """
+    return StreamingResponse(stream_mulaw(request.text, request.voice), media_type="audio/basic")
+
+@app.get("/audio/{audio_id}")
+async def get_audio(audio_id: str):
+    """Synthesized audio by id, while it is still in the TTS cache"""
+    wav_bytes = tts_cache.get_by_key(audio_id.removesuffix(".wav"))
+    if wav_bytes is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    return Response(content=wav_bytes, media_type="audio/wav")
+
+@app.get("/tts_cache/stats")
+async def tts_cache_stats():
+    """TTS cache size, hit rate and pinned utterances"""
+    return {**tts_cache.stats(), "pins": tts_cache.pinned()}
+
+@app.get("/response_cache/stats")
+async def response_cache_stats():
+    """Cached replies to common utterances and the cache's hit rate"""
+    return response_cache.stats()
+
+@app.get("/speech_polish/stats")
+async def speech_polish_stats():
+    """Seconds of synthesized speech before and after silence trimming"""
+    return speech_polisher.stats()
+
+@app.get("/model_gateway/stats")
+async def model_gateway_stats():
+    """Per-model concurrency limit, requests in flight and queued, and average wait"""
+    return models.stats()
+
+@app.post("/tts_cache/pin")
+async def pin_tts(request: TTSRequest):
+    """Keep an utterance in the TTS cache for good, synthesizing it now if needed"""
+    key = tts_cache.pin(request.text, request.voice, request.format)
+    try:
+        await synthesize_audio(request.text, request.voice, request.format)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS generation error: {str(e)}")
+    return {"success": True, "key": key, "text": request.text, "voice": request.voice, "format": request.format}
+
+@app.delete("/tts_cache/pin")
+async def unpin_tts(request: TTSRequest):
+    return {"success": tts_cache.unpin(request.text, request.voice, request.format)}
 
 @app.post("/generate_adaptive_greeting")
 async def generate_adaptive_greeting_endpoint(
@@ -262,7 +600,7 @@ async def generate_adaptive_greeting_endpoint(
             employment_type=employment_type,
             notes=""
         )
-        adaptive_response = generate_adaptive_greeting(greeting, business_info)
+        adaptive_response = await generate_adaptive_greeting(greeting, business_info)
         return {
             "success": True,
             "response": adaptive_response
@@ -281,76 +619,78 @@ async def generate_conversation_response_endpoint(
 ):
     """
     Generate natural conversational response - works for initial greeting and follow-ups
+    
+    Common utterances are answered from the response cache without calling the LLM
     """
+    reply_key = ResponseCache.key(their_message, role, employment_type, location)
+    cached = response_cache.get(reply_key)
+    if cached:
+        print(f"\n⚡ Cached response: {cached}")
+        return {
+            "success": True,
+            "response": cached,
+            "cached": True
+        }
+    
     try:
-        is_first = is_first_message.lower() == "true"
-        
-        system_prompt = """You are a friendly professional recruiter making a phone call.
-
-Your goal: Have a natural conversation and find out if they're hiring for the position.
-
-CRITICAL RULES:
-1. ALWAYS answer their questions directly and naturally first
-2. Be warm, human, and conversational
-3. Keep responses SHORT (1-2 sentences max)
-4. After answering, smoothly transition to asking about hiring
-5. Sound like a real person having a conversation, not a robot
-
-Examples:
-- They say "Hello?" → "Hi! I'm calling to see if you're hiring for Software Engineers."
-- They say "Who is this?" → "Oh hi! I'm a recruiter reaching out. Are you folks currently hiring for any Software Engineer positions?"
-- They say "Can I ask who this is?" → "Of course! I'm calling to ask about job openings. Are you hiring for Software Engineers right now?"
-- They say "What company are you from?" → "I'm reaching out on behalf of candidates. Are you currently looking for Software Engineers?"
-- They say "What position?" → "Full-time Software Engineer in Toronto. Is that something you have open?"
-- They say "How's your day?" → "Pretty good, thanks for asking! I'm calling to see if you're hiring for Software Engineers."
-- They say "We might be" → "Oh great! Do you have an open Software Engineer position right now?"
-- They say "Send an email" → "Sure thing! Just to confirm, are you currently hiring for Software Engineers?"
-- They say "I'm busy" → "No problem, quick question - are you hiring for Software Engineers? Just yes or no."
-
-Be natural, friendly, and human. Actually answer what they ask, then bring it back to hiring.
-
-Just respond with the message - no labels or formatting."""
-
-        user_prompt = f"""Position: {employment_type} {role}
-Location: {location}
-Business: {business_name}
-
-They just said: "{their_message}"
-
-How do I respond naturally?"""
-
-        response = client.chat.completions.create(
-            model="Qwen3-32B-non-thinking-Hackathon",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+        conversation_response = await models.chat(
+            LLM_MODEL,
+            messages=conversation_messages(their_message, business_name, role, employment_type, location),
             max_tokens=100,
             temperature=0.8
         )
         
-        conversation_response = response.choices[0].message.content.strip()
+        conversation_response = conversation_response.strip()
         print(f"\n💬 Conversational response: {conversation_response}")
+        response_cache.put(reply_key, conversation_response, business_name)
         
         return {
             "success": True,
-            "response": conversation_response
+            "response": conversation_response,
+            "cached": False
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/respond_and_speak")
+async def respond_and_speak_endpoint(
+    their_message: str = Form(...),
+    business_name: str = Form(...),
+    role: str = Form(...),
+    employment_type: str = Form(...),
+    location: str = Form(...),
+    voice: str = Form("en_woman_1"),
+    format: str = Form("wav")
+):
+    """
+    Conversational response and its audio in one call
+    
+    Same form fields as /generate_conversation_response. Streams NDJSON:
+    {"index", "text", "audio_id", "audio" (base64 WAV), "elapsed"} per
+    sentence, in speaking order, then {"done": true, "text", "segments"}.
+    The first sentence is synthesized while the rest is still being generated.
+    `format` is wav or mulaw, as for /generate_audio.
+    """
+    if format not in AUDIO_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown audio format: {format}")
+    return StreamingResponse(
+        respond_and_speak(their_message, business_name, role, employment_type, location, voice, format),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/analyze_hiring_status")
 async def analyze_hiring_status_endpoint(response_text: str = Form(...)):
     """
     Analyze hiring status from text response
     """
     try:
-        result = parse_hiring_status(response_text)
+        result = await parse_hiring_status(response_text)
         return {
             "success": True,
             "status": result["status"],
             "confidence": result["confidence"],
-            "details": result["details"]
+            "details": result["details"],
+            "source": result["source"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -362,19 +702,10 @@ async def transcribe_audio_endpoint(file: UploadFile = File(...)):
     
     Upload a WAV or MP3 audio file to get transcription
     """
-    temp_audio_path = None
+    audio = await read_audio_upload(file)
     try:
-        # Save uploaded file temporarily
-        temp_audio_path = f"temp_{file.filename}"
-        with open(temp_audio_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
         # Transcribe the audio
-        transcription = transcribe_audio(temp_audio_path)
-        
-        # Clean up temp file
-        os.remove(temp_audio_path)
+        transcription = await transcribe_audio(audio)
         
         return {
             "success": True,
@@ -383,9 +714,6 @@ async def transcribe_audio_endpoint(file: UploadFile = File(...)):
         }
     
     except Exception as e:
-        # Clean up temp file if it exists
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/handle_initial_greeting")
@@ -412,7 +740,7 @@ async def handle_initial_greeting(
     - Upload audio of them saying "Hello, Joe's Diner"
     - Get back audio saying "Hello! I'm calling to ask if you're hiring for servers"
     """
-    temp_audio_path = None
+    greeting = await read_audio_upload(greeting_audio)
     try:
         print("\n" + "="*50)
         print("📞 STEP 1: HANDLING INITIAL GREETING")
@@ -428,37 +756,25 @@ async def handle_initial_greeting(
         )
         
         # Step 1: Transcribe their greeting (ASR)
-        temp_audio_path = f"temp_greeting_{greeting_audio.filename}"
-        with open(temp_audio_path, "wb") as f:
-            content = await greeting_audio.read()
-            f.write(content)
-        
-        greeting_text = transcribe_audio(temp_audio_path)
-        os.remove(temp_audio_path)
+        greeting_text = await transcribe_audio(greeting)
         
         print(f"\n🎤 Business greeting: {greeting_text}")
         
         # Step 2: Generate adaptive response with hiring question (LLM)
-        response_text = generate_adaptive_greeting(greeting_text, business_info)
+        response_text = await generate_adaptive_greeting(greeting_text, business_info)
         
         # Step 3: Convert to audio (TTS)
-        response_audio_filename = f"question_{business_name.replace(' ', '_')}.wav"
-        response_audio_path = generate_tts_audio(
-            text=response_text,
-            output_filename=response_audio_filename
-        )
+        response_audio_id = await generate_tts_audio(text=response_text)
         
         return {
             "success": True,
             "greeting_transcription": greeting_text,
             "system_response_text": response_text,
-            "system_response_audio": response_audio_path,
+            "system_response_audio": f"/audio/{response_audio_id}",
             "next_step": "Play this audio to business, then send their answer to /parse_hiring_response"
         }
     
     except Exception as e:
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
         print(f"\n✗ Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -480,31 +796,21 @@ async def parse_hiring_response(
     - Upload audio of them saying "Yes, we're hiring"
     - Get back: status=HIRING, audio saying "Thank you!"
     """
-    temp_audio_path = None
+    answer = await read_audio_upload(response_audio)
     try:
         print("\n" + "="*50)
         print("📞 STEP 2: PARSING HIRING RESPONSE")
         print("="*50)
         
         # Step 1: Transcribe their response (ASR)
-        temp_audio_path = f"temp_response_{response_audio.filename}"
-        with open(temp_audio_path, "wb") as f:
-            content = await response_audio.read()
-            f.write(content)
-        
-        response_text = transcribe_audio(temp_audio_path)
-        os.remove(temp_audio_path)
+        response_text = await transcribe_audio(answer)
         
         print(f"\n🎤 Business response: {response_text}")
         
-        hiring_analysis = parse_hiring_status(response_text)
+        hiring_analysis = await parse_hiring_status(response_text)
     
-        closing_text = "Thank you so much for your time. Have a great day!"
-        closing_audio_filename = f"closing_{business_name.replace(' ', '_')}.wav"
-        closing_audio_path = generate_tts_audio(
-            text=closing_text,
-            output_filename=closing_audio_filename
-        )
+        closing_text = CLOSING_TEXT
+        closing_audio_id = await generate_tts_audio(text=closing_text)
         
         print(f"\n✅ Hiring Status: {hiring_analysis['status']}")
         print(f"📊 Confidence: {hiring_analysis['confidence']}")
@@ -516,13 +822,11 @@ async def parse_hiring_response(
             "confidence": hiring_analysis['confidence'],
             "details": hiring_analysis['details'],
             "closing_message_text": closing_text,
-            "closing_message_audio": closing_audio_path,
+            "closing_message_audio": f"/audio/{closing_audio_id}",
             "call_complete": True
         }
     
     except Exception as e:
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
         print(f"\n✗ Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -562,9 +866,16 @@ if __name__ == "__main__":
     print("\n🚀 Starting TTS & ASR Test System...")
     print("📝 Endpoints:")
     print("   - POST /generate_audio : Test TTS")
+    print("   - POST /generate_audio_stream : TTS as streamed 8 kHz μ-law")
+    print("   - POST /respond_and_speak : LLM reply + TTS per sentence, as NDJSON")
     print("   - POST /transcribe_audio : Test ASR")
     print("   - POST /handle_initial_greeting : Step 1 - Handle greeting")
     print("   - POST /parse_hiring_response : Step 2 - Parse hiring status")
+    print("   - GET  /tts_cache/stats : TTS cache hit rate and pins")
+    print("   - GET  /model_gateway/stats : Model concurrency and queue depth")
+    print("   - GET  /response_cache/stats : Cached conversation replies")
+    print("   - GET  /speech_polish/stats : Seconds of dead air trimmed from TTS")
+    print("   - GET  /metrics : Prometheus request and model latency histograms")
     print("\n")
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,86 @@
+import struct
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MULAW_BIAS = 0x84
+
+
+def mulaw_encode(samples):
+    """16-bit PCM samples -> G.711 μ-law bytes"""
+    samples = np.asarray(samples, dtype=np.int32) >> 2  # G.711 works on 14 bits
+    sign = (samples < 0).astype(np.int32) << 7
+    magnitude = np.minimum(np.abs(samples) + (MULAW_BIAS >> 2), 0x1FFF)  # clip to the top segment
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    mantissa = (magnitude >> (exponent + 1)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def mulaw_decode(data):
+    """G.711 μ-law bytes -> 16-bit PCM samples"""
+    codes = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + MULAW_BIAS << exponent) - MULAW_BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def mulaw_wav(pcm, input_rate=24000):
+    """A whole 16-bit mono PCM clip as an 8 kHz μ-law WAV, the format phone calls carry"""
+    encoder = MulawStreamEncoder(input_rate=input_rate, output_rate=8000)
+    data = encoder.encode(pcm) + encoder.flush()
+    fmt = struct.pack("<HHIIHHH", 7, 1, 8000, 8000, 1, 8, 0)  # WAVE_FORMAT_MULAW, mono, 8 kHz, 8 bits
+    body = b"".join([
+        b"WAVE",
+        b"fmt ", struct.pack("<I", len(fmt)), fmt,
+        b"fact", struct.pack("<II", 4, len(data)),  # sample count, required for non-PCM WAVs
+        b"data", struct.pack("<I", len(data)), data, b"\0" * (len(data) % 2),
+    ])
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def lowpass_taps(cutoff, rate, taps):
+    """Windowed-sinc low-pass FIR filter with unity gain at DC"""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(2 * cutoff / rate * n) * np.hamming(taps)
+    return h / h.sum()
+
+
+class MulawStreamEncoder:
+    """Turns a stream of 16-bit PCM chunks into 8 kHz μ-law, chunk by chunk.
+
+    The input is low-passed below the new Nyquist frequency and decimated by
+    an integer factor (24 kHz -> 8 kHz for Boson TTS). Filter history, the
+    decimation phase and any odd trailing byte carry over between chunks, so
+    the output is the same however the input happens to be split.
+    """
+
+    def __init__(self, input_rate=24000, output_rate=8000, taps=63):
+        if input_rate % output_rate:
+            raise ValueError("input_rate must be a multiple of output_rate")
+        self.factor = input_rate // output_rate
+        self._taps = lowpass_taps(0.45 * output_rate, input_rate, taps)[::-1]
+        self._history = np.zeros(taps - 1)
+        self._phase = 0  # index of the next kept sample within the next chunk
+        self._pending = b""
+
+    def encode(self, pcm):
+        data = self._pending + pcm
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        if not usable:
+            return b""
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float64)
+        signal = np.concatenate([self._history, samples])
+        self._history = signal[len(signal) - len(self._history):]
+
+        windows = sliding_window_view(signal, len(self._taps))[self._phase::self.factor]
+        self._phase = (self._phase - len(samples)) % self.factor
+        if not len(windows):
+            return b""
+        return mulaw_encode(np.clip(np.rint(windows @ self._taps), -32768, 32767))
+
+    def flush(self):
+        """Push the filter's tail out, e.g. once TTS has finished"""
+        tail = self.encode(b"\x00\x00" * (len(self._taps) // 2))
+        self._pending = b""
+        return tail
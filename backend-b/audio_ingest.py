@@ -0,0 +1,87 @@
+import base64, io, wave
+import numpy as np
+
+READ_CHUNK = 192 * 1024  # a multiple of 3, so base64 pieces join without padding in between
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class AudioUpload:
+    """An uploaded recording, held in memory: raw bytes plus their base64.
+
+    The base64 is produced piece by piece while the upload is read, so the
+    encoding overlaps the network read and no temp file is ever written.
+    """
+
+    def __init__(self, data, encoded, filename):
+        self.data = data
+        self.base64 = encoded
+        self.filename = filename or ""
+        extension = self.filename.rsplit(".", 1)[-1].lower() if "." in self.filename else ""
+        self.format = extension or "wav"
+
+    @classmethod
+    async def read(cls, upload, max_bytes):
+        """Read a FastAPI UploadFile in chunks, giving up as soon as it exceeds `max_bytes`"""
+        data = bytearray()
+        pieces = []
+        carry = b""
+        while True:
+            chunk = await upload.read(READ_CHUNK)
+            if not chunk:
+                break
+            if len(data) + len(chunk) > max_bytes:
+                raise UploadTooLarge(f"Upload is larger than {max_bytes} bytes")
+            data += chunk
+            pending = carry + chunk
+            usable = len(pending) - len(pending) % 3
+            pieces.append(base64.b64encode(pending[:usable]))
+            carry = pending[usable:]
+        pieces.append(base64.b64encode(carry))
+        return cls(bytes(data), b"".join(pieces).decode("ascii"), upload.filename)
+
+
+def split_wav(data, max_seconds, search_seconds=1.0):
+    """Split a long WAV into pieces of at most `max_seconds`, as WAV bytes.
+
+    Each cut is moved to the quietest 20 ms within `search_seconds` before
+    the limit, so words are rarely cut in half. Returns None if `data` isn't
+    a WAV this can read, and [data] if it is short enough already.
+    """
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav_file:
+            params = wav_file.getparams()
+            frames = wav_file.readframes(params.nframes)
+    except (wave.Error, EOFError):
+        return None
+    rate = params.framerate
+    if params.nframes <= max_seconds * rate or params.sampwidth != 2:
+        return [data]
+
+    samples = np.frombuffer(frames, dtype="<i2").reshape(-1, params.nchannels)
+    energy = np.abs(samples.astype(np.int32)).sum(axis=1)
+    window = max(1, rate // 50)
+    limit = int(max_seconds * rate)
+    search = min(int(search_seconds * rate), limit // 2)
+
+    pieces, start = [], 0
+    while len(samples) - start > limit:
+        lo, hi = start + limit - search, start + limit
+        loudness = np.convolve(energy[lo:hi], np.ones(window), mode="valid")
+        cut = lo + int(np.argmin(loudness)) + window // 2
+        pieces.append(samples[start:cut])
+        start = cut
+    pieces.append(samples[start:])
+
+    wavs = []
+    for piece in pieces:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(params.nchannels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            wav_file.writeframes(piece.tobytes())
+        wavs.append(buffer.getvalue())
+    return wavs
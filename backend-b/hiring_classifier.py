@@ -0,0 +1,156 @@
+import math, re
+
+# Contractions expanded before matching, so "aren't" and "are not" read the same
+CONTRACTIONS = [
+    (r"\bcan't\b", "can not"), (r"\bwon't\b", "will not"), (r"n't\b", " not"),
+    (r"'re\b", " are"), (r"'m\b", " am"), (r"'ve\b", " have"), (r"'ll\b", " will"), (r"'d\b", " would"),
+]
+
+# Phrases (as token sequences) and how strongly they point to hiring (+) or not (-).
+# Longer phrases are matched first and their tokens aren't counted again.
+POLARITY_PHRASES = {
+    "we are hiring": 4, "we are always hiring": 4, "always hiring": 4, "currently hiring": 3,
+    "still hiring": 3, "we are looking": 3, "looking for": 2, "positions available": 3, "position available": 3,
+    "openings": 2, "opening": 2, "accepting applications": 3, "taking applications": 3, "apply online": 3,
+    "drop off": 1, "resume": 2, "application": 2, "hiring": 2, "yes": 3, "yeah": 3, "yep": 3, "yup": 3,
+    "absolutely": 3, "definitely": 3, "of course": 2, "sure": 1, "full time": 0, "part time": 0,
+    "no problem": 0, "no worries": 0, "no doubt": 1,  # "no" as an interjection, not an answer
+    "no": -3, "nope": -3, "nah": -3, "fully staffed": -4, "full staff": -4, "we are full": -4, "hiring freeze": -4,
+    "no openings": -4, "no positions": -4, "not hiring": -4, "not at the moment": -4, "not right now": -4,
+    "not currently": -4, "not at this time": -4, "unfortunately": -2, "sorry": -1, "we are good": -2,
+}
+# Phrases that mean the answer isn't known yet, whatever else was said
+UNCERTAIN_PHRASES = {
+    "not sure": 3, "do not know": 3, "no idea": 3, "maybe": 2, "might be": 2, "possibly": 2, "depends": 2,
+    "ask my manager": 3, "ask the manager": 3, "talk to the manager": 3, "speak to the manager": 3,
+    "manager": 1, "call back": 3, "call later": 3, "check": 2, "what position": 3, "which position": 3,
+    "what role": 3, "what job": 3, "who is this": 3, "who is calling": 3, "what company": 3, "sorry what": 3,
+    "can you repeat": 3, "say that again": 3, "pardon": 3,
+}
+NEGATORS = {"not", "never"}
+NEGATION_SCOPE = 3  # tokens after a negator whose polarity is flipped
+# "no" is mostly an interjection ("no problem, we're hiring"), so it only
+# negates when it quantifies one of these, as in "no job openings"
+NEGATABLE_NOUNS = {"openings", "opening", "positions available", "position available", "application", "resume"}
+DEFAULT_THRESHOLD = 0.75  # answers at least this sure skip the LLM (HIRING_CLASSIFIER_THRESHOLD in app.py)
+CLAUSE_BREAKS = {"but", "though", "although", "however", ",", ".", "?", "!"}
+
+# first token -> [(phrase tokens, weight, kind)], longest first
+_PHRASES = {}
+for _kind, _lexicon in (("polarity", POLARITY_PHRASES), ("uncertain", UNCERTAIN_PHRASES)):
+    for _phrase, _weight in _lexicon.items():
+        _PHRASES.setdefault(_phrase.split()[0], []).append((tuple(_phrase.split()), _weight, _kind))
+for _entries in _PHRASES.values():
+    _entries.sort(key=lambda entry: -len(entry[0]))
+
+
+def _match(tokens, i):
+    """The longest lexicon phrase starting at tokens[i], as (phrase, weight, kind), or None"""
+    for phrase, weight, kind in _PHRASES.get(tokens[i], ()):
+        if tuple(tokens[i:i + len(phrase)]) == phrase:
+            return phrase, weight, kind
+    return None
+
+
+def tokenize(text):
+    text = (text or "").lower().replace("’", "'")
+    for pattern, replacement in CONTRACTIONS:
+        text = re.sub(pattern, replacement, text)
+    return re.findall(r"[a-z]+|[,.?!]", text)
+
+
+def _confidence(score):
+    return 1 - math.exp(-abs(score) / 2)
+
+
+def classify_hiring(text):
+    """Local hiring status for what the business said, with a 0-1 confidence.
+
+    Matches a weighted lexicon on whole tokens, flips positive phrases that
+    fall within a few tokens after a negator ("we are not really hiring")
+    or right before one ("absolutely not"), and lowers confidence when both
+    polarities or hedges appear. Returns
+    the same fields as the LLM parser plus `probability` and `cues`.
+    """
+    tokens = tokenize(text)
+    positive = negative = uncertain = 0.0
+    cues = []
+    negated_until = -1
+    negator_lean = False  # a bare negator's -1 that hasn't been spent on a flip yet
+    last_positive = None  # (end index, weight, cue index) of the last positive phrase
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in CLAUSE_BREAKS:
+            negated_until = -1
+            i += 1
+            continue
+        match = _match(tokens, i)
+        phrase, weight, kind = match or (None, 0, None)
+
+        if token in NEGATORS and last_positive and last_positive[0] == i:
+            # "absolutely not": the negator takes back the positive right before it
+            _, flipped, cue = last_positive
+            positive -= flipped
+            negative += flipped
+            cues[cue] = cues[cue].replace(f"(+{flipped})", f"(-{flipped})")
+            last_positive = None
+            if phrase is None:
+                i += 1
+                continue
+
+        if phrase == ("no",) and i + 1 < len(tokens):
+            following = _match(tokens, i + 1)
+            if following and " ".join(following[0]) in NEGATABLE_NOUNS:
+                negated_until = i + 1  # "no openings": flips the noun instead of counting on its own
+                i += 1
+                continue
+
+        if phrase is None:
+            if token in NEGATORS:
+                negated_until = i + NEGATION_SCOPE
+                negative += 1  # a negator with nothing to flip still leans negative
+                negator_lean = True
+                cues.append(f"{token}(-1)")
+            i += 1
+            continue
+
+        if kind == "uncertain":
+            uncertain += weight
+            cues.append(f"{' '.join(phrase)}(?{weight})")
+        else:
+            if weight > 0 and i <= negated_until:
+                weight = -weight
+                if negator_lean:
+                    negative -= 1  # the negator's lean is now counted through what it negates
+                    negator_lean = False
+            if weight > 0:
+                positive += weight
+                last_positive = (i + len(phrase), weight, len(cues))
+            else:
+                negative += -weight
+            cues.append(f"{' '.join(phrase)}({weight:+})")
+            if phrase[0] in NEGATORS:
+                negated_until = i + len(phrase) - 1 + NEGATION_SCOPE
+        i += len(phrase)
+
+    score = positive - negative
+    if uncertain > abs(score) or not cues:
+        status = "UNCERTAIN"
+        probability = _confidence(uncertain) * (0.5 if positive and negative else 1)
+    else:
+        status = "HIRING" if score > 0 else "NOT_HIRING" if score < 0 else "UNCERTAIN"
+        probability = _confidence(score)
+        if positive and negative:
+            probability *= 1 - min(positive, negative) / max(positive, negative)  # mixed signals
+        if uncertain:
+            probability *= 0.5
+    probability = round(probability, 3)
+
+    return {
+        "status": status,
+        "confidence": "HIGH" if probability >= 0.85 else "MEDIUM" if probability >= 0.6 else "LOW",
+        "probability": probability,
+        "details": "Local classifier: " + (", ".join(cues) if cues else "no cues"),
+        "cues": cues,
+    }
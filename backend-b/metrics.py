@@ -0,0 +1,31 @@
+import os, sys
+from prometheus_client import Counter, Histogram
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # repo root, for shared/
+from shared import http_metrics
+from shared.http_metrics import add_timing
+
+PREFIX = "backend_b"
+# Seconds; an LLM reply or a long line of TTS can take tens of seconds, and
+# requests also wait for a model slot
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 12, 15, 30, 60)
+
+MODEL_SECONDS = Histogram(f"{PREFIX}_model_seconds", "Model call duration, once it has a slot", ["stage"], buckets=LATENCY_BUCKETS)
+MODEL_QUEUE_SECONDS = Histogram(f"{PREFIX}_model_queue_seconds", "Time waiting for a model slot", ["stage"], buckets=LATENCY_BUCKETS)
+MODEL_ERRORS = Counter(f"{PREFIX}_model_errors_total", "Model calls that failed", ["stage"])
+
+
+def record_stage(stage, seconds, queued=0.0, error=False):
+    """Observe one model call (stage is "tts", "asr" or "llm") and add it to the request's timings"""
+    MODEL_SECONDS.labels(stage).observe(seconds)
+    MODEL_QUEUE_SECONDS.labels(stage).observe(queued)
+    if error:
+        MODEL_ERRORS.labels(stage).inc()
+    add_timing(stage, seconds)
+    if queued:
+        add_timing("queue", queued)
+
+
+def instrument(app):
+    """Request metrics, Server-Timing and GET /metrics for this service (see shared/http_metrics.py)"""
+    http_metrics.instrument(app, PREFIX, LATENCY_BUCKETS)
@@ -0,0 +1,117 @@
+import asyncio, time
+from contextlib import asynccontextmanager
+import openai
+from metrics import record_stage
+
+
+class ModelStats:
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.calls = 0
+        self.errors = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_wait": round(self.wait_seconds / self.calls, 3) if self.calls else None,
+            "avg_duration": round(self.busy_seconds / self.calls, 3) if self.calls else None,
+        }
+
+
+class ModelGateway:
+    """Async, rate-limited access to the Boson models.
+
+    Every request goes through the async OpenAI client, so a slow TTS or ASR
+    call never blocks the event loop. Each model gets its own semaphore
+    (`limits`, else `default_limit`) so a burst on one model queues up
+    instead of starving the others; how many requests are waiting for each
+    model is tracked, along with wait and run times. Each call is also
+    reported to metrics.py under its stage name (`stages`, else the model).
+    """
+
+    def __init__(self, api_key, base_url, limits=None, default_limit=4, stages=None):
+        self.client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.stages = dict(stages or {})
+        self._semaphores = {}
+        self._stats = {}
+
+    @asynccontextmanager
+    async def slot(self, model):
+        """Hold one of `model`'s concurrency slots for the duration of the block"""
+        if model not in self._semaphores:
+            limit = self.limits.get(model, self.default_limit)
+            self._semaphores[model] = asyncio.Semaphore(limit)
+            self._stats[model] = ModelStats(limit)
+        semaphore, stats = self._semaphores[model], self._stats[model]
+
+        queued_at = time.perf_counter()
+        stats.waiting += 1
+        stats.peak_waiting = max(stats.peak_waiting, stats.waiting)
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        started_at = time.perf_counter()
+        stats.wait_seconds += started_at - queued_at
+        stats.in_flight += 1
+        stats.calls += 1
+        failed = False
+        try:
+            yield
+        except Exception:
+            stats.errors += 1
+            failed = True
+            raise
+        finally:
+            stats.in_flight -= 1
+            busy = time.perf_counter() - started_at
+            stats.busy_seconds += busy
+            semaphore.release()
+            record_stage(self.stages.get(model, model), busy, started_at - queued_at, failed)
+
+    async def chat(self, model, messages, **kwargs):
+        """Complete a chat; returns the message text"""
+        async with self.slot(model):
+            response = await self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        return response.choices[0].message.content
+
+    async def chat_stream(self, model, messages, **kwargs):
+        """Yield a chat completion's text as it is generated; the slot is held until it ends"""
+        async with self.slot(model):
+            stream = await self.client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+    async def speech(self, model, voice, text, response_format="pcm"):
+        """Synthesize `text`; returns the audio bytes"""
+        async with self.slot(model):
+            response = await self.client.audio.speech.create(
+                model=model, voice=voice, input=text, response_format=response_format
+            )
+            return response.content
+
+    async def speech_stream(self, model, voice, text, response_format="pcm", chunk_size=4800):
+        """Yield synthesized audio in chunks as it arrives; the slot is held until it ends"""
+        async with self.slot(model):
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=model, voice=voice, input=text, response_format=response_format
+            ) as response:
+                async for chunk in response.iter_bytes(chunk_size):
+                    yield chunk
+
+    def stats(self):
+        return {model: stats.as_dict() for model, stats in self._stats.items()}
@@ -0,0 +1,89 @@
+import random, threading, time
+from collections import OrderedDict
+from hiring_classifier import tokenize
+
+# Sounds that don't change what was asked: "Uh, hello?" is the same turn as "Hello?"
+FILLERS = {"um", "uh", "uhm", "er", "erm", "hmm", "oh", "ah", "so", "well", "okay", "ok", "like"}
+MAX_UTTERANCE_WORDS = 8  # longer utterances are too specific to come round again
+
+
+def normalize_utterance(text):
+    """Lowercase words only, contractions expanded and fillers dropped"""
+    return " ".join(word for word in tokenize(text) if word.isalpha() and word not in FILLERS)
+
+
+class ResponseCache:
+    """LLM replies to common utterances, per campaign context.
+
+    Keys are the normalized utterance plus (role, employment type, location).
+    Each key collects `variants` LLM replies (duplicates count, but are kept
+    once) before it starts serving them, then hands out a random one, never
+    the same twice in a row, so calls don't all sound identical. Replies
+    expire after `ttl` seconds; beyond `max_keys`, the least recently used
+    key is dropped.
+    """
+
+    def __init__(self, variants=3, ttl=6 * 3600, max_keys=2000):
+        self.variants = variants
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> {"replies": [(text, stored_at)], "samples": n, "last": text}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(utterance, role, employment_type, location):
+        normalized = normalize_utterance(utterance)
+        if not normalized or len(normalized.split()) > MAX_UTTERANCE_WORDS:
+            return None
+        return (normalized, role.lower(), employment_type.lower(), location.lower())
+
+    def get(self, key):
+        """A stored reply once the key's pool is full, else None"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cutoff = time.time() - self.ttl
+                entry["replies"] = [(text, stored_at) for text, stored_at in entry["replies"] if stored_at >= cutoff]
+                if not entry["replies"]:
+                    entry["samples"] = 0  # all expired: collect a fresh pool
+            if entry is None or not entry["replies"] or entry["samples"] < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            choices = [text for text, _ in entry["replies"] if text != entry["last"]] or [entry["replies"][0][0]]
+            entry["last"] = random.choice(choices)
+            self.hits += 1
+            return entry["last"]
+
+    def put(self, key, reply, business_name=""):
+        """Add a reply to the key's pool. Replies naming the business stay out: they don't fit other calls."""
+        if key is None or not reply or (business_name and business_name.lower() in reply.lower()):
+            return
+        with self._lock:
+            entry = self._entries.setdefault(key, {"replies": [], "samples": 0, "last": None})
+            self._entries.move_to_end(key)
+            entry["samples"] += 1
+            entry["replies"] = [(text, stored_at) for text, stored_at in entry["replies"] if text != reply]
+            entry["replies"].append((reply, time.time()))
+            del entry["replies"][:-self.variants]
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "keys": len(self._entries),
+                "replies": sum(len(entry["replies"]) for entry in self._entries.values()),
+                "variants": self.variants,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,102 @@
+import threading
+import numpy as np
+
+FRAME_SECONDS = 0.01  # energy is measured per 10 ms frame
+INT16_MAX = 32767
+
+
+class SpeechPolisher:
+    """Trims dead air from synthesized speech and evens out its loudness.
+
+    Works on 16-bit mono PCM in one vectorized pass: per-frame RMS decides
+    which frames are speech (within `silence_db` of the loudest frame);
+    leading and trailing silence is cut down to `edge_seconds`, pauses
+    inside the clip are capped at `max_pause` seconds (keeping both ends of
+    the pause, so words don't get clipped), and the speech is scaled to an
+    RMS of `target_dbfs` without letting any sample peak above `peak_dbfs`.
+    """
+
+    def __init__(self, silence_db=-40.0, edge_seconds=0.05, max_pause=0.5,
+                 target_dbfs=-20.0, peak_dbfs=-1.0, max_gain_db=12.0):
+        self.silence_db = silence_db
+        self.edge_seconds = edge_seconds
+        self.max_pause = max_pause
+        self.target_dbfs = target_dbfs
+        self.peak_dbfs = peak_dbfs
+        self.max_gain_db = max_gain_db
+        self.clips = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+        self._lock = threading.Lock()
+
+    def process(self, pcm, rate=24000):
+        """Returns (polished PCM bytes, report of durations and gain)"""
+        samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % 2], dtype="<i2")
+        frame = max(1, int(rate * FRAME_SECONDS))
+        frames = len(samples) // frame
+        before = len(samples) / rate
+        if frames == 0:
+            return pcm, self._report(before, before, 0, 0.0)
+
+        # Per-frame RMS; the ragged tail joins the last frame's verdict
+        energy = samples[:frames * frame].astype(np.float32).reshape(frames, frame)
+        rms = np.sqrt((energy * energy).mean(axis=1))
+        loudest = rms.max()
+        if loudest < 1:
+            return pcm, self._report(before, before, 0, 0.0)  # all silence: nothing to go on
+        voiced = rms >= loudest * 10 ** (self.silence_db / 20)
+
+        keep = np.zeros(frames, dtype=bool)
+        speech = np.flatnonzero(voiced)
+        edge = int(self.edge_seconds / FRAME_SECONDS)
+        first, last = max(0, speech[0] - edge), min(frames - 1, speech[-1] + edge)
+        keep[first:last + 1] = True
+
+        # Runs of silent frames between first and last speech, capped at max_pause
+        pauses_capped = 0
+        quiet = ~voiced[speech[0]:speech[-1] + 1]
+        edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1) + speech[0]
+        run_ends = np.flatnonzero(edges == -1) + speech[0]
+        limit = int(self.max_pause / FRAME_SECONDS)
+        for start, end in zip(run_starts, run_ends):
+            if end - start > limit:
+                keep[start + limit // 2:end - (limit - limit // 2)] = False
+                pauses_capped += 1
+
+        mask = np.repeat(keep, frame)
+        if len(samples) > frames * frame:
+            mask = np.concatenate((mask, np.full(len(samples) - frames * frame, keep[-1])))
+        out = samples[mask].astype(np.float32)
+
+        # Loudness: speech RMS to target_dbfs, limited by the peak and max gain
+        speech_rms = np.sqrt(np.mean(rms[voiced] ** 2))
+        peak = np.abs(out).max() if len(out) else 0.0
+        gain = min(
+            10 ** (self.target_dbfs / 20) * INT16_MAX / speech_rms,
+            10 ** (self.peak_dbfs / 20) * INT16_MAX / peak if peak else np.inf,
+            10 ** (self.max_gain_db / 20),
+        )
+        out = np.clip(np.rint(out * gain), -32768, INT16_MAX).astype("<i2")
+        return out.tobytes(), self._report(before, len(out) / rate, pauses_capped, 20 * np.log10(gain))
+
+    def _report(self, before, after, pauses_capped, gain_db):
+        with self._lock:
+            self.clips += 1
+            self.seconds_in += before
+            self.seconds_out += after
+        return {
+            "before": round(before, 3),
+            "after": round(after, 3),
+            "pauses_capped": pauses_capped,
+            "gain_db": round(float(gain_db), 2),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clips": self.clips,
+                "seconds_in": round(self.seconds_in, 2),
+                "seconds_out": round(self.seconds_out, 2),
+                "seconds_saved": round(self.seconds_in - self.seconds_out, 2),
+            }
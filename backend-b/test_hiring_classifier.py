@@ -0,0 +1,42 @@
+import pytest
+from hiring_classifier import DEFAULT_THRESHOLD, classify_hiring
+
+# (what the business said, expected status, settled locally without the LLM?)
+CASES = [
+    # plain answers
+    ("Yes we are hiring", "HIRING", True),
+    ("yeah", "HIRING", True),
+    ("No", "NOT_HIRING", True),
+    ("Nope, we're fully staffed", "NOT_HIRING", True),
+    ("no openings right now", "NOT_HIRING", True),
+    ("We are not currently hiring", "NOT_HIRING", True),
+    # contractions read the same as the long forms
+    ("We're hiring", "HIRING", True),
+    ("we aren't hiring", "NOT_HIRING", True),
+    ("We're not hiring at the moment", "NOT_HIRING", True),
+    # "no" as an interjection doesn't negate what follows
+    ("no doubt we are hiring", "HIRING", True),
+    ("No problem we are hiring", "HIRING", True),
+    ("oh no worries we are always hiring", "HIRING", True),
+    ("no we're always hiring", "HIRING", False),
+    # a negator right after a positive takes it back
+    ("Absolutely not", "NOT_HIRING", True),
+    ("Definitely not hiring", "NOT_HIRING", True),
+    # negation scope
+    ("we are not really hiring", "NOT_HIRING", False),
+    # "know" is not "no"
+    ("I know we are hiring", "HIRING", True),
+    ("I don't know", "UNCERTAIN", True),
+    # hedges and questions go to the LLM or stay uncertain
+    ("maybe, ask the manager", "UNCERTAIN", True),
+    ("What position?", "UNCERTAIN", True),
+    ("sure", "HIRING", False),
+    ("no problem", "UNCERTAIN", False),
+]
+
+
+@pytest.mark.parametrize("text,status,settled", CASES)
+def test_classify_hiring(text, status, settled):
+    result = classify_hiring(text)
+    assert result["status"] == status, result["cues"]
+    assert (result["probability"] >= DEFAULT_THRESHOLD) == settled, (result["probability"], result["cues"])
@@ -0,0 +1,147 @@
+import hashlib, json, os, re, threading
+from collections import OrderedDict
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+
+def normalize_text(text):
+    """Collapse whitespace only; case and punctuation change how a line is spoken."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(text, voice, audio_format):
+    return hashlib.sha256(f"{normalize_text(text)}\x00{voice}\x00{audio_format}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Content-addressed store of synthesized audio on disk.
+
+    Files are named by the hash of (normalized text, voice, format), so the
+    same utterance is only ever synthesized once. The cache is capped at
+    `max_bytes`; least recently used entries are evicted first, except
+    pinned ones (e.g. fixed closing lines), which are never evicted.
+    Pins are kept in pins.json next to the audio so they survive restarts.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # key -> size, least recently used first; rebuilt from file mtimes
+        files = []
+        for name in os.listdir(directory):
+            key, ext = os.path.splitext(name)
+            if ext == ".audio":
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, key, stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(files))
+        self._bytes = sum(self._entries.values())
+
+        self._pins_path = os.path.join(directory, "pins.json")
+        try:
+            with open(self._pins_path) as f:
+                self._pins = json.load(f)  # key -> {"text", "voice", "format"}
+        except (OSError, ValueError):
+            self._pins = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".audio")
+
+    def get(self, text, voice, audio_format="wav"):
+        """Cached audio bytes for this utterance, or None."""
+        return self.get_by_key(cache_key(text, voice, audio_format))
+
+    def get_by_key(self, key):
+        if not re.fullmatch(r"[0-9a-f]{64}", key):
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # recency is shared with other workers through the mtime
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                if key in self._entries:
+                    self._bytes -= self._entries.pop(key)  # evicted by another worker
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if key not in self._entries:
+                self._bytes += len(data)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, text, voice, audio_format, data):
+        key = cache_key(text, voice, audio_format)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # atomic, so readers never see a half-written file
+
+        with self._lock:
+            self._bytes += len(data) - self._entries.get(key, 0)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        for key in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            self._bytes -= self._entries.pop(key)
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def pin(self, text, voice, audio_format="wav"):
+        """Never evict this utterance. Works before it has been synthesized, too."""
+        key = cache_key(text, voice, audio_format)
+        with self._lock:
+            self._pins[key] = {"text": normalize_text(text), "voice": voice, "format": audio_format}
+            self._save_pins()
+        return key
+
+    def unpin(self, text, voice, audio_format="wav"):
+        key = cache_key(text, voice, audio_format)
+        with self._lock:
+            removed = self._pins.pop(key, None) is not None
+            self._save_pins()
+        return removed
+
+    def _save_pins(self):
+        tmp_path = f"{self._pins_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._pins, f, indent=2)
+        os.replace(tmp_path, self._pins_path)
+
+    def pinned(self):
+        with self._lock:
+            return [{"key": key, **pin, "cached": key in self._entries} for key, pin in self._pins.items()]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._pins),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
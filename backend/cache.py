@@ -0,0 +1,123 @@
+import json, os, sqlite3, threading, time
+from collections import OrderedDict
+
+# Shared sqlite file for every cache table (ignored by git, see backend/.gitignore)
+CACHE_DB_PATH = os.getenv(
+    "PLACES_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "places_cache.db"),
+)
+
+
+class PersistentCache:
+    """Two-tier key/value cache: an in-process LRU in front of a sqlite table.
+
+    The memory tier holds the `max_entries` most recently used keys, the
+    sqlite tier keeps up to `max_disk_entries` and survives restarts.
+    Entries older than `ttl` seconds are misses (`ttl=None` never expires).
+    Values must be JSON serialisable.
+    """
+
+    def __init__(self, name, ttl=None, max_entries=1000, max_disk_entries=None, db_path=CACHE_DB_PATH):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries or max_entries * 10
+
+        self._memory = OrderedDict()  # key -> (value, stored_at), least recently used first
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_stored_at ON {name} (stored_at)")
+        self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _remember(self, key, value, stored_at):
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_with_age(self, key):
+        """Return (value, age in seconds) for a live entry, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0], now - entry[1]
+
+            row = self._db.execute(
+                f"SELECT value, stored_at FROM {self.name} WHERE key = ?", (key,)
+            ).fetchone()
+            if row and not self._expired(row[1], now):
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.disk_hits += 1
+                return value, now - row[1]
+
+            self._memory.pop(key, None)
+            self.misses += 1
+            return None
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        entry = self.get_with_age(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.name} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now),
+            )
+            # Keep the durable tier bounded: drop the oldest writes past the cap
+            self._db.execute(
+                f"DELETE FROM {self.name} WHERE key IN "
+                f"(SELECT key FROM {self.name} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
+
+    def warm(self):
+        """Purge expired rows and preload the newest entries into memory."""
+        now = time.time()
+        with self._lock:
+            if self.ttl is not None:
+                self._db.execute(f"DELETE FROM {self.name} WHERE stored_at < ?", (now - self.ttl,))
+                self._db.commit()
+            rows = self._db.execute(
+                f"SELECT key, value, stored_at FROM {self.name} ORDER BY stored_at DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+            # Oldest first so the newest rows end up most recently used
+            for key, value, stored_at in reversed(rows):
+                self._remember(key, json.loads(value), stored_at)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            disk_entries = self._db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
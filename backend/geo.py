@@ -0,0 +1,42 @@
+import math
+
+EARTH_RADIUS = 6371000.0  # meters
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def offset(lat, lng, north, east):
+    """Move a point `north`/`east` meters (fine for the few-km distances we search)."""
+    d_lat = math.degrees(north / EARTH_RADIUS)
+    d_lng = math.degrees(east / (EARTH_RADIUS * math.cos(math.radians(lat))))
+    return lat + d_lat, lng + d_lng
+
+
+def cover_circle(lat, lng, radius, tile_radius):
+    """Centers of tile circles (radius `tile_radius`) that together cover the search circle.
+
+    Tiles sit on a square grid whose cells they circumscribe, so neighbouring
+    tiles overlap just enough to leave no gaps.
+    """
+    step = tile_radius * math.sqrt(2)
+    n = math.ceil(radius / step)
+    centers = []
+    for i in range(-n, n + 1):
+        for j in range(-n, n + 1):
+            tile_lat, tile_lng = offset(lat, lng, i * step, j * step)
+            if haversine(lat, lng, tile_lat, tile_lng) <= radius + tile_radius:
+                centers.append((tile_lat, tile_lng))
+    return centers
+
+
+def split_tile(lat, lng, tile_radius):
+    """Centers of the four half-radius tiles covering one tile's grid cell."""
+    quarter = tile_radius * math.sqrt(2) / 4
+    return [offset(lat, lng, north, east) for north in (-quarter, quarter) for east in (-quarter, quarter)]
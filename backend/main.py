@@ -1,13 +1,103 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-import requests, os, time
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio, base64, hashlib, json, os, re, time
 from dotenv import load_dotenv
+from cache import PersistentCache
+from places_client import PlacesClient, PlacesAPIError
+from metrics import instrument
+from geo import cover_circle, haversine, offset, split_tile
+from spatial_index import SpatialIndex
+from place_types import match_place_types
 
 app = FastAPI(title="outreach")
 
+# Request and Google API latency histograms at GET /metrics; each response's
+# Server-Timing header shows the time spent in each Google endpoint
+instrument(app)
+
 load_dotenv()
 GDC_API_KEY = os.getenv("GDC_API_KEY")
 
+# Upstream tuning: per-request timeout (seconds) and how many Place Details
+# lookups may be in flight at once for a single search
+PLACES_TIMEOUT = float(os.getenv("PLACES_TIMEOUT", "5"))
+DETAILS_CONCURRENCY = int(os.getenv("PLACES_DETAILS_CONCURRENCY", "8"))
+
+# One pooled client for every Google call, rate limited per endpoint
+places = PlacesClient(
+    GDC_API_KEY,
+    timeout=PLACES_TIMEOUT,
+    max_connections=int(os.getenv("PLACES_MAX_CONNECTIONS", "20")),
+    qps={
+        "geocode": float(os.getenv("PLACES_QPS_GEOCODE", "10")),
+        "nearbysearch": float(os.getenv("PLACES_QPS_NEARBYSEARCH", "10")),
+        "details": float(os.getenv("PLACES_QPS_DETAILS", "50")),
+        "searchNearby": float(os.getenv("PLACES_QPS_SEARCH", "10")),
+        "searchText": float(os.getenv("PLACES_QPS_SEARCH", "10")),
+    },
+    max_retries=int(os.getenv("PLACES_MAX_RETRIES", "3")),
+)
+
+# Nearby Search pagination: Google serves at most 3 pages of 20, and a
+# next_page_token only becomes valid a couple of seconds after it is issued
+PLACES_MAX_PAGES = int(os.getenv("PLACES_MAX_PAGES", "3"))
+NEXT_PAGE_DELAY = float(os.getenv("PLACES_NEXT_PAGE_DELAY", "2"))
+NEXT_PAGE_RETRIES = 2
+
+# Area sweep: the search circle is covered with tiles of this radius (meters),
+# saturated tiles are split down to the minimum, bounded by a total tile budget
+SWEEP_TILE_RADIUS = float(os.getenv("PLACES_SWEEP_TILE_RADIUS", "1000"))
+SWEEP_MIN_TILE_RADIUS = float(os.getenv("PLACES_SWEEP_MIN_TILE_RADIUS", "250"))
+SWEEP_MAX_TILES = int(os.getenv("PLACES_SWEEP_MAX_TILES", "64"))
+SWEEP_CONCURRENCY = int(os.getenv("PLACES_SWEEP_CONCURRENCY", "6"))
+NEARBY_PAGE_SIZE = 20
+
+# Search engine used when a request doesn't pick one: "legacy" (Nearby Search +
+# one Place Details call per result) or "new" (Places API (New), phones inline)
+PLACES_ENGINE = os.getenv("PLACES_ENGINE", "legacy")
+NEW_PLACES_FIELD_MASK = ",".join([
+    "places.id", "places.displayName", "places.shortFormattedAddress",
+    "places.location", "places.types", "places.nationalPhoneNumber", "nextPageToken",
+])
+
+# How many of the keyword's best-matching place types each search queries (concurrently)
+PLACES_MAX_TYPES = int(os.getenv("PLACES_MAX_TYPES", "2"))
+
+# Geocoding results keyed by normalized address (Google allows caching lat/lng for 30 days)
+geocode_cache = PersistentCache(
+    "geocode",
+    ttl=float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600))),
+    max_entries=int(os.getenv("GEOCODE_CACHE_SIZE", "1000")),
+)
+
+# Phone numbers keyed by place_id. They almost never change, so entries never
+# expire; once older than PHONE_REFRESH_AFTER they are still served but
+# re-fetched in the background.
+phone_cache = PersistentCache("phones", max_entries=int(os.getenv("PHONE_CACHE_SIZE", "5000")))
+PHONE_REFRESH_AFTER = float(os.getenv("PHONE_CACHE_REFRESH_AFTER", str(7 * 24 * 3600)))
+_refreshing_phones = set()  # place_ids with a background refresh in flight
+_background_tasks = set()  # strong refs so refresh tasks aren't garbage collected
+
+# Identical /places searches running at the same time share one upstream
+# execution; responses may be reused by the browser for PLACES_HTTP_MAX_AGE seconds
+PLACES_HTTP_MAX_AGE = int(os.getenv("PLACES_HTTP_MAX_AGE", "60"))
+_inflight_searches = {}  # normalized query -> asyncio.Task
+_coalesced_searches = 0
+
+# ETag of each query's last response. A revalidation carrying it within
+# PLACES_ETAG_TTL seconds gets a 304 without searching again; the index
+# behind the search is itself up to PLACES_COVERAGE_MAX_AGE old.
+search_etags = PersistentCache(
+    "search_etags",
+    ttl=float(os.getenv("PLACES_ETAG_TTL", "600")),
+    max_entries=int(os.getenv("PLACES_ETAG_CACHE_SIZE", "1000")),
+)
+
+# Every business we've discovered, with the areas already searched for each
+# (type, keyword); searches inside fresh coverage are answered locally
+spatial_index = SpatialIndex(max_age=float(os.getenv("PLACES_COVERAGE_MAX_AGE", str(24 * 3600))))
+
 # Front end connection
 app.add_middleware(
     CORSMiddleware,
@@ -22,141 +112,30 @@ app.add_middleware(
 # HELPER FUNCTIONS
 #------------------------------------------------------------------------------------
 
-def geocode_location(location_name: str): # one api call
+def normalize_address(location_name: str) -> str:
+    """Cache key for an address: lowercase, punctuation dropped, single spaces."""
+    return " ".join(re.sub(r"[^\w\s]", " ", location_name.lower()).split())
+
+
+async def geocode_location(location_name: str): # one api call, unless cached
     """RETURN THE LONGITUDE AND LATITUDE BASED ON USER LOCATION"""
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {"address": location_name, "key": GDC_API_KEY}
+    cache_key = normalize_address(location_name)
+    cached = geocode_cache.get(cache_key)
+    if cached:
+        return cached[0], cached[1]
 
-    response = requests.get(url, params=params)
-    data = response.json()
+    data = await places.get("geocode", {"address": location_name})
 
     if not data.get("results"):
         raise HTTPException(status_code=404, detail=f"Location '{location_name}' not found")
 
     loc = data["results"][0]["geometry"]["location"]
+    geocode_cache.set(cache_key, [loc["lat"], loc["lng"]])
     return loc["lat"], loc["lng"]
 
 
-def find_businesses(lat, lng, radius=5000, keyword=None): # one api call
-    """Use Nearby Search API to find up to 20 nearby businesses."""
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-
-    # Comprehensive list of ALL specific business types (excluding malls/shopping centers)
-    all_business_types = [
-        "accounting", "airport", "amusement_park", "aquarium", "art_gallery",
-        "atm", "bakery", "bank", "bar", "beauty_salon", "bicycle_store",
-        "book_store", "bowling_alley", "bus_station", "cafe", "campground",
-        "car_dealer", "car_rental", "car_repair", "car_wash", "casino",
-        "cemetery", "church", "city_hall", "clothing_store", "convenience_store",
-        "courthouse", "dentist", "department_store", "doctor", "drugstore",
-        "electrician", "electronics_store", "embassy", "fire_station",
-        "florist", "funeral_home", "furniture_store", "gas_station", "gym",
-        "hair_care", "hardware_store", "hindu_temple", "home_goods_store",
-        "hospital", "insurance_agency", "jewelry_store", "laundry", "lawyer",
-        "library", "light_rail_station", "liquor_store", "local_government_office",
-        "locksmith", "lodging", "meal_delivery", "meal_takeaway", "mosque",
-        "movie_rental", "movie_theater", "moving_company", "museum",
-        "night_club", "painter", "park", "parking", "pet_store", "pharmacy",
-        "physiotherapist", "plumber", "police", "post_office", "primary_school",
-        "real_estate_agency", "restaurant", "roofing_contractor", "rv_park",
-        "school", "secondary_school", "shoe_store", "spa", "stadium", "storage",
-        "store", "subway_station", "supermarket", "synagogue", "taxi_stand",
-        "tourist_attraction", "train_station", "transit_station", "travel_agency",
-        "university", "veterinary_care", "zoo"
-    ]
-
-    # Map keywords to most relevant types (can return multiple)
-    business_type = None
-    if keyword:
-        keyword_lower = keyword.lower()
-        # Food & Dining
-        if any(x in keyword_lower for x in ["restaurant", "food", "dining", "eat"]):
-            business_type = "restaurant"
-        elif any(x in keyword_lower for x in ["cafe", "coffee", "tea"]):
-            business_type = "cafe"
-        elif any(x in keyword_lower for x in ["bar", "pub", "drink"]):
-            business_type = "bar"
-        elif any(x in keyword_lower for x in ["bakery", "bread", "pastry"]):
-            business_type = "bakery"
-        elif any(x in keyword_lower for x in ["nightclub", "club"]):
-            business_type = "night_club"
-        # Retail
-        elif any(x in keyword_lower for x in ["retail", "store", "shop", "shopping"]):
-            business_type = "store"
-        elif any(x in keyword_lower for x in ["clothing", "clothes", "apparel", "fashion"]):
-            business_type = "clothing_store"
-        elif any(x in keyword_lower for x in ["shoe", "footwear"]):
-            business_type = "shoe_store"
-        elif any(x in keyword_lower for x in ["book", "bookstore"]):
-            business_type = "book_store"
-        elif any(x in keyword_lower for x in ["electronics", "phone", "computer", "technology", "tech"]):
-            business_type = "electronics_store"
-        elif any(x in keyword_lower for x in ["jewelry", "jewellery"]):
-            business_type = "jewelry_store"
-        elif any(x in keyword_lower for x in ["furniture"]):
-            business_type = "furniture_store"
-        elif any(x in keyword_lower for x in ["pet", "animal"]):
-            business_type = "pet_store"
-        elif any(x in keyword_lower for x in ["hardware", "tools"]):
-            business_type = "hardware_store"
-        elif any(x in keyword_lower for x in ["supermarket", "grocery"]):
-            business_type = "supermarket"
-        elif any(x in keyword_lower for x in ["convenience"]):
-            business_type = "convenience_store"
-        elif any(x in keyword_lower for x in ["department"]):
-            business_type = "department_store"
-        # Health & Beauty
-        elif any(x in keyword_lower for x in ["salon", "hair", "barber"]):
-            business_type = "beauty_salon"
-        elif any(x in keyword_lower for x in ["spa", "massage"]):
-            business_type = "spa"
-        elif any(x in keyword_lower for x in ["gym", "fitness", "workout"]):
-            business_type = "gym"
-        elif any(x in keyword_lower for x in ["pharmacy", "drug"]):
-            business_type = "pharmacy"
-        elif any(x in keyword_lower for x in ["doctor", "medical", "clinic"]):
-            business_type = "doctor"
-        elif any(x in keyword_lower for x in ["dentist", "dental"]):
-            business_type = "dentist"
-        # Automotive
-        elif any(x in keyword_lower for x in ["gas", "fuel", "station", "petrol"]):
-            business_type = "gas_station"
-        elif any(x in keyword_lower for x in ["car wash", "auto wash"]):
-            business_type = "car_wash"
-        elif any(x in keyword_lower for x in ["car repair", "auto repair", "mechanic"]):
-            business_type = "car_repair"
-        # Services
-        elif any(x in keyword_lower for x in ["bank", "banking"]):
-            business_type = "bank"
-        elif any(x in keyword_lower for x in ["laundry", "dry clean"]):
-            business_type = "laundry"
-        elif any(x in keyword_lower for x in ["real estate", "realtor"]):
-            business_type = "real_estate_agency"
-
-    # If no specific type matched, use "store" as default
-    if not business_type:
-        business_type = "store"
-
-    # Single type search with keyword
-    params = {
-        "location": f"{lat},{lng}",
-        "radius": radius,
-        "type": business_type,
-        "key": GDC_API_KEY,
-    }
-    if keyword:
-        params["keyword"] = keyword
-
-    response = requests.get(url, params=params)
-    data = response.json()
-
-    if "results" not in data:
-        print("No results found or invalid response:", data)
-        return []
-    
-    results = data["results"]
-
-    # Filter out shopping centers/malls
+def filter_businesses(results):
+    """Filter out shopping centers/malls"""
     filtered_results = []
     exclude_types = {"shopping_mall"}
     exclude_keywords = ["mall", "plaza", "crossroads", "common", "shopping center", 
@@ -178,49 +157,537 @@ def find_businesses(lat, lng, radius=5000, keyword=None): # one api call
     return filtered_results
 
 
-def find_businesses_number(place_id): # one api call/business
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
+async def nearby_search_page(lat, lng, radius, business_type, keyword=None, page_token=None): # one api call
+    """Fetch one page (up to 20 places) of Nearby Search; returns (results, next_page_token)."""
+    if page_token:
+        params = {"pagetoken": page_token}
+    else:
+        # Single type search with keyword
+        params = {
+            "location": f"{lat},{lng}",
+            "radius": radius,
+            "type": business_type,
+        }
+        if keyword:
+            params["keyword"] = keyword
+
+    for _ in range(NEXT_PAGE_RETRIES + 1):
+        if page_token:
+            # A fresh next_page_token takes a moment to become valid on Google's side
+            await asyncio.sleep(NEXT_PAGE_DELAY)
+        data = await places.get("nearbysearch", params)
+        if not (page_token and data.get("status") == "INVALID_REQUEST"):
+            break
+
+    if "results" not in data:
+        print("No results found or invalid response:", data)
+        return [], None
+
+    return data["results"], data.get("next_page_token")
+
+
+def from_new_place(place):
+    """Convert a Places API (New) place to the Nearby Search shape used everywhere else.
+
+    The phone number came with the search, so it goes straight into the phone
+    cache and no Place Details call is needed later.
+    """
+    place_id = place["id"]
+    phone_cache.set(place_id, place.get("nationalPhoneNumber", ""))
+    return {
+        "place_id": place_id,
+        "name": place.get("displayName", {}).get("text"),
+        "vicinity": place.get("shortFormattedAddress"),
+        "geometry": {"location": {"lat": place["location"]["latitude"], "lng": place["location"]["longitude"]}},
+        "types": place.get("types", []),
+    }
+
+
+async def new_search_page(lat, lng, radius, business_type, keyword=None, page_token=None): # one api call
+    """Fetch one page of Places API (New) results, phones included; returns (results, next_page_token).
+
+    With a keyword this is Text Search, restricted to the circle's bounding box
+    and pageable; without one it is Nearby Search (New), a single page of 20.
+    """
+    if keyword:
+        south, west = offset(lat, lng, -radius, -radius)
+        north, east = offset(lat, lng, radius, radius)
+        body = {
+            "textQuery": keyword,
+            "includedType": business_type,
+            "locationRestriction": {"rectangle": {
+                "low": {"latitude": south, "longitude": west},
+                "high": {"latitude": north, "longitude": east},
+            }},
+            "pageSize": NEARBY_PAGE_SIZE,
+        }
+        if page_token:
+            body["pageToken"] = page_token
+        data = await places.post("searchText", body, NEW_PLACES_FIELD_MASK)
+    else:
+        body = {
+            "includedTypes": [business_type],
+            "maxResultCount": NEARBY_PAGE_SIZE,
+            "locationRestriction": {"circle": {"center": {"latitude": lat, "longitude": lng}, "radius": radius}},
+        }
+        data = await places.post("searchNearby", body, NEW_PLACES_FIELD_MASK)
+
+    results = [from_new_place(place) for place in data.get("places", [])]
+    # The rectangle's corners reach past the circle
+    results = [
+        place for place in results
+        if haversine(lat, lng, place["geometry"]["location"]["lat"], place["geometry"]["location"]["lng"]) <= radius
+    ]
+    return results, data.get("nextPageToken")
+
+
+# Engine name -> function fetching one page of results in Nearby Search shape
+SEARCH_ENGINES = {"legacy": nearby_search_page, "new": new_search_page}
+if PLACES_ENGINE not in SEARCH_ENGINES:
+    # Fail at startup rather than with a KeyError on every search that doesn't pick an engine
+    raise ValueError(f"Unknown PLACES_ENGINE: {PLACES_ENGINE!r} (expected one of: {', '.join(SEARCH_ENGINES)})")
+
+
+async def iter_business_pages(lat, lng, radius, business_type, keyword=None, pages=1, engine=PLACES_ENGINE, page_token=None, next_pages=None): # one api call/page
+    """Yield filtered Nearby Search pages, following next_page_token up to `pages` pages.
+
+    Served from the spatial index instead when a fresh search already covers
+    the circle. With a `page_token` from an earlier search, only page `pages`
+    is fetched. If there's a page after the last one yielded, `next_pages`
+    gets its token for this type (None when served from a saturated index
+    entry, which has no token; see encode_cursor).
+    """
+    pages = max(1, min(pages, PLACES_MAX_PAGES))  # always at least one page, even with PLACES_MAX_PAGES=0
+    if next_pages is None:
+        next_pages = {}
+    if not page_token:
+        covered = spatial_index.coverage(lat, lng, radius, business_type, keyword, pages, engine)
+        if covered:
+            yield filter_businesses(spatial_index.places_within(lat, lng, radius, business_type, keyword, engine))
+            if covered == "saturated" and not spatial_index.coverage(lat, lng, radius, business_type, keyword, PLACES_MAX_PAGES, engine):
+                next_pages[business_type] = None  # the index holds fewer pages than Google could give
+            return
+
+    fetch_page = SEARCH_ENGINES[engine]
+    for fetched in range(pages if page_token else 1, pages + 1):
+        results, page_token = await fetch_page(lat, lng, radius, business_type, keyword, page_token)
+        spatial_index.add_places(results, business_type, keyword, engine)
+        yield filter_businesses(results)
+        if not page_token:
+            break
+    complete = not page_token and len(results) < NEARBY_PAGE_SIZE
+    spatial_index.record_coverage(lat, lng, radius, business_type, keyword, complete=complete, pages=fetched, engine=engine)
+    if page_token and fetched < PLACES_MAX_PAGES:
+        next_pages[business_type] = page_token
+
+
+async def sweep_business_pages(lat, lng, radius, business_type, keyword=None, engine=PLACES_ENGINE): # one api call/tile
+    """Cover the search circle with a grid of smaller Nearby Searches.
+
+    Tiles are searched concurrently (SWEEP_CONCURRENCY at a time). A tile
+    that comes back saturated (a full page with more to follow) is split into
+    four half-radius tiles, down to SWEEP_MIN_TILE_RADIUS and at most
+    SWEEP_MAX_TILES searches overall. Yields, per finished tile, the places
+    inside the circle that no earlier tile returned.
+    """
+    fetch_page = SEARCH_ENGINES[engine]
+    semaphore = asyncio.Semaphore(SWEEP_CONCURRENCY)
+    seen = set()
+    budget = SWEEP_MAX_TILES
+
+    tile_radius = min(radius, SWEEP_TILE_RADIUS)
+    while len(cover_circle(lat, lng, radius, tile_radius)) > SWEEP_MAX_TILES:
+        tile_radius *= 2
+
+    async def search(tile):
+        """Search one tile; returns (tile, raw results, saturated)."""
+        tile_lat, tile_lng, tile_radius = tile
+        covered = spatial_index.coverage(tile_lat, tile_lng, tile_radius, business_type, keyword, engine=engine)
+        if covered:
+            # Known area: no upstream call, but a saturated tile still gets split
+            results = spatial_index.places_within(tile_lat, tile_lng, tile_radius, business_type, keyword, engine)
+            return tile, results, covered == "saturated"
+
+        async with semaphore:
+            results, page_token = await fetch_page(tile_lat, tile_lng, tile_radius, business_type, keyword)
+        saturated = bool(page_token) or len(results) >= NEARBY_PAGE_SIZE
+        spatial_index.add_places(results, business_type, keyword, engine)
+        spatial_index.record_coverage(tile_lat, tile_lng, tile_radius, business_type, keyword, complete=not saturated, engine=engine)
+        return tile, results, saturated
+
+    def start(tiles):
+        nonlocal budget
+        tiles = tiles[:budget]
+        budget -= len(tiles)
+        return {asyncio.create_task(search(tile)) for tile in tiles}
+
+    running = start([(tile_lat, tile_lng, tile_radius) for tile_lat, tile_lng in cover_circle(lat, lng, radius, tile_radius)])
+    try:
+        while running:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    (tile_lat, tile_lng, tile_radius), results, saturated = task.result()
+                except PlacesAPIError as e:
+                    print(f"Sweep tile failed, area left uncovered: {e}")
+                    continue
+
+                if saturated and tile_radius / 2 >= SWEEP_MIN_TILE_RADIUS:
+                    children = [
+                        (child_lat, child_lng, tile_radius / 2)
+                        for child_lat, child_lng in split_tile(tile_lat, tile_lng, tile_radius)
+                        if haversine(lat, lng, child_lat, child_lng) <= radius + tile_radius / 2
+                    ]
+                    running |= start(children)
+
+                new_places = []
+                for place in filter_businesses(results):
+                    loc = place["geometry"]["location"]
+                    if place.get("place_id") in seen or haversine(lat, lng, loc["lat"], loc["lng"]) > radius:
+                        continue
+                    seen.add(place.get("place_id"))
+                    new_places.append(place)
+                if new_places:
+                    yield new_places
+    finally:
+        for task in running:
+            task.cancel()
+
+    print(f"Sweep searched {SWEEP_MAX_TILES - budget} tiles, found {len(seen)} businesses")
+
+
+async def merge_business_pages(sources):
+    """Run several page iterators concurrently, yielding pages as they arrive, deduped by place_id.
+
+    A source that fails is logged and skipped; only if every source fails is
+    the search itself an error.
+    """
+    queue = asyncio.Queue()
+    seen = set()
+
+    async def drain(source):
+        try:
+            async for page in source:
+                await queue.put(page)
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(drain(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            page = await queue.get()
+            if page is None:
+                remaining -= 1
+                continue
+            new_places = [place for place in page if place.get("place_id") not in seen]
+            seen.update(place.get("place_id") for place in new_places)
+            if new_places:
+                yield new_places
+        failures = [result for result in await asyncio.gather(*tasks, return_exceptions=True) if isinstance(result, Exception)]
+        if failures and len(failures) == len(tasks):
+            raise failures[0]
+        for failure in failures:
+            print(f"Place type search failed, returning the other types' results: {failure!r}")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def business_pages(lat, lng, radius=5000, keyword=None, pages=1, sweep=False, engine=PLACES_ENGINE, cursor=None, next_pages=None):
+    """Async iterator of business pages for a search, either paginated or swept,
+    across the keyword's top PLACES_MAX_TYPES place types.
+
+    With a decoded `cursor`, only the page after the cursor's is fetched, for
+    the place types that had one. Paginated searches fill `next_pages` for
+    the next cursor.
+    """
+    if cursor:
+        pages = cursor["page"] + 1
+        sources = [
+            iter_business_pages(lat, lng, radius, business_type, keyword, pages, engine, page_token, next_pages)
+            for business_type, page_token in cursor["types"].items()
+        ]
+        return sources[0] if len(sources) == 1 else merge_business_pages(sources)
+
+    business_types = match_place_types(keyword, limit=PLACES_MAX_TYPES)
+    print(f"Place types for keyword {keyword!r}: {business_types}")
+
+    if sweep:
+        sources = [sweep_business_pages(lat, lng, radius, business_type, keyword, engine) for business_type in business_types]
+    else:
+        sources = [
+            iter_business_pages(lat, lng, radius, business_type, keyword, pages, engine, next_pages=next_pages)
+            for business_type in business_types
+        ]
+    return sources[0] if len(sources) == 1 else merge_business_pages(sources)
+
+
+async def find_businesses(lat, lng, radius=5000, keyword=None, pages=1, sweep=False, engine=PLACES_ENGINE, cursor=None, next_pages=None): # one api call/page or tile
+    """Use Nearby Search API to find up to 20 nearby businesses per page."""
+    businesses = []
+    async for page in business_pages(lat, lng, radius, keyword, pages, sweep, engine, cursor, next_pages):
+        businesses.extend(page)
+    return businesses
+
+
+def encode_cursor(pages, cursor, next_pages):
+    """Opaque /places cursor for the page after this search's last, or None if no place type has one.
+
+    It carries each type's next_page_token, so loading more costs one call per
+    type instead of walking every earlier page again. A type answered from a
+    saturated index entry has no token (None) and is searched one page deeper.
+    """
+    page = cursor["page"] + 1 if cursor else max(1, min(pages, PLACES_MAX_PAGES))
+    if not next_pages or page >= PLACES_MAX_PAGES:
+        return None
+    data = json.dumps({"page": page, "types": next_pages}).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(data["page"], int) and isinstance(data["types"], dict) and data["types"]:
+            return data
+    except (ValueError, KeyError, TypeError):
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def find_businesses_number(place_id): # one api call/business
+    """Return the place's phone number, "" if it lists none, or None if the lookup failed."""
     params = {
         "place_id": place_id,
         "fields": "formatted_phone_number",
-        "key": GDC_API_KEY
     }
 
-    response = requests.get(url, params=params)
-    data = response.json()
+    data = await places.get("details", params)
+
+    if "result" in data:
+        return data["result"].get("formatted_phone_number", "")
+    print(f"Details lookup for {place_id} returned {data.get('status')}")
+    return None
+
+
+async def fetch_phone(semaphore: asyncio.Semaphore, place_id):
+    """Fetch one phone number under the fan-out semaphore and cache real answers."""
+    async with semaphore:
+        try:
+            phone = await find_businesses_number(place_id)
+        except PlacesAPIError as e:
+            print(f"Details lookup failed for {place_id}: {e!r}")
+            return None
+
+    if phone is not None:
+        phone_cache.set(place_id, phone)
+    return phone
+
+
+async def lookup_phone(semaphore: asyncio.Semaphore, place_id):
+    """Phone number for one place: cached numbers are returned immediately,
+    even when stale (those are refreshed in the background)."""
+    if not place_id:
+        return None
+    cached = phone_cache.get_with_age(place_id)
+    if cached:
+        phone, age = cached
+        if age > PHONE_REFRESH_AFTER:
+            schedule_phone_refresh([place_id])
+        return phone
+    return await fetch_phone(semaphore, place_id)
+
+
+async def find_businesses_numbers(place_ids): # one api call/uncached business, fanned out
+    """Look up phone numbers for many places concurrently.
+
+    At most DETAILS_CONCURRENCY lookups run at once. A lookup that fails or
+    times out yields None for that place instead of failing the whole search.
+    """
+    semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+    return await asyncio.gather(*(lookup_phone(semaphore, place_id) for place_id in place_ids))
+
+
+def schedule_phone_refresh(place_ids):
+    """Start a background refresh for stale place_ids not already being refreshed."""
+    place_ids = [place_id for place_id in place_ids if place_id not in _refreshing_phones]
+    if not place_ids:
+        return
+    _refreshing_phones.update(place_ids)
+    task = asyncio.create_task(refresh_phones(place_ids))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def refresh_phones(place_ids):
+    try:
+        semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+        await asyncio.gather(*(fetch_phone(semaphore, place_id) for place_id in place_ids))
+        print(f"Refreshed {len(place_ids)} stale phone numbers")
+    finally:
+        _refreshing_phones.difference_update(place_ids)
+
+
+def format_business(place, phone):
+    return {
+        "name": place.get("name"),
+        "address": place.get("vicinity"),
+        "lat": place["geometry"]["location"]["lat"],
+        "lng": place["geometry"]["location"]["lng"],
+        "phone": phone or "N/A"
+    }
+
+
+async def stream_businesses(lat, lng, radius, keyword, pages, sweep, engine, cursor=None):
+    """Yield one NDJSON line per business as soon as its phone number is resolved.
+
+    Details lookups for a page start while the next page is still being
+    fetched, so the first rows go out long before the last page arrives.
+    A finished search ends with a {"next_page": cursor or null} line.
+    """
+    queue = asyncio.Queue()
+    next_pages = {}
+
+    semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+
+    async def resolve(place):
+        phone = await lookup_phone(semaphore, place.get("place_id"))
+        await queue.put(format_business(place, phone))
+
+    async def produce():
+        tasks = []
+        try:
+            async for page in business_pages(lat, lng, radius, keyword, pages, sweep, engine, cursor, next_pages):
+                tasks.extend(asyncio.create_task(resolve(place)) for place in page)
+            await asyncio.gather(*tasks)
+            await queue.put({"next_page": encode_cursor(pages, cursor, next_pages)})
+        except PlacesAPIError as e:
+            print(f"Streaming search stopped early: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (business := await queue.get()) is not None:
+            yield json.dumps(business) + "\n"
+    finally:
+        # Client went away or we're done: stop any lookups still running
+        producer.cancel()
 
-    if response.status_code == 200 and "result" in data:
-        return data["result"].get("formatted_phone_number")
-    return {"incorrect format"}
 
 @app.get("/places")
-def get_businesses(
+async def get_businesses(
+    request: Request,
     location: str = Query(..., description="Address or city name (e.g. '123 Main St Milton')"),
     radius: int = Query(2000, description="Search radius in meters"),
-    keyword: str | None = Query(None, description="Optional filter like 'restaurant' or 'retail'")
+    keyword: str | None = Query(None, description="Optional filter like 'restaurant' or 'retail'"),
+    pages: int = Query(1, ge=1, le=3, description="Nearby Search pages to follow (20 results each)"),
+    stream: bool = Query(False, description="Stream businesses as NDJSON as they are resolved"),
+    sweep: bool = Query(False, description="Cover the radius with concurrent tiled sub-searches (ignores pages)"),
+    engine: str = Query(PLACES_ENGINE, pattern="^(legacy|new)$", description="'legacy' Nearby Search + Place Details, or 'new' Places API (New) with phones inline"),
+    cursor: str | None = Query(None, description="next_page from an earlier response; fetches only the page after it (ignores pages)"),
 ):
+    cache_control = f"private, max-age={PLACES_HTTP_MAX_AGE}"
+    decoded = decode_cursor(cursor) if cursor else None
+
+    if stream:
+        print(f"Geocoding location: {location}")
+        lat, lng = await geocode_location(location)
+        print(f"Coordinates: ({lat}, {lng}) — radius={radius}m keyword={keyword or 'none'} pages={pages} sweep={sweep} engine={engine}")
+        return StreamingResponse(
+            stream_businesses(lat, lng, radius, keyword, pages, sweep, engine, decoded),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": cache_control},
+        )
+
+    key = (normalize_address(location), radius, normalize_address(keyword or ""), pages, sweep, engine, cursor)
+    if_none_match = request.headers.get("if-none-match")
+    etag = search_etags.get(json.dumps(key))
+    if etag and if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    body = await single_flight(key, lambda: search_businesses(location, radius, keyword, pages, sweep, engine, decoded))
+
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    search_etags.set(json.dumps(key), etag)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header names `etag`, using weak comparison (W/"x" matches "x")."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = re.findall(r'(?:W/)?"[^"]*"', if_none_match)
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+async def search_businesses(location, radius, keyword, pages, sweep, engine, cursor=None):
+    """Run a full /places search and return the encoded JSON body."""
     print(f"Geocoding location: {location}")
-    lat, lng = geocode_location(location)
+    lat, lng = await geocode_location(location)
 
-    print(f"Coordinates: ({lat}, {lng}) — radius={radius}m keyword={keyword or 'none'}")
-    places = find_businesses(lat, lng, radius, keyword)
+    print(f"Coordinates: ({lat}, {lng}) — radius={radius}m keyword={keyword or 'none'} pages={pages} sweep={sweep} engine={engine}")
+    next_pages = {}
+    businesses = await find_businesses(lat, lng, radius, keyword, pages, sweep, engine, cursor, next_pages)
 
     # implement a filtering hiring system in the future
 
-    results = []
-    for p in places:
-        place_id = p.get("place_id")
-        phone = find_businesses_number(place_id) if place_id else None
+    phones = await find_businesses_numbers([b.get("place_id") for b in businesses])
+
+    results = [format_business(b, phone) for b, phone in zip(businesses, phones)]
+    return json.dumps({"results": results, "next_page": encode_cursor(pages, cursor, next_pages)}).encode()
+
+
+async def single_flight(key, run):
+    """Await the in-flight task for `key`, starting it with `run()` if there is none.
+
+    The task is shielded so one caller disconnecting doesn't cancel the
+    search for everyone else waiting on it.
+    """
+    global _coalesced_searches
+    task = _inflight_searches.get(key)
+    if task is None:
+        task = asyncio.create_task(run())
+        _inflight_searches[key] = task
+        task.add_done_callback(lambda _: _inflight_searches.pop(key, None))
+    else:
+        _coalesced_searches += 1
+        print(f"Joining in-flight search for {key}")
+    return await asyncio.shield(task)
 
-        results.append({
-            "name": p.get("name"),
-            "address": p.get("vicinity"),
-            "lat": p["geometry"]["location"]["lat"],
-            "lng": p["geometry"]["location"]["lng"],
-            "phone": phone or "N/A"
-        })
 
-    return {"results": results}
+@app.exception_handler(PlacesAPIError)
+async def places_api_error(request: Request, exc: PlacesAPIError):
+    return JSONResponse(status_code=502, content={"detail": f"Google Places request failed: {exc}"})
+
+
+@app.on_event("startup")
+def warm_caches():
+    print(f"Warmed geocode cache with {geocode_cache.warm()} entries")
+    print(f"Warmed phone cache with {phone_cache.warm()} entries")
+
+
+@app.on_event("shutdown")
+async def close_places_client():
+    await places.aclose()
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "geocode_cache": geocode_cache.stats(),
+        "phone_cache": phone_cache.stats(),
+        "search_etags": search_etags.stats(),
+        "phone_refreshes_in_flight": len(_refreshing_phones),
+        "spatial_index": spatial_index.stats(),
+        "searches": {"in_flight": len(_inflight_searches), "coalesced": _coalesced_searches},
+        "upstream": places.stats(),
+    }
 
 
 @app.get("/health")
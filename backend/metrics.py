@@ -0,0 +1,29 @@
+import os, sys
+from prometheus_client import Counter, Histogram
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # repo root, for shared/
+from shared import http_metrics
+from shared.http_metrics import add_timing
+
+PREFIX = "places"
+# Seconds; one Google call takes well under a second, but every extra page of a
+# search waits ~2 s for its next_page_token, and a sweep runs many tiles
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 4, 6, 10, 20, 30)
+
+UPSTREAM_SECONDS = Histogram(f"{PREFIX}_upstream_seconds", "Duration of one Google API attempt", ["endpoint"], buckets=LATENCY_BUCKETS)
+UPSTREAM_ERRORS = Counter(f"{PREFIX}_upstream_errors_total", "Google API attempts that were retried or calls that failed", ["endpoint", "outcome"])
+
+
+def record_upstream(endpoint, seconds):
+    """Observe one Google API attempt and add it to the request's timings.
+
+    Upstream calls run concurrently, so their sum can exceed the total, and
+    a search joined while in flight (see single_flight) has none of its own.
+    """
+    UPSTREAM_SECONDS.labels(endpoint).observe(seconds)
+    add_timing(endpoint, seconds)
+
+
+def instrument(app):
+    """Request metrics, Server-Timing and GET /metrics for this service (see shared/http_metrics.py)"""
+    http_metrics.instrument(app, PREFIX, LATENCY_BUCKETS)
@@ -0,0 +1,122 @@
+import re
+
+# Comprehensive list of ALL specific business types (excluding malls/shopping centers)
+ALL_BUSINESS_TYPES = {
+    "accounting", "airport", "amusement_park", "aquarium", "art_gallery",
+    "atm", "bakery", "bank", "bar", "beauty_salon", "bicycle_store",
+    "book_store", "bowling_alley", "bus_station", "cafe", "campground",
+    "car_dealer", "car_rental", "car_repair", "car_wash", "casino",
+    "cemetery", "church", "city_hall", "clothing_store", "convenience_store",
+    "courthouse", "dentist", "department_store", "doctor", "drugstore",
+    "electrician", "electronics_store", "embassy", "fire_station",
+    "florist", "funeral_home", "furniture_store", "gas_station", "gym",
+    "hair_care", "hardware_store", "hindu_temple", "home_goods_store",
+    "hospital", "insurance_agency", "jewelry_store", "laundry", "lawyer",
+    "library", "light_rail_station", "liquor_store", "local_government_office",
+    "locksmith", "lodging", "meal_delivery", "meal_takeaway", "mosque",
+    "movie_rental", "movie_theater", "moving_company", "museum",
+    "night_club", "painter", "park", "parking", "pet_store", "pharmacy",
+    "physiotherapist", "plumber", "police", "post_office", "primary_school",
+    "real_estate_agency", "restaurant", "roofing_contractor", "rv_park",
+    "school", "secondary_school", "shoe_store", "spa", "stadium", "storage",
+    "store", "subway_station", "supermarket", "synagogue", "taxi_stand",
+    "tourist_attraction", "train_station", "transit_station", "travel_agency",
+    "university", "veterinary_care", "zoo",
+}
+
+DEFAULT_BUSINESS_TYPE = "store"
+
+# Map keywords to most relevant types. Order breaks ties between equally
+# good matches; "store" is generic, so any more specific type outranks it.
+KEYWORD_PLACE_TYPES = [
+    # Food & Dining
+    ("restaurant", ["restaurant", "food", "dining", "eat", "diner", "bistro", "eatery", "kitchen", "grill"]),
+    ("cafe", ["cafe", "coffee", "coffee shop", "tea", "espresso"]),
+    ("bar", ["bar", "pub", "drink", "tavern", "brewery", "bartender"]),
+    ("bakery", ["bakery", "bread", "pastry", "baker"]),
+    ("night_club", ["nightclub", "night club", "club"]),
+    # Retail
+    ("clothing_store", ["clothing", "clothes", "apparel", "fashion", "boutique"]),
+    ("shoe_store", ["shoe", "footwear", "sneaker"]),
+    ("book_store", ["book", "bookstore"]),
+    ("electronics_store", ["electronics", "phone", "computer", "technology", "tech"]),
+    ("jewelry_store", ["jewelry", "jewellery", "jeweler"]),
+    ("furniture_store", ["furniture"]),
+    ("pet_store", ["pet", "animal", "pet store"]),
+    ("hardware_store", ["hardware", "tools"]),
+    ("supermarket", ["supermarket", "grocery", "groceries"]),
+    ("convenience_store", ["convenience", "convenience store"]),
+    ("department_store", ["department", "department store"]),
+    ("store", ["retail", "store", "shop", "shopping", "cashier"]),
+    # Health & Beauty
+    ("beauty_salon", ["salon", "hair", "barber", "stylist"]),
+    ("spa", ["spa", "massage"]),
+    ("gym", ["gym", "fitness", "workout"]),
+    ("pharmacy", ["pharmacy", "drug", "drugstore", "pharmacist"]),
+    ("doctor", ["doctor", "medical", "clinic"]),
+    ("dentist", ["dentist", "dental"]),
+    # Automotive
+    ("gas_station", ["gas", "gas station", "fuel", "petrol"]),
+    ("car_wash", ["car wash", "auto wash"]),
+    ("car_repair", ["car repair", "auto repair", "mechanic"]),
+    # Services
+    ("bank", ["bank", "banking", "teller"]),
+    ("laundry", ["laundry", "dry clean", "dry cleaner", "dry cleaning", "laundromat"]),
+    ("real_estate_agency", ["real estate", "realtor"]),
+]
+
+GENERIC_TYPE_WEIGHT = 0.5
+
+
+def _tokens(text):
+    """Lowercase word tokens with plurals folded ("bakeries" -> "bakery", "shoes" -> "shoe")."""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _compile(table):
+    phrases = {}
+    for rank, (place_type, keywords) in enumerate(table):
+        if place_type not in ALL_BUSINESS_TYPES:
+            raise ValueError(f"Unknown place type in keyword table: {place_type}")
+        for keyword in keywords:
+            phrases[tuple(_tokens(keyword))] = (place_type, rank)
+    return phrases, max(len(phrase) for phrase in phrases)
+
+
+_PHRASES, _MAX_PHRASE_LEN = _compile(KEYWORD_PLACE_TYPES)
+
+
+def match_place_types(keyword=None, limit=2):
+    """Rank the place types a search keyword points to, best first.
+
+    One left-to-right pass over the keyword's tokens, preferring the longest
+    phrase at each position, so "car wash" wins over "car" and "gas" no
+    longer matches inside "Las Vegas". Falls back to DEFAULT_BUSINESS_TYPE.
+    """
+    tokens = _tokens(keyword or "")
+    scores = {}  # place_type -> [score, rank]
+
+    i = 0
+    while i < len(tokens):
+        for length in range(min(_MAX_PHRASE_LEN, len(tokens) - i), 0, -1):
+            match = _PHRASES.get(tuple(tokens[i:i + length]))
+            if match:
+                place_type, rank = match
+                weight = GENERIC_TYPE_WEIGHT if place_type == DEFAULT_BUSINESS_TYPE else 1.0
+                scores.setdefault(place_type, [0.0, rank])[0] += length * weight
+                i += length
+                break
+        else:
+            i += 1
+
+    if not scores:
+        return [DEFAULT_BUSINESS_TYPE]
+    ranked = sorted(scores, key=lambda place_type: (-scores[place_type][0], scores[place_type][1]))
+    return ranked[:limit]
@@ -0,0 +1,142 @@
+import asyncio, httpx, os, random, sys, time
+from collections import deque
+from metrics import UPSTREAM_ERRORS, record_upstream
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # repo root, for shared/
+from shared.rate_limit import TokenBucket
+
+# Both base URLs can point at a local stub server (see stub_places.py)
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com/maps/api")
+PLACES_NEW_BASE_URL = os.getenv("PLACES_NEW_BASE_URL", "https://places.googleapis.com/v1")
+
+# Endpoint name -> URL. The legacy web services are GETs authenticated with a
+# `key` param; Places API (New) takes POSTed JSON, a key header and a field mask.
+ENDPOINTS = {
+    "geocode": GOOGLE_MAPS_BASE_URL + "/geocode/json",
+    "nearbysearch": GOOGLE_MAPS_BASE_URL + "/place/nearbysearch/json",
+    "details": GOOGLE_MAPS_BASE_URL + "/place/details/json",
+    "searchNearby": PLACES_NEW_BASE_URL + "/places:searchNearby",
+    "searchText": PLACES_NEW_BASE_URL + "/places:searchText",
+}
+
+# Google reports quota and transient failures in the body of an HTTP 200
+RETRYABLE_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+RETRYABLE_HTTP_CODES = {429, 500, 502, 503, 504}
+
+
+class PlacesAPIError(Exception):
+    """An upstream Google call failed and retrying did not help."""
+
+
+class EndpointStats:
+    """Call, retry and latency counters for one upstream endpoint."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.over_query_limit = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent = deque(maxlen=500)  # latencies of the last attempts, for percentiles
+
+    def record(self, latency):
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.recent.append(latency)
+        record_upstream(self.endpoint, latency)
+
+    def failed(self):
+        self.errors += 1
+        UPSTREAM_ERRORS.labels(self.endpoint, "failed").inc()
+
+    def retried(self):
+        self.retries += 1
+        UPSTREAM_ERRORS.labels(self.endpoint, "retried").inc()
+
+    def summary(self):
+        recent = sorted(self.recent)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "over_query_limit": self.over_query_limit,
+            "avg_ms": round(1000 * self.total_latency / self.calls, 1) if self.calls else None,
+            "p95_ms": round(1000 * recent[int(0.95 * (len(recent) - 1))], 1) if recent else None,
+            "max_ms": round(1000 * self.max_latency, 1),
+        }
+
+
+class PlacesClient:
+    """Single pooled client for the Google Maps web services.
+
+    Owns one keep-alive connection pool, a token bucket per endpoint so
+    bursts stay under quota, and retries quota/transient failures with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, api_key, timeout=5.0, max_connections=20, qps=None, max_retries=3, backoff=0.5):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._buckets = {name: TokenBucket(rate) for name, rate in (qps or {}).items()}
+        self._stats = {name: EndpointStats(name) for name in ENDPOINTS}
+
+    async def get(self, endpoint, params):
+        """GET a legacy web service endpoint and return the decoded JSON body."""
+        return await self._request(endpoint, "GET", params={**params, "key": self.api_key})
+
+    async def post(self, endpoint, body, field_mask):
+        """POST to a Places API (New) endpoint, returning only the fields in `field_mask`."""
+        headers = {"X-Goog-Api-Key": self.api_key or "", "X-Goog-FieldMask": field_mask}
+        return await self._request(endpoint, "POST", json=body, headers=headers)
+
+    async def _request(self, endpoint, method, **kwargs):
+        url = ENDPOINTS[endpoint]
+        stats = self._stats[endpoint]
+        bucket = self._buckets.get(endpoint)
+
+        for attempt in range(self.max_retries + 1):
+            if bucket:
+                await bucket.acquire()
+
+            start = time.perf_counter()
+            try:
+                response = await self._client.request(method, url, **kwargs)
+                data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                problem = repr(e)
+            else:
+                if data.get("status") == "OVER_QUERY_LIMIT" or response.status_code == 429:
+                    stats.over_query_limit += 1
+                if response.status_code in RETRYABLE_HTTP_CODES or data.get("status") in RETRYABLE_STATUSES:
+                    problem = f"HTTP {response.status_code} {data.get('status')}"
+                elif response.status_code != 200:
+                    stats.record(time.perf_counter() - start)
+                    stats.failed()
+                    message = data.get("error_message") or data.get("error", {}).get("message", "")
+                    raise PlacesAPIError(f"{endpoint}: HTTP {response.status_code} {message}")
+                else:
+                    stats.record(time.perf_counter() - start)
+                    return data
+            stats.record(time.perf_counter() - start)
+
+            if attempt == self.max_retries:
+                stats.failed()
+                raise PlacesAPIError(f"{endpoint}: {problem} after {attempt + 1} attempts")
+
+            stats.retried()
+            delay = self.backoff * 2 ** attempt
+            await asyncio.sleep(random.uniform(delay / 2, delay))  # jitter so retries don't re-synchronise
+
+    def stats(self):
+        return {name: stats.summary() for name, stats in self._stats.items()}
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,200 @@
+import json, math, sqlite3, threading, time
+from cache import CACHE_DB_PATH
+from geo import EARTH_RADIUS, haversine
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lng, precision):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision, lat):
+    """(height, width) in meters of a geohash cell at this precision and latitude."""
+    lat_bits = 5 * precision // 2
+    lng_bits = 5 * precision - lat_bits
+    height = math.radians(180 / 2 ** lat_bits) * EARTH_RADIUS
+    width = math.radians(360 / 2 ** lng_bits) * EARTH_RADIUS * math.cos(math.radians(lat))
+    return height, width
+
+
+class SpatialIndex:
+    """Businesses we've already discovered, bucketed by geohash, plus search coverage.
+
+    Every place a Nearby Search returns is stored with the (engine, type,
+    keyword) that found it, and every search records the circle it covered.
+    A later search with the same engine whose circle lies inside a fresh
+    coverage record can be answered from the index instead of Google.
+    Places not seen by any search for `max_age` seconds are no longer served,
+    and are pruned along with stale coverage every `prune_interval` seconds.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, precision=7, max_age=24 * 3600, saturated_reuse_ratio=0.8, prune_interval=600):
+        self.precision = precision
+        self.max_age = max_age
+        self.saturated_reuse_ratio = saturated_reuse_ratio
+        self.prune_interval = prune_interval
+        self.index_hits = 0
+        self.index_misses = 0
+        self._pruned_at = 0.0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        coverage_columns = {row[1] for row in self._db.execute("PRAGMA table_info(coverage)")}
+        if coverage_columns and "engine" not in coverage_columns:
+            # Written before searches were keyed by engine; it's only a cache, so start over
+            self._db.executescript("DROP TABLE coverage; DROP TABLE IF EXISTS business_matches;")
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS businesses (
+                place_id TEXT PRIMARY KEY, geohash TEXT NOT NULL,
+                lat REAL NOT NULL, lng REAL NOT NULL, place TEXT NOT NULL, updated_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS businesses_geohash ON businesses (geohash);
+            CREATE INDEX IF NOT EXISTS businesses_updated ON businesses (updated_at);
+            CREATE TABLE IF NOT EXISTS business_matches (
+                place_id TEXT NOT NULL, engine TEXT NOT NULL, business_type TEXT NOT NULL, keyword TEXT NOT NULL,
+                PRIMARY KEY (engine, business_type, keyword, place_id));
+            CREATE INDEX IF NOT EXISTS business_matches_place ON business_matches (place_id);
+            CREATE TABLE IF NOT EXISTS coverage (
+                lat REAL NOT NULL, lng REAL NOT NULL, radius REAL NOT NULL,
+                engine TEXT NOT NULL, business_type TEXT NOT NULL, keyword TEXT NOT NULL,
+                complete INTEGER NOT NULL, pages INTEGER NOT NULL, fetched_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS coverage_engine_query ON coverage (engine, business_type, keyword, fetched_at);
+        """)
+        self._db.commit()
+
+    def add_places(self, places, business_type, keyword=None, engine="legacy"):
+        """Store raw Nearby Search results found by an (engine, type, keyword) search."""
+        now = time.time()
+        keyword = (keyword or "").strip().lower()
+        rows, matches = [], []
+        for place in places:
+            place_id = place.get("place_id")
+            if not place_id:
+                continue
+            loc = place["geometry"]["location"]
+            rows.append((place_id, geohash_encode(loc["lat"], loc["lng"], self.precision),
+                         loc["lat"], loc["lng"], json.dumps(place), now))
+            matches.append((place_id, engine, business_type, keyword))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO businesses VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("INSERT OR IGNORE INTO business_matches VALUES (?, ?, ?, ?)", matches)
+            self._db.commit()
+
+    def record_coverage(self, lat, lng, radius, business_type, keyword=None, complete=False, pages=1, engine="legacy"):
+        """Remember that this circle was searched. `complete` means Google had nothing more to give."""
+        now = time.time()
+        keyword = (keyword or "").strip().lower()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (lat, lng, radius, engine, business_type, keyword, int(complete), pages, now),
+            )
+            if now - self._pruned_at >= self.prune_interval:
+                self._prune(now - self.max_age)
+                self._pruned_at = now
+            self._db.commit()
+
+    def _prune(self, cutoff):
+        # Stale coverage, and places no search has returned since the cutoff (closed or moved, likely)
+        self._db.execute("DELETE FROM coverage WHERE fetched_at < ?", (cutoff,))
+        self._db.execute(
+            "DELETE FROM business_matches WHERE place_id IN (SELECT place_id FROM businesses WHERE updated_at < ?)",
+            (cutoff,),
+        )
+        self._db.execute("DELETE FROM businesses WHERE updated_at < ?", (cutoff,))
+
+    def coverage(self, lat, lng, radius, business_type, keyword=None, pages=1, engine="legacy"):
+        """How well fresh coverage answers this search: "complete", "saturated" or None.
+
+        A complete record answers any circle inside it. A saturated record
+        (Google capped the results) only answers circles inside it of at least
+        `saturated_reuse_ratio` of its radius, fetched with as many pages,
+        since a much smaller search would have surfaced different places.
+        """
+        keyword = (keyword or "").strip().lower()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT lat, lng, radius, complete, pages FROM coverage "
+                "WHERE engine = ? AND business_type = ? AND keyword = ? AND fetched_at >= ?",
+                (engine, business_type, keyword, time.time() - self.max_age),
+            ).fetchall()
+
+        found = None
+        for rec_lat, rec_lng, rec_radius, complete, rec_pages in rows:
+            if haversine(lat, lng, rec_lat, rec_lng) + radius > rec_radius * 1.001:
+                continue
+            if complete:
+                found = "complete"
+                break
+            if radius >= self.saturated_reuse_ratio * rec_radius and rec_pages >= pages:
+                found = "saturated"
+
+        if found:
+            self.index_hits += 1
+        else:
+            self.index_misses += 1
+        return found
+
+    def places_within(self, lat, lng, radius, business_type, keyword=None, engine="legacy"):
+        """Indexed places inside the circle that an (engine, type, keyword) search returned within `max_age`."""
+        keyword = (keyword or "").strip().lower()
+
+        # Coarsest useful buckets: cells at least `radius` across, so the circle
+        # fits inside the 3x3 block of cells around its center
+        precision = self.precision
+        while precision > 1 and min(geohash_cell_size(precision, lat)) < radius:
+            precision -= 1
+        height, width = geohash_cell_size(precision, lat)
+        d_lat = math.degrees(height / EARTH_RADIUS)
+        d_lng = math.degrees(width / (EARTH_RADIUS * math.cos(math.radians(lat))))
+        prefixes = {
+            geohash_encode(lat + i * d_lat, lng + j * d_lng, precision)
+            for i in (-1, 0, 1) for j in (-1, 0, 1)
+        }
+
+        ranges = " OR ".join("(b.geohash >= ? AND b.geohash < ?)" for _ in prefixes)
+        params = [engine, business_type, keyword, time.time() - self.max_age]
+        for prefix in prefixes:
+            params += [prefix, prefix + "{"]  # "{" sorts right after "z", the last geohash char
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT b.lat, b.lng, b.place FROM businesses b "
+                "JOIN business_matches m ON m.place_id = b.place_id "
+                f"WHERE m.engine = ? AND m.business_type = ? AND m.keyword = ? AND b.updated_at >= ? AND ({ranges})",
+                params,
+            ).fetchall()
+
+        # Nearest first, so repeated answers for the same area come back in the same order
+        nearby = sorted((haversine(lat, lng, p_lat, p_lng), place) for p_lat, p_lng, place in rows)
+        return [json.loads(place) for distance, place in nearby if distance <= radius]
+
+    def stats(self):
+        with self._lock:
+            businesses = self._db.execute("SELECT COUNT(*) FROM businesses").fetchone()[0]
+            coverage = self._db.execute("SELECT COUNT(*) FROM coverage").fetchone()[0]
+        lookups = self.index_hits + self.index_misses
+        return {
+            "businesses": businesses,
+            "coverage_records": coverage,
+            "hits": self.index_hits,
+            "misses": self.index_misses,
+            "hit_rate": round(self.index_hits / lookups, 3) if lookups else None,
+        }
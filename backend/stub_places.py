@@ -0,0 +1,149 @@
+"""Local stand-in for the Google endpoints main.py calls, for offline testing.
+
+Serves a fixed, seeded universe of fake businesses through the legacy
+Geocoding / Nearby Search / Place Details web services and the Places API
+(New) searchNearby / searchText endpoints. Point the backend at it with:
+
+    uvicorn stub_places:app --port 8009
+    GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8009/maps/api \\
+    PLACES_NEW_BASE_URL=http://127.0.0.1:8009/v1 python app.py
+
+STUB_LATENCY (seconds) adds a delay to every response to mimic the real API.
+"""
+import asyncio, os, random
+from fastapi import FastAPI, Query, Request
+from geo import haversine
+
+app = FastAPI(title="google places stub")
+
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0"))
+CENTER = (43.6532, -79.3832)  # every address geocodes here
+STUB_TYPES = ["restaurant", "cafe", "bar", "bakery", "store", "clothing_store", "supermarket", "gym"]
+PAGE_SIZE = 20
+
+
+def _make_universe(count=3000, seed=7):
+    rng = random.Random(seed)
+    places = []
+    for i in range(count):
+        place_type = rng.choice(STUB_TYPES)
+        places.append({
+            "place_id": f"stub-{i}",
+            "name": f"Stub {place_type.replace('_', ' ').title()} {i}",
+            "vicinity": f"{i} Stub Street, Toronto",
+            "lat": CENTER[0] + rng.uniform(-0.15, 0.15),
+            "lng": CENTER[1] + rng.uniform(-0.2, 0.2),
+            "types": [place_type, "point_of_interest", "establishment"],
+            "phone": f"(416) 555-{i % 10000:04d}" if rng.random() > 0.1 else None,
+            "prominence": rng.random(),
+        })
+    return places
+
+
+UNIVERSE = _make_universe()
+BY_ID = {place["place_id"]: place for place in UNIVERSE}
+
+
+def _search(lat, lng, radius, place_type):
+    # Keywords only affect relevance upstream, so the stub ignores them
+    matches = [
+        place for place in UNIVERSE
+        if place_type in place["types"] and haversine(lat, lng, place["lat"], place["lng"]) <= radius
+    ]
+    return sorted(matches, key=lambda place: -place["prominence"])[:3 * PAGE_SIZE]
+
+
+def _page(matches, page):
+    chunk = matches[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+    has_more = len(matches) > (page + 1) * PAGE_SIZE
+    return chunk, has_more
+
+
+def _legacy(place):
+    return {
+        "place_id": place["place_id"],
+        "name": place["name"],
+        "vicinity": place["vicinity"],
+        "geometry": {"location": {"lat": place["lat"], "lng": place["lng"]}},
+        "types": place["types"],
+    }
+
+
+def _new(place):
+    result = {
+        "id": place["place_id"],
+        "displayName": {"text": place["name"], "languageCode": "en"},
+        "shortFormattedAddress": place["vicinity"],
+        "location": {"latitude": place["lat"], "longitude": place["lng"]},
+        "types": place["types"],
+    }
+    if place["phone"]:
+        result["nationalPhoneNumber"] = place["phone"]
+    return result
+
+
+@app.middleware("http")
+async def simulated_latency(request: Request, call_next):
+    if STUB_LATENCY:
+        await asyncio.sleep(STUB_LATENCY)
+    return await call_next(request)
+
+
+@app.get("/maps/api/geocode/json")
+def geocode(address: str = Query(...)):
+    return {"status": "OK", "results": [{"geometry": {"location": {"lat": CENTER[0], "lng": CENTER[1]}}}]}
+
+
+@app.get("/maps/api/place/nearbysearch/json")
+def nearbysearch(
+    location: str | None = None, radius: float = 2000, type: str = "store",
+    keyword: str | None = None, pagetoken: str | None = None,
+):
+    if pagetoken:
+        # Token encodes the original query plus the page to serve
+        location, radius, type, keyword, page = pagetoken.split("|")
+        radius, page = float(radius), int(page)
+    else:
+        page = 0
+    lat, lng = map(float, location.split(","))
+    chunk, has_more = _page(_search(lat, lng, radius, type), page)
+
+    data = {"status": "OK" if chunk else "ZERO_RESULTS", "results": [_legacy(place) for place in chunk]}
+    if has_more:
+        data["next_page_token"] = f"{location}|{radius}|{type}|{keyword or ''}|{page + 1}"
+    return data
+
+
+@app.get("/maps/api/place/details/json")
+def details(place_id: str):
+    place = BY_ID.get(place_id)
+    if not place:
+        return {"status": "NOT_FOUND"}
+    result = {"formatted_phone_number": place["phone"]} if place["phone"] else {}
+    return {"status": "OK", "result": result}
+
+
+@app.post("/v1/places:searchNearby")
+async def search_nearby(request: Request):
+    body = await request.json()
+    circle = body["locationRestriction"]["circle"]
+    matches = _search(circle["center"]["latitude"], circle["center"]["longitude"], circle["radius"], body["includedTypes"][0])
+    return {"places": [_new(place) for place in matches[:body.get("maxResultCount", PAGE_SIZE)]]}
+
+
+@app.post("/v1/places:searchText")
+async def search_text(request: Request):
+    body = await request.json()
+    rect = body["locationRestriction"]["rectangle"]
+    low, high = rect["low"], rect["high"]
+    lat = (low["latitude"] + high["latitude"]) / 2
+    lng = (low["longitude"] + high["longitude"]) / 2
+    radius = haversine(lat, lng, high["latitude"], high["longitude"])
+    page = int(body.get("pageToken") or 0)
+
+    matches = _search(lat, lng, radius, body.get("includedType", "store"))
+    chunk, has_more = _page(matches, page)
+    data = {"places": [_new(place) for place in chunk]}
+    if has_more:
+        data["nextPageToken"] = str(page + 1)
+    return data
@@ -1,13 +1,27 @@
-from fastapi import FastAPI, HTTPException, Request, Form
-from fastapi.responses import Response, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request, Form, Query, Header, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field
+from fastapi.responses import Response, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Play
+from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Play, Connect
 from twilio.rest import Client
 import os
+import asyncio
+import base64
+import functools
+import json
+import re
+import time
+import uuid
 import httpx
 from datetime import datetime
 from dotenv import load_dotenv
+from call_events import CallEventBus, format_sse
+from call_store import open_call_store
+from campaigns import CampaignDialer, campaign_summary
+from prerender import Prerenderer
+from audio_store import AudioStore
+from call_trace import CallTrace, parse_server_timing, stage
+from metrics import AUDIO_FETCHES, instrument
 
 # Load environment variables
 load_dotenv()
@@ -23,33 +37,569 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms and error counters at GET /metrics (Prometheus format)
+instrument(app)
+
 # Twilio credentials (will be loaded from .env)
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
 
+# One Twilio REST client (and its keep-alive HTTP session) shared by every call
+_twilio_client = None
+
+def get_twilio_client():
+    global _twilio_client
+    if _twilio_client is None:
+        _twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return _twilio_client
+
 # Hardcoded phone number to call (replace with your actual phone number for testing)
 TEST_PHONE_NUMBER = "+12897950739"  # Replace with your actual phone number
 
 # Backend-B URL
 BACKEND_B_URL = "http://localhost:8000"
 
-# Store call results (in production, use a database)
-call_results = {}
+# Format of the clips we fetch and serve for <Play>: 'mulaw' (8 kHz μ-law WAV,
+# what the phone line carries, ~6x smaller) or 'wav' for backend-b's full-rate 24 kHz
+CALL_AUDIO_FORMAT = os.getenv('CALL_AUDIO_FORMAT', 'mulaw')
+
+# Call state lives in a store shared by all workers (CALL_STORE / CALL_STORE_PATH),
+# so a Twilio webhook can land on any worker
+call_store = open_call_store()
+
+# Likely opening/clarifying lines, synthesized before the business picks up;
+# which ones are ready is kept in the call store, so every worker can use them
+PRERENDER_CONCURRENCY = int(os.getenv('PRERENDER_CONCURRENCY', '2'))  # TTS requests at once while warming
+# backend-b's TTS cache evicts least recently used clips past TTS_CACHE_MAX_BYTES,
+# so a rendered line is only trusted for this long before it's rendered again
+PRERENDER_READY_TTL = float(os.getenv('PRERENDER_READY_TTL', str(6 * 3600)))
+prerenderer = Prerenderer(
+    BACKEND_B_URL, audio_format=CALL_AUDIO_FORMAT, concurrency=PRERENDER_CONCURRENCY,
+    store=call_store, ready_ttl=PRERENDER_READY_TTL,
+)
+
+ACTIVE_STATUSES = ('IN_PROGRESS',)
+FINISHED_STATUSES = ('COMPLETED', 'NO_RESULT', 'FAILED')
+CALL_ARCHIVE_AFTER = float(os.getenv('CALL_ARCHIVE_AFTER', str(24 * 3600)))  # seconds a finished call stays live
+CALL_ARCHIVE_INTERVAL = float(os.getenv('CALL_ARCHIVE_INTERVAL', '300'))
+# An active call this long without a webhook lost its status callback; Twilio ends calls at 4 hours
+CALL_STALE_AFTER = float(os.getenv('CALL_STALE_AFTER', str(4 * 3600)))
+
+# Every webhook's stages (LLM, TTS, audio handoff...) are timed onto the call's
+# timeline, shown by GET /call-status; webhooks slower than the budget are flagged
+TWILIO_WEBHOOK_BUDGET = float(os.getenv('TWILIO_WEBHOOK_BUDGET', '15'))  # Twilio's webhook timeout, in seconds
+CALL_TIMELINE_MAX_SPANS = int(os.getenv('CALL_TIMELINE_MAX_SPANS', '500'))
+
+# Push channel for call state changes (GET /call-events)
+CALL_EVENT_HEARTBEAT = float(os.getenv('CALL_EVENT_HEARTBEAT', '15'))  # seconds between keep-alive comments
+CALL_EVENT_POLL = float(os.getenv('CALL_EVENT_POLL', '0.5'))  # how often to pick up other workers' changes
+call_events = CallEventBus(call_store, poll_interval=CALL_EVENT_POLL)
+_background_tasks = []
+
+def create_call(call_sid, **fields):
+    """Start tracking a call and push it to /call-events subscribers"""
+    event = call_store.create(call_sid, fields)
+    call_events.notify()
+    return event['call'] if event else None
+
+async def place_call(phone_number, business_name, role, employment_type, location, **extra):
+    """Dial a business through the shared Twilio client and start tracking the call"""
+    # Render this call's likely lines while the phone rings
+    prerenderer.warm(role, employment_type, location)
+    
+    base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
+    create = functools.partial(
+        get_twilio_client().calls.create,
+        url=f'{base_url}/webhook/answer',  # Use our webhook
+        to=phone_number,
+        from_=TWILIO_PHONE_NUMBER,
+        status_callback=f'{base_url}/webhook/status',  # Tells us when the call ends, however it ends
+        status_callback_method='POST'
+    )
+    # The Twilio SDK blocks, so dial off the event loop
+    call = await asyncio.get_running_loop().run_in_executor(None, create)
+
+    create_call(
+        call.sid,
+        phone_number=phone_number,
+        business_name=business_name,
+        role=role,
+        employment_type=employment_type,
+        location=location,
+        status='IN_PROGRESS',
+        hiring_status='UNKNOWN',
+        started_at=None,
+        **extra
+    )
+    return call
+
+def update_call(call_sid, from_statuses=None, **fields):
+    """Apply changes to a tracked call and push the new state to /call-events subscribers.
+
+    With `from_statuses` the change only happens if the call is currently in
+    one of them (atomically, across workers); returns None when it didn't.
+    """
+    event = call_store.update(call_sid, fields, from_statuses)
+    if event is None:
+        return None
+    call_events.notify()
+    return event['call']
+
+_timeline_writes = set()  # strong refs, so pending writes aren't garbage-collected
+
+def save_trace(trace):
+    """Append a finished trace's spans to its call's timeline, without holding up the response"""
+    if not trace.call_sid or not trace.spans:
+        return
+    task = asyncio.create_task(append_timeline(trace.call_sid, trace.spans))
+    _timeline_writes.add(task)
+    task.add_done_callback(_timeline_writes.discard)
+
+async def append_timeline(call_sid, spans):
+    # The store write can wait on other workers' locks, so run it off the event loop
+    add = functools.partial(call_store.add_spans, call_sid, spans, CALL_TIMELINE_MAX_SPANS)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, add)
+    except Exception as e:
+        print(f"⚠️ Saving timeline for {call_sid} failed: {e}")
+
+def traced_webhook(name):
+    """Time a Twilio webhook, and every stage() inside it, onto its call's timeline"""
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            call_sid = kwargs.get('CallSid')
+            if call_sid is None and isinstance(kwargs.get('request'), Request):
+                call_sid = (await kwargs['request'].form()).get('CallSid')
+            with CallTrace(call_sid or '', f'webhook/{name}', budget=TWILIO_WEBHOOK_BUDGET, on_finish=save_trace):
+                return await handler(*args, **kwargs)
+        return wrapper
+    return decorate
+
+async def archive_finished_calls():
+    while True:
+        await asyncio.sleep(CALL_ARCHIVE_INTERVAL)
+        try:
+            archived = call_store.archive(FINISHED_STATUSES, CALL_ARCHIVE_AFTER, ACTIVE_STATUSES, CALL_STALE_AFTER)
+            if archived:
+                print(f"🗄️ Archived {archived} finished calls")
+        except Exception as e:
+            print(f"⚠️ Archiving calls failed: {e}")
+
+# Campaign dialer: queued bulk calls, capped concurrency and calls-per-second
+CAMPAIGN_MAX_CONCURRENT = int(os.getenv('CAMPAIGN_MAX_CONCURRENT', '5'))  # live calls at once
+CAMPAIGN_CPS = float(os.getenv('CAMPAIGN_CPS', '1'))  # Twilio's default outbound limit is 1 call/second
+CAMPAIGN_CALL_TIMEOUT = float(os.getenv('CAMPAIGN_CALL_TIMEOUT', '900'))  # free a slot if no status callback arrives
+# Campaigns are kept in the call store; every worker runs the dialer, but only the
+# one holding the store's lease dials, so these limits hold across workers
+dialer = CampaignDialer(
+    place_call,
+    call_store,
+    call_events,
+    FINISHED_STATUSES,
+    max_concurrent=CAMPAIGN_MAX_CONCURRENT,
+    cps=CAMPAIGN_CPS,
+    call_timeout=CAMPAIGN_CALL_TIMEOUT
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    _background_tasks.append(asyncio.create_task(call_events.run()))
+    _background_tasks.append(asyncio.create_task(archive_finished_calls()))
+    _background_tasks.append(asyncio.create_task(dialer.run()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+
+# Audio Twilio fetches for <Play>, held in memory by id (GET /audio/{id}.wav)
+AUDIO_STORE_MAX_BYTES = int(os.getenv('AUDIO_STORE_MAX_BYTES', str(64 * 1024 * 1024)))
+AUDIO_STORE_TTL = float(os.getenv('AUDIO_STORE_TTL', '900'))  # seconds a clip stays playable
+audio_store = AudioStore(max_bytes=AUDIO_STORE_MAX_BYTES, ttl=AUDIO_STORE_TTL)
+
+def store_audio(audio, audio_id=None):
+    """Keep a synthesized clip (backend-b names it by content); returns the URL Twilio plays it from"""
+    audio_id = audio_id or uuid.uuid4().hex
+    with stage('audio_handoff', bytes=len(audio)):
+        audio_store.put(audio_id, audio)
+    base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
+    return f"{base_url}/audio/{audio_id}.wav"
+
+@app.get("/audio/{audio_id}")
+async def get_audio(audio_id: str):
+    """Serve a synthesized clip to Twilio"""
+    audio_id = audio_id.removesuffix('.wav')
+    audio = audio_store.get(audio_id)
+    AUDIO_FETCHES.labels('memory' if audio is not None else 'backend-b').inc()
+    if audio is None:
+        # Synthesized for a call another worker handled: backend-b still has it by id
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            backend_response = await client.get(f"{BACKEND_B_URL}/audio/{audio_id}")
+        if backend_response.status_code != 200:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        audio = backend_response.content
+        audio_store.put(audio_id, audio)
+    return Response(content=audio, media_type='audio/wav')
+
+# How our lines reach the caller: 'play' synthesizes each line, then Twilio
+# fetches it for <Play>; 'stream' opens a <Connect><Stream> media stream and
+# pushes 8 kHz μ-law down /media-stream while the line is still being synthesized
+CALL_AUDIO_MODE = os.getenv('CALL_AUDIO_MODE', 'play')
+TTS_VOICE = "en_woman_1"
+MEDIA_FRAME_BYTES = 160  # 20 ms of 8 kHz μ-law, Twilio's own frame size
 
-# Mount static files directory to serve audio (must be before routes)
-STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
-os.makedirs(STATIC_DIR, exist_ok=True)
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+async def post_backend_b(client, stage_name, path, **kwargs):
+    """POST to backend-b as a timed stage of the current call, keeping backend-b's own Server-Timing breakdown"""
+    with stage(stage_name, endpoint=path) as span:
+        backend_response = await client.post(f"{BACKEND_B_URL}{path}", **kwargs)
+        span['backend'] = parse_server_timing(backend_response.headers.get('Server-Timing'))
+        if backend_response.status_code != 200:
+            span['error'] = f"HTTP {backend_response.status_code}"
+    return backend_response
+
+def media_stream_url():
+    base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
+    return base_url.replace('https://', 'wss://', 1).replace('http://', 'ws://', 1) + '/media-stream'
+
+async def speak(client, response, text, label="response"):
+    """Add `text`, spoken in the BosonAI voice, to a TwiML response.
+
+    Raises if TTS fails in 'play' mode, so callers can fall back to <Say>.
+    In 'stream' mode the line travels as stream parameters and is
+    synthesized once Twilio connects, so this returns straight away; if
+    streaming TTS fails there, the socket sends the whole line from
+    /generate_audio instead.
+    """
+    if CALL_AUDIO_MODE == 'stream':
+        connect = Connect()
+        stream = connect.stream(url=media_stream_url())
+        stream.parameter(name='text', value=text)
+        stream.parameter(name='voice', value=TTS_VOICE)
+        response.append(connect)
+        print(f"🔊 Streaming BosonAI {label}")
+        return
+
+    tts_start = time.time()
+    tts_response = await post_backend_b(
+        client,
+        'tts',
+        '/generate_audio',
+        json={
+            "text": text,
+            "voice": TTS_VOICE,
+            "format": CALL_AUDIO_FORMAT
+        },
+        timeout=600.0
+    )
+    print(f"⏱️ BosonAI {label} TTS took {time.time() - tts_start:.2f}s")
+    
+    if tts_response.status_code != 200:
+        print(f"❌ TTS failed: {tts_response.text}")
+        raise Exception(f"TTS generation failed: {tts_response.text}")
+    
+    audio_url = store_audio(tts_response.content, tts_response.headers.get('X-Audio-Id'))
+    print(f"🔊 Playing BosonAI {label}: {audio_url}")
+    # The clip is already in memory, so it can play straight away
+    response.play(audio_url)
+
+async def respond_and_speak(client, response, their_message, business_name, role, employment_type, location):
+    """Get a conversational reply and its audio from backend-b in one request.
+
+    backend-b synthesizes the reply sentence by sentence while the LLM is
+    still writing it; each sentence becomes its own <Play>, in order.
+    Returns the reply text, or None if nothing could be played (callers
+    then fall back to generating text and audio separately).
+    """
+    start = time.time()
+    spoken = []
+    # LLM and TTS overlap inside backend-b, so they are one stage here; Server-Timing splits them
+    with stage('respond_and_speak') as span:
+        try:
+            async with client.stream(
+                'POST',
+                f"{BACKEND_B_URL}/respond_and_speak",
+                data={
+                    "their_message": their_message,
+                    "business_name": business_name,
+                    "role": role,
+                    "employment_type": employment_type,
+                    "location": location,
+                    "voice": TTS_VOICE,
+                    "format": CALL_AUDIO_FORMAT
+                }
+            ) as reply:
+                span['backend'] = parse_server_timing(reply.headers.get('Server-Timing'))
+                reply.raise_for_status()
+                async for line in reply.aiter_lines():
+                    if not line:
+                        continue
+                    segment = json.loads(line)
+                    if 'error' in segment:
+                        raise Exception(segment['error'])
+                    if segment.get('done'):
+                        span['backend'] = segment.get('timings', span['backend'])
+                        break
+                    response.play(store_audio(base64.b64decode(segment['audio']), segment['audio_id']))
+                    spoken.append(segment['text'])
+                    if len(spoken) == 1:
+                        span['first_sentence_ms'] = round(1000 * (time.time() - start), 1)
+                        print(f"⏱️ First sentence ready after {time.time() - start:.2f}s")
+        except Exception as e:
+            print(f"⚠️ Respond-and-speak failed after {len(spoken)} sentences: {e}")
+            span['error'] = str(e)
+        span['sentences'] = len(spoken)
+    if not spoken:
+        return None
+    print(f"⏱️ Reply and audio took {time.time() - start:.2f}s ({len(spoken)} sentences)")
+    return " ".join(spoken)
+
+async def line_audio(text, voice):
+    """A whole line as raw 8 kHz μ-law, from backend-b's non-streaming (and cached) TTS"""
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        tts_response = await post_backend_b(
+            client, 'tts', '/generate_audio', json={"text": text, "voice": voice, "format": "mulaw"}
+        )
+    tts_response.raise_for_status()
+    return wav_samples(tts_response.content)
+
+def wav_samples(wav):
+    """The bytes of a WAV file's data chunk"""
+    offset = 12  # past "RIFF", the size and "WAVE"
+    while offset + 8 <= len(wav):
+        size = int.from_bytes(wav[offset + 4:offset + 8], 'little')
+        if wav[offset:offset + 4] == b'data':
+            return wav[offset + 8:offset + 8 + size]
+        offset += 8 + size + size % 2
+    raise ValueError("WAV has no data chunk")
+
+@app.websocket("/media-stream")
+async def media_stream(websocket: WebSocket):
+    """Twilio Media Streams socket: speaks the line named in the stream's parameters.
+
+    Audio is forwarded frame by frame as backend-b synthesizes it. Once
+    Twilio reports (via a mark) that the last frame has played, the socket
+    is closed and the call moves on to the TwiML after <Connect>.
+    """
+    await websocket.accept()
+    stream_sid = None
+    speaking = None
+
+    async def send_media(audio):
+        await websocket.send_text(json.dumps({
+            'event': 'media',
+            'streamSid': stream_sid,
+            'media': {'payload': base64.b64encode(audio).decode('ascii')}
+        }))
+
+    async def send_line(call_sid, text, voice):
+        start = time.time()
+        first_frame_at = None
+        sent = 0
+        pending = b''
+        with CallTrace(call_sid or '', 'media-stream', on_finish=save_trace), stage('stream_tts', chars=len(text)) as span:
+            try:
+                async with httpx.AsyncClient(timeout=600.0) as client:
+                    async with client.stream(
+                        'POST', f"{BACKEND_B_URL}/generate_audio_stream", json={"text": text, "voice": voice}
+                    ) as tts_response:
+                        tts_response.raise_for_status()
+                        async for chunk in tts_response.aiter_bytes():
+                            pending += chunk
+                            usable = len(pending) - len(pending) % MEDIA_FRAME_BYTES
+                            if not usable:
+                                continue
+                            if first_frame_at is None:
+                                first_frame_at = time.time()
+                                span['first_frame_ms'] = round(1000 * (first_frame_at - start), 1)
+                                print(f"⏱️ First audio frame after {first_frame_at - start:.2f}s")
+                            await send_media(pending[:usable])
+                            sent += usable
+                            pending = pending[usable:]
+                if pending:
+                    await send_media(pending)
+                    sent += len(pending)
+                print(f"🔊 Streamed {sent / 8000:.1f}s of audio in {time.time() - start:.2f}s")
+            except Exception as e:
+                print(f"❌ Streaming TTS failed: {e}")
+                if sent:
+                    span['error'] = str(e)
+                else:
+                    # Nothing has played yet, so say the whole line the way play mode would rather than leave silence
+                    span['stream_error'] = str(e)[:200]
+                    span['fallback'] = 'play'
+                    try:
+                        audio = await line_audio(text, voice)
+                        await send_media(audio)
+                        sent = len(audio)
+                        print(f"🔊 Sent {sent / 8000:.1f}s of audio from /generate_audio instead")
+                    except Exception as fallback_error:
+                        print(f"❌ Fallback TTS failed too, the line is lost: {fallback_error}")
+                        span['error'] = str(fallback_error)
+            span['audio_seconds'] = round(sent / 8000, 2)
+        # Twilio echoes this mark once everything before it has played (or straight away if nothing was sent)
+        await websocket.send_text(json.dumps({'event': 'mark', 'streamSid': stream_sid, 'mark': {'name': 'line-done'}}))
+
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            event = message.get('event')
+            if event == 'start':
+                stream_sid = message['start']['streamSid']
+                params = message['start'].get('customParameters', {})
+                print(f"🎧 Media stream {stream_sid} for call {message['start'].get('callSid')}")
+                speaking = asyncio.create_task(
+                    send_line(message['start'].get('callSid'), params.get('text', ''), params.get('voice', TTS_VOICE))
+                )
+            elif event == 'mark' and message.get('mark', {}).get('name') == 'line-done':
+                break
+            elif event == 'stop':
+                break
+            # 'connected' and the business's own 'media' frames need no reply
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if speaking:
+            speaking.cancel()
+    try:
+        await websocket.close()
+    except RuntimeError:
+        pass  # Twilio already hung up
 
 @app.get("/call-status/{call_sid}")
 async def get_call_status(call_sid: str):
-    """Get the status and result of a call"""
-    if call_sid in call_results:
-        return call_results[call_sid]
+    """Get the status and result of a call, with the timeline of every stage so far"""
+    call = call_store.get(call_sid)
+    if call is not None:
+        timeline = sorted(call_store.spans(call_sid), key=lambda span: span['at'])
+        stage_ms = {}
+        for span in timeline:
+            stage_ms[span['stage']] = round(stage_ms.get(span['stage'], 0) + span['ms'], 1)
+        return {**call, 'timeline': timeline, 'stage_ms': stage_ms}
     else:
         raise HTTPException(status_code=404, detail="Call not found")
 
+@app.get("/calls")
+async def list_calls(status: str = Query(None), limit: int = Query(100, ge=1, le=1000)):
+    """Live (not yet archived) calls, optionally only those in one status"""
+    return {'calls': call_store.list(status, limit), 'stats': call_store.stats(), 'events': call_events.stats()}
+
+@app.get("/call-events")
+async def stream_call_events(
+    request: Request,
+    call_sid: list[str] = Query(None, description="Only stream these calls (repeatable); all calls when omitted"),
+    last_event_id: int = Query(None, description="Resume after this event id (browsers send the Last-Event-ID header instead)"),
+    last_event_id_header: str = Header(None, alias="Last-Event-ID")
+):
+    """Server-Sent Events stream of call state changes, replacing /call-status polling"""
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    call_sids = set(call_sid or [])
+
+    # Subscribe before replaying so nothing published in between is lost
+    queue = call_events.subscribe()
+    backlog = call_events.replay(last_event_id, call_sids)
+
+    async def events():
+        sent = last_event_id or 0
+        try:
+            yield f"retry: 3000\n\n"
+            for event in backlog:
+                sent = event['id']
+                yield format_sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=CALL_EVENT_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    break  # fell behind; the client reconnects and resumes from its last id
+                if event['id'] <= sent or (call_sids and event['call_sid'] not in call_sids):
+                    continue
+                sent = event['id']
+                yield format_sse(event)
+        finally:
+            call_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class CampaignBusiness(BaseModel):
+    phone_number: str
+    business_name: str
+    role: str | None = None
+    employment_type: str | None = None
+    location: str | None = None
+    priority: int = 0
+
+class CampaignRequest(BaseModel):
+    name: str = "Campaign"
+    role: str = "Software Engineer"
+    employment_type: str = "Full-time"
+    location: str = "Toronto"
+    priority: int = Field(0, description="Higher priority campaigns are dialed first")
+    businesses: list[CampaignBusiness] = Field(..., min_length=1)
+
+def get_campaign(campaign_id):
+    campaign = dialer.get(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign
+
+@app.post("/campaigns")
+async def create_campaign(request: CampaignRequest):
+    """Queue a list of businesses to be called"""
+    businesses = []
+    for business in request.businesses:
+        if not business.phone_number or business.phone_number == "N/A":
+            continue
+        businesses.append({
+            'phone_number': business.phone_number,
+            'business_name': business.business_name,
+            'role': business.role or request.role,
+            'employment_type': business.employment_type or request.employment_type,
+            'location': business.location or request.location,
+            'priority': business.priority
+        })
+    # Get a head start on every context's lines before the first call is dialed
+    for context in {(b['role'], b['employment_type'], b['location']) for b in businesses}:
+        prerenderer.warm(*context)
+    campaign = dialer.add_campaign(request.name, businesses, request.priority)
+    print(f"📋 Campaign {campaign['id']} '{campaign['name']}': {len(campaign['calls'])} businesses queued")
+    return campaign_summary(campaign)
+
+@app.get("/campaigns")
+async def list_campaigns():
+    return {
+        'campaigns': [campaign_summary(campaign) for campaign in dialer.list()],
+        'dialer': dialer.stats(),
+        'prerender': prerenderer.stats()
+    }
+
+@app.get("/campaigns/{campaign_id}")
+async def campaign_status(campaign_id: str):
+    """Campaign progress, with the state of each business's call"""
+    campaign = get_campaign(campaign_id)
+    return {**campaign_summary(campaign), 'calls': campaign['calls']}
+
+@app.post("/campaigns/{campaign_id}/pause")
+async def pause_campaign(campaign_id: str):
+    """Stop starting new calls for this campaign; calls already live carry on"""
+    if not dialer.pause(campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign_summary(get_campaign(campaign_id))
+
+@app.post("/campaigns/{campaign_id}/resume")
+async def resume_campaign(campaign_id: str):
+    if not dialer.resume(campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign_summary(get_campaign(campaign_id))
+
 @app.post("/make-call")
 async def make_call(
     phone_number: str = Form(...),
@@ -59,33 +609,11 @@ async def make_call(
     location: str = Form("Toronto")
 ):
     try:
-        # Initialize Twilio client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        # Get the webhook base URL from environment
-        base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
-        
         print(f"Making call to: {business_name} ({phone_number})")
         print(f"Role: {role}, Type: {employment_type}, Location: {location}")
         
-        # Make the call to the provided phone number
-        call = client.calls.create(
-            url=f'{base_url}/webhook/answer',  # Use our webhook
-            to=phone_number,
-            from_=TWILIO_PHONE_NUMBER
-        )
-        
-        # Initialize call result tracking with business info
-        call_results[call.sid] = {
-            'phone_number': phone_number,
-            'business_name': business_name,
-            'role': role,
-            'employment_type': employment_type,
-            'location': location,
-            'status': 'IN_PROGRESS',
-            'hiring_status': 'UNKNOWN',
-            'started_at': None
-        }
+        # Make the call to the provided phone number and track it
+        call = await place_call(phone_number, business_name, role, employment_type, location)
         
         return {
             'success': True,
@@ -99,7 +627,28 @@ async def make_call(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/webhook/status")
+@traced_webhook('status')
+async def call_status_callback(
+    CallSid: str = Form(...),
+    CallStatus: str = Form(...),
+    CallDuration: str = Form(None)
+):
+    """Twilio status callback: closes out calls that ended without a hiring result"""
+    print(f"📟 Call {CallSid} is {CallStatus}")
+    if CallStatus in ('completed', 'busy', 'failed', 'no-answer', 'canceled'):
+        update_call(
+            CallSid,
+            from_statuses=ACTIVE_STATUSES,
+            status='NO_RESULT' if CallStatus == 'completed' else 'FAILED',
+            twilio_status=CallStatus,
+            duration=int(CallDuration) if CallDuration else None,
+            completed_at=datetime.now().isoformat()
+        )
+    return Response(status_code=204)
+
 @app.post("/webhook/answer")
+@traced_webhook('answer')
 async def answer_call(request: Request):
     """Webhook that Twilio calls when the call is answered"""
     print("\n📞 CALL ANSWERED - Capturing greeting...")
@@ -124,6 +673,7 @@ async def answer_call(request: Request):
     return Response(content=str(response), media_type='application/xml')
 
 @app.post("/webhook/greeting-result")
+@traced_webhook('greeting-result')
 async def handle_greeting(
     SpeechResult: str = Form(None),
     CallSid: str = Form(None)
@@ -138,93 +688,67 @@ async def handle_greeting(
     response = VoiceResponse()
     
     # Get business info from stored call data
-    business_info = call_results.get(call_sid, {})
+    business_info = call_store.get(call_sid) or {}
     BUSINESS_NAME = business_info.get('business_name', 'the business')
     ROLE = business_info.get('role', 'Software Engineer')
     EMPLOYMENT_TYPE = business_info.get('employment_type', 'Full-time')
     LOCATION = business_info.get('location', 'Toronto')
     
     print(f"📋 Personalizing for: {BUSINESS_NAME}, Role: {ROLE}")
+    update_call(call_sid, from_statuses=ACTIVE_STATUSES, started_at=datetime.now().isoformat(), greeting=greeting)
     
     # Generate AI response using backend-b
     try:
         async with httpx.AsyncClient(timeout=600.0) as client:
-            # Step 1: Generate natural conversational response
-            print(f"🤖 Generating natural response to greeting...")
-            adaptive_text = None
+            # Step 1: A pre-rendered opener when the greeting is a usual one,
+            # otherwise a natural conversational response from the LLM
+            adaptive_text = prerenderer.opening_line(greeting, BUSINESS_NAME, ROLE, EMPLOYMENT_TYPE, LOCATION)
+            spoken = False
             
-            try:
-                adaptive_response = await client.post(
-                    f"{BACKEND_B_URL}/generate_conversation_response",
-                    data={
-                        "their_message": greeting,
-                        "business_name": BUSINESS_NAME,
-                        "role": ROLE,
-                        "employment_type": EMPLOYMENT_TYPE,
-                        "location": LOCATION,
-                        "is_first_message": "true"
-                    }
+            if adaptive_text:
+                print(f"⚡ Pre-rendered opener: {adaptive_text}")
+            elif CALL_AUDIO_MODE == 'play':
+                # Reply and audio in one round trip, TTS overlapping the LLM
+                print(f"🤖 Generating natural response and audio...")
+                adaptive_text = await respond_and_speak(
+                    client, response, greeting, BUSINESS_NAME, ROLE, EMPLOYMENT_TYPE, LOCATION
                 )
-                
-                if adaptive_response.status_code == 200:
-                    adaptive_data = adaptive_response.json()
-                    adaptive_text = adaptive_data.get("response", "")
-                    print(f"✅ Natural response: {adaptive_text}")
-                else:
-                    raise Exception(f"Conversation generation failed: {adaptive_response.status_code}")
-            except Exception as e:
-                print(f"⚠️ LLM unavailable, using fallback: {e}")
-                # Fallback to simple greeting
-                adaptive_text = f"Hi! I'm calling to ask if you're currently hiring for {EMPLOYMENT_TYPE} {ROLE}."
-                print(f"⚠️ Fallback: {adaptive_text}")
-            
-            # Generate BosonAI audio (will wait as long as needed)
-            print(f"🤖 Generating BosonAI audio (this may take 30-60 seconds)...")
-            print(f"📝 Text: {adaptive_text}")
+                spoken = adaptive_text is not None
             
-            tts_start = __import__('time').time()
-            ai_response = await client.post(
-                f"{BACKEND_B_URL}/generate_audio",
-                json={
-                    "text": adaptive_text,
-                    "voice": "en_woman_1"
-                },
-                timeout=600.0
-            )
-            tts_elapsed = __import__('time').time() - tts_start
-            print(f"⏱️ BosonAI TTS took {tts_elapsed:.2f}s")
-            
-            if ai_response.status_code != 200:
-                error_text = ai_response.text
-                print(f"❌ TTS failed: {error_text}")
-                raise Exception(f"TTS generation failed: {error_text}")
-            
-            audio_data = ai_response.json()
-            audio_filename = audio_data.get('audio_path', '')
-            print(f"✅ Audio file: {audio_filename}")
-            
-            # Copy audio file to static directory
-            import shutil
-            backend_audio_path = os.path.abspath(f"../backend-b/{audio_filename}")
-            static_audio_path = os.path.join(STATIC_DIR, audio_filename)
-            
-            if not os.path.exists(backend_audio_path):
-                print(f"❌ Source not found: {backend_audio_path}")
-                raise Exception(f"Audio file not found: {backend_audio_path}")
-            
-            shutil.copy(backend_audio_path, static_audio_path)
-            print(f"✅ Copied to static")
-            
-            if not os.path.exists(static_audio_path):
-                raise Exception(f"Copy failed: {static_audio_path}")
-            
-            base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
-            audio_url = f"{base_url}/static/{audio_filename}"
+            if not adaptive_text:
+                print(f"🤖 Generating natural response to greeting...")
+                try:
+                    adaptive_response = await post_backend_b(
+                        client,
+                        'llm',
+                        '/generate_conversation_response',
+                        data={
+                            "their_message": greeting,
+                            "business_name": BUSINESS_NAME,
+                            "role": ROLE,
+                            "employment_type": EMPLOYMENT_TYPE,
+                            "location": LOCATION,
+                            "is_first_message": "true"
+                        }
+                    )
+                
+                    if adaptive_response.status_code == 200:
+                        adaptive_data = adaptive_response.json()
+                        adaptive_text = adaptive_data.get("response", "")
+                        print(f"✅ Natural response: {adaptive_text}")
+                    else:
+                        raise Exception(f"Conversation generation failed: {adaptive_response.status_code}")
+                except Exception as e:
+                    print(f"⚠️ LLM unavailable, using fallback: {e}")
+                    # Fallback to simple greeting
+                    adaptive_text = f"Hi! I'm calling to ask if you're currently hiring for {EMPLOYMENT_TYPE} {ROLE}."
+                    print(f"⚠️ Fallback: {adaptive_text}")
             
-            print(f"🔊 Playing BosonAI: {audio_url}")
-            # Add a tiny pause to ensure audio is ready
-            response.pause(length=1)
-            response.play(audio_url)
+            # Speak it in the BosonAI voice (will wait as long as needed in 'play' mode)
+            if not spoken:
+                print(f"🤖 Generating BosonAI audio...")
+                print(f"📝 Text: {adaptive_text}")
+                await speak(client, response, adaptive_text, "opener")
                 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -253,7 +777,29 @@ async def handle_greeting(
     
     return Response(content=str(response), media_type='application/xml')
 
+# Used only while backend-b is unreachable. Phrases are matched on whole words
+# (so "know" is not "no"), multi-word phrases before single words.
+NOT_HIRING_PHRASES = ("not hiring", "no openings", "no positions", "fully staffed", "not at the moment",
+                      "not right now", "not currently", "not at this time")
+HIRING_PHRASES = ("we are hiring", "currently hiring", "always hiring", "still hiring", "looking for",
+                  "positions available", "accepting applications", "apply online")
+
+def keyword_hiring_status(text):
+    """Rough hiring status from what they said, without any model"""
+    words = re.findall(r"[a-z]+", text.lower().replace("n't", " not").replace("'re", " are"))
+    padded = f" {' '.join(words)} "
+    if any(f" {phrase} " in padded for phrase in NOT_HIRING_PHRASES):
+        return "NOT_HIRING", "HIGH"
+    if any(f" {phrase} " in padded for phrase in HIRING_PHRASES):
+        return "HIRING", "HIGH"
+    if {"no", "nope", "nah"} & set(words):
+        return "NOT_HIRING", "MEDIUM"
+    if {"yes", "yeah", "yep", "absolutely", "definitely"} & set(words):
+        return "HIRING", "MEDIUM"
+    return "UNCERTAIN", "LOW"
+
 @app.post("/webhook/hiring-result")
+@traced_webhook('hiring-result')
 async def handle_hiring_response(
     SpeechResult: str = Form(None),
     CallSid: str = Form(None)
@@ -276,8 +822,10 @@ async def handle_hiring_response(
             
             # Use backend-b's AI to analyze hiring status
             try:
-                analysis_response = await client.post(
-                    f"{BACKEND_B_URL}/analyze_hiring_status",
+                analysis_response = await post_backend_b(
+                    client,
+                    'hiring_analysis',
+                    '/analyze_hiring_status',
                     data={"response_text": hiring_response}
                 )
                 
@@ -286,25 +834,13 @@ async def handle_hiring_response(
                     hiring_status = analysis_data.get("status", "UNCERTAIN")
                     confidence = analysis_data.get("confidence", "LOW")
                     details = analysis_data.get("details", "")
-                    print(f"✅ Using AI analysis")
+                    print(f"✅ Using {analysis_data.get('source', 'AI')} analysis")
                 else:
                     raise Exception(f"Backend-b returned {analysis_response.status_code}")
             except Exception as e:
                 # Fallback to simple keyword analysis when LLM is down
                 print(f"⚠️ LLM unavailable, using keyword fallback: {e}")
-                hiring_response_lower = hiring_response.lower()
-                
-                # Check for negative indicators first (more specific)
-                if any(word in hiring_response_lower for word in ["no", "not", "aren't", "we're not", "we are not", "don't", "not hiring", "not currently"]):
-                    hiring_status = "NOT_HIRING"
-                    confidence = "HIGH"
-                # Check for positive indicators
-                elif any(word in hiring_response_lower for word in ["yes", "we are", "we're hiring", "currently hiring", "looking for", "positions available"]):
-                    hiring_status = "HIRING"
-                    confidence = "HIGH"
-                else:
-                    hiring_status = "UNCERTAIN"
-                    confidence = "LOW"
+                hiring_status, confidence = keyword_hiring_status(hiring_response)
                 details = "Keyword-based fallback analysis"
             
             print(f"\n{'='*50}")
@@ -319,69 +855,64 @@ async def handle_hiring_response(
             if hiring_status == "UNCERTAIN":
                 print(f"⚠️ Status uncertain, continuing conversation...")
                 
-                # Generate natural conversational follow-up
-                follow_up_text = None
-                try:
-                    # Get business info from stored call data
-                    business_info = call_results.get(call_sid, {})
-                    follow_up_response = await client.post(
-                        f"{BACKEND_B_URL}/generate_conversation_response",
-                        data={
-                            "their_message": hiring_response,
-                            "business_name": business_info.get('business_name', 'the business'),
-                            "role": business_info.get('role', 'Software Engineer'),
-                            "employment_type": business_info.get('employment_type', 'Full-time'),
-                            "location": business_info.get('location', 'Toronto'),
-                            "is_first_message": "false"
-                        }
+                # Get business info from stored call data
+                business_info = call_store.get(call_sid) or {}
+                
+                # A pre-rendered clarification when they asked what we mean,
+                # otherwise a natural conversational follow-up
+                follow_up_text = prerenderer.clarifying_line(
+                    hiring_response,
+                    business_info.get('role', 'Software Engineer'),
+                    business_info.get('employment_type', 'Full-time'),
+                    business_info.get('location', 'Toronto')
+                )
+                spoken = False
+                if follow_up_text:
+                    print(f"⚡ Pre-rendered follow-up: {follow_up_text}")
+                elif CALL_AUDIO_MODE == 'play':
+                    follow_up_text = await respond_and_speak(
+                        client,
+                        response,
+                        hiring_response,
+                        business_info.get('business_name', 'the business'),
+                        business_info.get('role', 'Software Engineer'),
+                        business_info.get('employment_type', 'Full-time'),
+                        business_info.get('location', 'Toronto')
                     )
+                    spoken = follow_up_text is not None
+                
+                if not follow_up_text:
+                    try:
+                        follow_up_response = await post_backend_b(
+                            client,
+                            'llm',
+                            '/generate_conversation_response',
+                            data={
+                                "their_message": hiring_response,
+                                "business_name": business_info.get('business_name', 'the business'),
+                                "role": business_info.get('role', 'Software Engineer'),
+                                "employment_type": business_info.get('employment_type', 'Full-time'),
+                                "location": business_info.get('location', 'Toronto'),
+                                "is_first_message": "false"
+                            }
+                        )
                     
-                    if follow_up_response.status_code == 200:
-                        follow_up_data = follow_up_response.json()
-                        follow_up_text = follow_up_data.get("response", "")
-                        print(f"✅ Natural follow-up: {follow_up_text}")
-                    else:
-                        raise Exception("Follow-up generation failed")
-                except Exception as e:
-                    print(f"⚠️ LLM unavailable for follow-up: {e}")
-                    # Fallback clarification
-                    follow_up_text = "Are you currently hiring for Software Engineer positions?"
+                        if follow_up_response.status_code == 200:
+                            follow_up_data = follow_up_response.json()
+                            follow_up_text = follow_up_data.get("response", "")
+                            print(f"✅ Natural follow-up: {follow_up_text}")
+                        else:
+                            raise Exception("Follow-up generation failed")
+                    except Exception as e:
+                        print(f"⚠️ LLM unavailable for follow-up: {e}")
+                        # Fallback clarification
+                        follow_up_text = "Are you currently hiring for Software Engineer positions?"
                 
                 # Generate BosonAI follow-up audio
-                print(f"🤖 Generating BosonAI follow-up...")
-                
                 try:
-                    tts_start = __import__('time').time()
-                    follow_up_audio_response = await client.post(
-                        f"{BACKEND_B_URL}/generate_audio",
-                        json={
-                            "text": follow_up_text,
-                            "voice": "en_woman_1"
-                        },
-                        timeout=600.0
-                    )
-                    tts_elapsed = __import__('time').time() - tts_start
-                    print(f"⏱️ Follow-up TTS took {tts_elapsed:.2f}s")
-                    
-                    if follow_up_audio_response.status_code == 200:
-                        audio_data = follow_up_audio_response.json()
-                        audio_filename = audio_data.get('audio_path', '')
-                        
-                        import shutil
-                        backend_audio_path = os.path.abspath(f"../backend-b/{audio_filename}")
-                        static_audio_path = os.path.join(STATIC_DIR, audio_filename)
-                        
-                        if os.path.exists(backend_audio_path):
-                            shutil.copy(backend_audio_path, static_audio_path)
-                            base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
-                            audio_url = f"{base_url}/static/{audio_filename}"
-                            
-                            print(f"🔊 Playing BosonAI follow-up")
-                            response.play(audio_url)
-                        else:
-                            raise Exception("Audio file not found")
-                    else:
-                        raise Exception("TTS generation failed")
+                    if not spoken:
+                        print(f"🤖 Generating BosonAI follow-up...")
+                        await speak(client, response, follow_up_text, "follow-up")
                 except Exception as follow_up_error:
                     print(f"❌ Follow-up error: {follow_up_error}")
                     raise
@@ -403,47 +934,20 @@ async def handle_hiring_response(
             print(f"✅ Clear status determined, ending call...")
             
             # Store the final result
-            if call_sid and call_sid in call_results:
-                call_results[call_sid]['hiring_status'] = hiring_status
-                call_results[call_sid]['status'] = 'COMPLETED'
-                call_results[call_sid]['completed_at'] = datetime.now().isoformat()
+            if update_call(
+                call_sid,
+                from_statuses=ACTIVE_STATUSES,
+                hiring_status=hiring_status,
+                status='COMPLETED',
+                completed_at=datetime.now().isoformat()
+            ):
                 print(f"💾 Stored result for {call_sid}: {hiring_status}")
             
             # Generate BosonAI thank you audio
             print(f"🤖 Generating BosonAI thank you...")
             
             try:
-                tts_start = __import__('time').time()
-                thank_you_response = await client.post(
-                    f"{BACKEND_B_URL}/generate_audio",
-                    json={
-                        "text": "Thank you so much for your time. Have a great day!",
-                        "voice": "en_woman_1"
-                    },
-                    timeout=600.0
-                )
-                tts_elapsed = __import__('time').time() - tts_start
-                print(f"⏱️ Thank you TTS took {tts_elapsed:.2f}s")
-                
-                if thank_you_response.status_code == 200:
-                    audio_data = thank_you_response.json()
-                    audio_filename = audio_data.get('audio_path', '')
-                    
-                    import shutil
-                    backend_audio_path = os.path.abspath(f"../backend-b/{audio_filename}")
-                    static_audio_path = os.path.join(STATIC_DIR, audio_filename)
-                    
-                    if os.path.exists(backend_audio_path):
-                        shutil.copy(backend_audio_path, static_audio_path)
-                        base_url = os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')
-                        audio_url = f"{base_url}/static/{audio_filename}"
-                        
-                        print(f"🔊 Playing BosonAI thank you")
-                        response.play(audio_url)
-                    else:
-                        raise Exception("Audio file not found")
-                else:
-                    raise Exception("TTS generation failed")
+                await speak(client, response, "Thank you so much for your time. Have a great day!", "thank you")
             except Exception as thank_you_error:
                 print(f"❌ Thank you error: {thank_you_error}")
                 raise
@@ -462,15 +966,10 @@ async def handle_hiring_response(
 async def health():
     return {'status': 'ok'}
 
-@app.get("/test-static")
-async def test_static():
-    """Test if static files are accessible"""
-    static_files = os.listdir(STATIC_DIR) if os.path.exists(STATIC_DIR) else []
-    return {
-        'static_dir': STATIC_DIR,
-        'files': static_files,
-        'example_url': f"{os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8002')}/static/output_audio.wav"
-    }
+@app.get("/audio-store")
+async def audio_store_stats():
+    """Clips currently held for Twilio playback"""
+    return audio_store.stats()
 
 if __name__ == '__main__':
     import uvicorn
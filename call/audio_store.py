@@ -0,0 +1,60 @@
+import threading, time
+from collections import OrderedDict
+
+
+class AudioStore:
+    """Bounded in-memory store of the audio clips Twilio is about to <Play>.
+
+    Clips are kept by id until they are older than `ttl` seconds or the total
+    exceeds `max_bytes`, oldest first. Nothing is written to disk.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=900):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clips = OrderedDict()  # id -> (bytes, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, audio_id, data):
+        with self._lock:
+            old = self._clips.pop(audio_id, None)
+            if old:
+                self._bytes -= len(old[0])
+            self._clips[audio_id] = (data, time.monotonic())
+            self._bytes += len(data)
+            self._collect()
+
+    def get(self, audio_id):
+        with self._lock:
+            self._collect()
+            clip = self._clips.get(audio_id)
+            if clip is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return clip[0]
+
+    def _collect(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._clips:
+            audio_id, (data, stored_at) = next(iter(self._clips.items()))
+            if stored_at >= cutoff and self._bytes <= self.max_bytes:
+                break
+            del self._clips[audio_id]
+            self._bytes -= len(data)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clips": len(self._clips),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
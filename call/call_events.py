@@ -0,0 +1,99 @@
+import asyncio, json
+
+
+class CallEventBus:
+    """Fan-out of call state changes to Server-Sent Events subscribers.
+
+    Events live in the call store's event log (see call_store.py), numbered
+    in commit order. Each worker tails the log, woken immediately by its own
+    writes and polling for other workers', and pushes new events to its
+    subscribers. A client that reconnects with Last-Event-ID gets exactly
+    what it missed from the log; if the log no longer reaches back that far,
+    it gets the latest state of each live call instead.
+    """
+
+    def __init__(self, store, poll_interval=0.5, subscriber_queue_size=1000):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self.last_id = 0
+        self._subscribers = set()
+        self._wakeup = asyncio.Event()
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    def notify(self):
+        """Call after writing to the store so local subscribers don't wait for the next poll."""
+        self._wakeup.set()
+
+    async def run(self):
+        """Tail the store's event log forever; start once per worker."""
+        latest = self.store.latest_events()
+        self.last_id = latest[-1]["id"] if latest else 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                events = self.store.events_since(self.last_id)
+            except Exception as e:
+                print(f"⚠️ Reading call events failed: {e}")
+                continue
+            for event in events:
+                self._deliver(event)
+                self.last_id = event["id"]
+            if events:
+                self._wakeup.set()  # there may be more than one batch
+
+    def _deliver(self, event):
+        self.delivered += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow to keep up: cut it off, it will resume from its Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                self.dropped_subscribers += 1
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def replay(self, last_event_id=None, call_sids=None):
+        """Events a (re)connecting client should see before live ones, oldest first."""
+        oldest = self.store.oldest_event_id()
+        if last_event_id is not None and oldest is not None and oldest <= last_event_id + 1:
+            events = []
+            while True:
+                batch = self.store.events_since(events[-1]["id"] if events else last_event_id)
+                if not batch:
+                    break
+                events += batch
+        else:
+            # Fresh connection, or the log no longer reaches back far enough
+            events = self.store.latest_events()
+            if last_event_id is not None:
+                events = [event for event in events if event["id"] > last_event_id]
+        return [event for event in events if not call_sids or event["call_sid"] in call_sids]
+
+    def stats(self):
+        return {
+            "last_event_id": self.last_id,
+            "delivered": self.delivered,
+            "subscribers": len(self._subscribers),
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+def format_sse(event):
+    data = json.dumps({"call_sid": event["call_sid"], **event["call"]})
+    return f"id: {event['id']}\nevent: call\ndata: {data}\n\n"
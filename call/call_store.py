@@ -0,0 +1,677 @@
+import itertools, json, os, sqlite3, threading, time
+from collections import OrderedDict, deque
+
+CALL_STORE = os.getenv("CALL_STORE", "sqlite")  # "sqlite" or "memory" (single worker only)
+CALL_STORE_PATH = os.getenv("CALL_STORE_PATH", os.path.join(os.path.dirname(__file__), "call_state.db"))
+# Seconds a write waits for another worker's lock. Store calls run on the event
+# loop, so a long wait would stall every request on the worker; writes take
+# milliseconds, so hitting this means something is wrong and the write fails.
+CALL_STORE_BUSY_TIMEOUT = float(os.getenv("CALL_STORE_BUSY_TIMEOUT", "0.5"))
+CALL_ARCHIVE_MAX = int(os.getenv("CALL_ARCHIVE_MAX", "10000"))  # archived calls kept; the oldest go first
+STALE_STATUS = "TIMED_OUT"  # what an active call that stopped hearing from Twilio is archived as
+
+
+def _event(event_id, call_sid, created_at, call):
+    return {"id": event_id, "call_sid": call_sid, "time": created_at, "call": call}
+
+
+def _settle_campaign_call(call, tracked, finished_statuses, timeout, now):
+    """The fields that settle a dialing/live campaign call, or None while it's still going"""
+    if tracked and tracked.get("status") in finished_statuses:
+        return {"state": "finished", "status": tracked["status"], "hiring_status": tracked.get("hiring_status")}
+    if now - (call.get("dialed_at") or now) > timeout:
+        return {"state": "finished", "status": "TIMED_OUT"}
+    return None
+
+
+class MemoryCallStore:
+    """In-process call store. Same interface as SqliteCallStore, but lost on
+    restart and invisible to other workers, so only for local development.
+    """
+
+    def __init__(self, event_buffer=1000, max_archived=CALL_ARCHIVE_MAX):
+        self.max_archived = max_archived
+        self._calls = {}
+        self._archive = OrderedDict()
+        self._updated_at = {}
+        self._ids = itertools.count(1)
+        self._events = deque(maxlen=event_buffer)
+        self._latest = {}  # call_sid -> last event for that call
+        self._spans = {}  # call_sid -> timeline spans
+        self._ready_lines = {}  # key -> when it was rendered
+        self._campaigns = {}  # campaign id -> campaign dict with its "calls"
+        self._leases = {}  # name -> (owner, expires at)
+        self._lock = threading.Lock()
+
+    def _append_event(self, call_sid):
+        event = _event(next(self._ids), call_sid, time.time(), dict(self._calls[call_sid]))
+        self._events.append(event)
+        self._latest[call_sid] = event
+        return event
+
+    def create(self, call_sid, call):
+        """Start tracking a call; returns its first event, or None if the SID is already known."""
+        with self._lock:
+            if call_sid in self._calls or call_sid in self._archive:
+                return None
+            self._calls[call_sid] = dict(call)
+            self._updated_at[call_sid] = time.time()
+            return self._append_event(call_sid)
+
+    def get(self, call_sid):
+        with self._lock:
+            call = self._calls.get(call_sid) or self._archive.get(call_sid)
+            return dict(call) if call else None
+
+    def update(self, call_sid, fields, from_statuses=None):
+        """Merge `fields` into a live call, only if its status is in `from_statuses` (when given).
+
+        Returns the resulting event, or None if the call is unknown or in another status.
+        """
+        with self._lock:
+            call = self._calls.get(call_sid)
+            if call is None or (from_statuses and call.get("status") not in from_statuses):
+                return None
+            call.update(fields)
+            self._updated_at[call_sid] = time.time()
+            return self._append_event(call_sid)
+
+    def add_spans(self, call_sid, spans, limit=None):
+        """Add timed spans to a live call's timeline, keeping the last `limit`; False if the call isn't live.
+
+        The timeline is kept apart from the call's record, so adding to it is
+        not a change of the call and /call-events subscribers never see it.
+        """
+        with self._lock:
+            if call_sid not in self._calls:
+                return False
+            timeline = self._spans.setdefault(call_sid, [])
+            timeline.extend(spans)
+            if limit:
+                del timeline[:-limit]
+            return True
+
+    def spans(self, call_sid):
+        with self._lock:
+            return list(self._spans.get(call_sid, []))
+
+    def list(self, status=None, limit=100):
+        with self._lock:
+            calls = [
+                {"call_sid": call_sid, **call} for call_sid, call in self._calls.items()
+                if status is None or call.get("status") == status
+            ]
+        return calls[-limit:]
+
+    def events_since(self, after_id, limit=500):
+        with self._lock:
+            return [event for event in self._events if event["id"] > after_id][:limit]
+
+    def oldest_event_id(self):
+        with self._lock:
+            return self._events[0]["id"] if self._events else None
+
+    def latest_events(self):
+        with self._lock:
+            return sorted(self._latest.values(), key=lambda event: event["id"])
+
+    def archive(self, statuses, older_than, active_statuses=(), stale_after=None):
+        """Move calls in a finished status, untouched for `older_than` seconds, out of the live set.
+
+        Calls in an active status untouched for `stale_after` seconds never got
+        their final status callback; they are archived as STALE_STATUS.
+        """
+        now = time.time()
+        cutoff = now - older_than
+        stale_cutoff = now - stale_after if stale_after is not None else None
+        with self._lock:
+            done = []
+            for call_sid, call in self._calls.items():
+                updated_at = self._updated_at[call_sid]
+                if call.get("status") in statuses and updated_at < cutoff:
+                    done.append(call_sid)
+                elif stale_cutoff is not None and call.get("status") in active_statuses and updated_at < stale_cutoff:
+                    call["status"] = STALE_STATUS
+                    done.append(call_sid)
+            for call_sid in done:
+                self._archive[call_sid] = self._calls.pop(call_sid)
+                self._updated_at.pop(call_sid)
+                self._latest.pop(call_sid, None)
+            while len(self._archive) > self.max_archived:
+                call_sid, _ = self._archive.popitem(last=False)
+                self._spans.pop(call_sid, None)
+        return len(done)
+
+    def add_ready_lines(self, keys, max_age):
+        """Record pre-rendered lines as being in backend-b's TTS cache, forgetting any older than `max_age`"""
+        now = time.time()
+        with self._lock:
+            self._ready_lines.update((key, now) for key in keys)
+            for key, ready_at in list(self._ready_lines.items()):
+                if ready_at < now - max_age:
+                    del self._ready_lines[key]
+
+    def ready_lines(self, keys, max_age):
+        """When each of `keys` recorded by add_ready_lines within `max_age` seconds was rendered"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            return {key: self._ready_lines[key] for key in keys if self._ready_lines.get(key, 0) >= cutoff}
+
+    def add_campaign(self, campaign, calls):
+        """Store a new campaign and its calls (dicts with the business fields and a "state")"""
+        with self._lock:
+            self._campaigns[campaign["id"]] = {**campaign, "calls": [dict(call) for call in calls]}
+
+    def get_campaign(self, campaign_id):
+        """The campaign with all its calls, or None"""
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            return {**campaign, "calls": [dict(call) for call in campaign["calls"]]} if campaign else None
+
+    def list_campaigns(self):
+        """Every campaign, oldest first, with a count of its calls per state instead of the calls"""
+        with self._lock:
+            campaigns = []
+            for campaign in self._campaigns.values():
+                counts = {}
+                for call in campaign["calls"]:
+                    counts[call["state"]] = counts.get(call["state"], 0) + 1
+                campaigns.append({**{k: v for k, v in campaign.items() if k != "calls"}, "counts": counts})
+        return campaigns
+
+    def set_campaign_paused(self, campaign_id, paused):
+        """Returns False if there is no such campaign"""
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign is None:
+                return False
+            campaign["paused"] = paused
+            return True
+
+    def claim_campaign_call(self):
+        """Mark the best queued call of an unpaused campaign as dialing; returns (campaign id, index, call) or None.
+
+        Higher priority (the campaign's plus the business's) goes first, then older campaigns.
+        """
+        with self._lock:
+            best = None
+            for campaign in self._campaigns.values():
+                if campaign["paused"]:
+                    continue
+                for index, call in enumerate(campaign["calls"]):
+                    rank = (-(campaign["priority"] + call.get("priority", 0)), campaign["created_at"], index)
+                    if call["state"] == "queued" and (best is None or rank < best[0]):
+                        best = (rank, campaign, index)
+            if best is None:
+                return None
+            _, campaign, index = best
+            call = campaign["calls"][index]
+            call.update(state="dialing", dialed_at=time.time())
+            return campaign["id"], index, dict(call)
+
+    def update_campaign_call(self, campaign_id, index, fields):
+        with self._lock:
+            self._campaigns[campaign_id]["calls"][index].update(fields)
+
+    def settle_campaign_calls(self, finished_statuses, timeout):
+        """Finish dialing/live campaign calls whose call has finished, or that started over `timeout` s ago"""
+        now = time.time()
+        settled = 0
+        with self._lock:
+            for campaign in self._campaigns.values():
+                for call in campaign["calls"]:
+                    if call["state"] not in ("dialing", "live"):
+                        continue
+                    tracked = self._calls.get(call.get("call_sid")) or self._archive.get(call.get("call_sid"))
+                    fields = _settle_campaign_call(call, tracked, finished_statuses, timeout, now)
+                    if fields:
+                        call.update(fields)
+                        settled += 1
+        return settled
+
+    def campaign_call_counts(self):
+        """Campaign calls per state, across every campaign"""
+        counts = {}
+        with self._lock:
+            for campaign in self._campaigns.values():
+                for call in campaign["calls"]:
+                    counts[call["state"]] = counts.get(call["state"], 0) + 1
+        return counts
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew the lease `name` for `ttl` seconds; False while someone else holds it"""
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+    def stats(self):
+        with self._lock:
+            by_status = {}
+            for call in self._calls.values():
+                by_status[call.get("status")] = by_status.get(call.get("status"), 0) + 1
+            return {"backend": "memory", "live": len(self._calls), "archived": len(self._archive),
+                    "by_status": by_status, "events": len(self._events)}
+
+
+class SqliteCallStore:
+    """Call state in a WAL-mode sqlite file shared by every worker on the host.
+
+    Each write also appends to an event log, whose autoincrement ids give one
+    global order that every worker's /call-events stream follows. Status
+    changes happen inside BEGIN IMMEDIATE, so two webhooks racing for the same
+    call cannot both win a transition.
+    """
+
+    def __init__(self, db_path=CALL_STORE_PATH, busy_timeout=CALL_STORE_BUSY_TIMEOUT, max_archived=CALL_ARCHIVE_MAX):
+        self.db_path = db_path
+        self.max_archived = max_archived
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=busy_timeout)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS calls (
+                call_sid TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL,
+                created_at REAL NOT NULL, updated_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS calls_status ON calls (status, updated_at);
+            CREATE TABLE IF NOT EXISTS calls_archive (
+                call_sid TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL,
+                created_at REAL NOT NULL, updated_at REAL NOT NULL, archived_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS calls_archive_age ON calls_archive (archived_at);
+            CREATE TABLE IF NOT EXISTS call_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, call_sid TEXT NOT NULL,
+                created_at REAL NOT NULL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS call_events_sid ON call_events (call_sid, id);
+            CREATE TABLE IF NOT EXISTS call_spans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, call_sid TEXT NOT NULL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS call_spans_sid ON call_spans (call_sid, id);
+            CREATE TABLE IF NOT EXISTS ready_lines (key TEXT PRIMARY KEY, ready_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ready_lines_age ON ready_lines (ready_at);
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, priority INTEGER NOT NULL,
+                paused INTEGER NOT NULL, created_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS campaign_calls (
+                campaign_id TEXT NOT NULL, idx INTEGER NOT NULL, priority INTEGER NOT NULL, state TEXT NOT NULL,
+                call_sid TEXT, dialed_at REAL, data TEXT NOT NULL, PRIMARY KEY (campaign_id, idx));
+            CREATE INDEX IF NOT EXISTS campaign_calls_state ON campaign_calls (state, priority);
+            CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+        """)
+
+    def _one(self, query, params=()):
+        # Always drain the cursor: a half-read SELECT keeps its read transaction,
+        # and with it a stale snapshot that never sees other workers' writes
+        rows = self._db.execute(query, params).fetchall()
+        return rows[0] if rows else None
+
+    def _append_event(self, call_sid, call, now):
+        data = json.dumps(call)
+        cursor = self._db.execute(
+            "INSERT INTO call_events (call_sid, created_at, data) VALUES (?, ?, ?)", (call_sid, now, data)
+        )
+        return _event(cursor.lastrowid, call_sid, now, call)
+
+    def create(self, call_sid, call):
+        """Start tracking a call; returns its first event, or None if the SID is already known."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                known = self._one(
+                    "SELECT 1 FROM calls WHERE call_sid = ? UNION ALL SELECT 1 FROM calls_archive WHERE call_sid = ?",
+                    (call_sid, call_sid),
+                )
+                if known:
+                    self._db.execute("ROLLBACK")
+                    return None
+                self._db.execute(
+                    "INSERT INTO calls VALUES (?, ?, ?, ?, ?)",
+                    (call_sid, call.get("status", ""), json.dumps(call), now, now),
+                )
+                event = self._append_event(call_sid, call, now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return event
+
+    def get(self, call_sid):
+        with self._lock:
+            row = self._one(
+                "SELECT data FROM calls WHERE call_sid = ? UNION ALL SELECT data FROM calls_archive WHERE call_sid = ?",
+                (call_sid, call_sid),
+            )
+        return json.loads(row[0]) if row else None
+
+    def update(self, call_sid, fields, from_statuses=None):
+        """Merge `fields` into a live call, only if its status is in `from_statuses` (when given).
+
+        Returns the resulting event, or None if the call is unknown or in another status.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._one("SELECT status, data FROM calls WHERE call_sid = ?", (call_sid,))
+                if row is None or (from_statuses and row[0] not in from_statuses):
+                    self._db.execute("ROLLBACK")
+                    return None
+                call = {**json.loads(row[1]), **fields}
+                self._db.execute(
+                    "UPDATE calls SET status = ?, data = ?, updated_at = ? WHERE call_sid = ?",
+                    (call.get("status", ""), json.dumps(call), now, call_sid),
+                )
+                event = self._append_event(call_sid, call, now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return event
+
+    def add_spans(self, call_sid, spans, limit=None):
+        """Add timed spans to a live call's timeline, keeping the last `limit`; False if the call isn't live.
+
+        Spans have their own table: adding them doesn't rewrite the call's
+        record or add to the event log, so /call-events only carries changes
+        of the call itself.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._one("SELECT 1 FROM calls WHERE call_sid = ?", (call_sid,)) is None:
+                    self._db.execute("ROLLBACK")
+                    return False
+                self._db.executemany(
+                    "INSERT INTO call_spans (call_sid, data) VALUES (?, ?)", [(call_sid, json.dumps(span)) for span in spans]
+                )
+                if limit:
+                    self._db.execute(
+                        "DELETE FROM call_spans WHERE call_sid = ? AND id NOT IN "
+                        "(SELECT id FROM call_spans WHERE call_sid = ? ORDER BY id DESC LIMIT ?)",
+                        (call_sid, call_sid, limit),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+
+    def spans(self, call_sid):
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM call_spans WHERE call_sid = ? ORDER BY id", (call_sid,)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def list(self, status=None, limit=100):
+        query = "SELECT call_sid, data FROM calls"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY updated_at DESC LIMIT ?", params + (limit,)).fetchall()
+        return [{"call_sid": call_sid, **json.loads(data)} for call_sid, data in reversed(rows)]
+
+    def events_since(self, after_id, limit=500):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, call_sid, created_at, data FROM call_events WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [_event(event_id, call_sid, created_at, json.loads(data)) for event_id, call_sid, created_at, data in rows]
+
+    def oldest_event_id(self):
+        with self._lock:
+            return self._one("SELECT MIN(id) FROM call_events")[0]
+
+    def latest_events(self):
+        """The newest event of every live call."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT e.id, e.call_sid, e.created_at, e.data FROM call_events e "
+                "JOIN (SELECT call_sid, MAX(id) AS id FROM call_events GROUP BY call_sid) last ON last.id = e.id "
+                "JOIN calls c ON c.call_sid = e.call_sid ORDER BY e.id"
+            ).fetchall()
+        return [_event(event_id, call_sid, created_at, json.loads(data)) for event_id, call_sid, created_at, data in rows]
+
+    def archive(self, statuses, older_than, active_statuses=(), stale_after=None):
+        """Move calls in a finished status, untouched for `older_than` seconds, to calls_archive.
+
+        Calls in an active status untouched for `stale_after` seconds never got
+        their final status callback; they are archived as STALE_STATUS. Their
+        events go too, along with any other event older than the cutoff, and
+        calls_archive is trimmed to the newest `max_archived` calls.
+        """
+        now = time.time()
+        cutoff = now - older_than
+        marks = ",".join("?" for _ in statuses)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if stale_after is not None and active_statuses:
+                    active_marks = ",".join("?" for _ in active_statuses)
+                    self._db.execute(
+                        "UPDATE calls SET status = ?, data = json_set(data, '$.status', ?) "
+                        f"WHERE status IN ({active_marks}) AND updated_at < ?",
+                        (STALE_STATUS, STALE_STATUS, *active_statuses, now - stale_after),
+                    )
+                done = f"(status IN ({marks}) AND updated_at < ?) OR status = ?"
+                moved = self._db.execute(
+                    "INSERT OR REPLACE INTO calls_archive SELECT call_sid, status, data, created_at, updated_at, ? "
+                    f"FROM calls WHERE {done}",
+                    (now, *statuses, cutoff, STALE_STATUS),
+                ).rowcount
+                self._db.execute(f"DELETE FROM calls WHERE {done}", (*statuses, cutoff, STALE_STATUS))
+                self._db.execute(
+                    "DELETE FROM call_events WHERE created_at < ? OR call_sid NOT IN (SELECT call_sid FROM calls)",
+                    (cutoff,),
+                )
+                expired = [row[0] for row in self._db.execute(
+                    "SELECT call_sid FROM calls_archive ORDER BY archived_at DESC LIMIT -1 OFFSET ?",
+                    (self.max_archived,),
+                ).fetchall()]
+                self._db.executemany("DELETE FROM calls_archive WHERE call_sid = ?", [(sid,) for sid in expired])
+                self._db.executemany("DELETE FROM call_spans WHERE call_sid = ?", [(sid,) for sid in expired])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return moved
+
+    def add_ready_lines(self, keys, max_age):
+        """Record pre-rendered lines as being in backend-b's TTS cache for every worker,
+        forgetting any older than `max_age`"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO ready_lines VALUES (?, ?)", [(key, now) for key in keys])
+            self._db.execute("DELETE FROM ready_lines WHERE ready_at < ?", (now - max_age,))
+
+    def ready_lines(self, keys, max_age):
+        """When each of `keys` recorded by add_ready_lines within `max_age` seconds, by any worker, was rendered"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        marks = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, ready_at FROM ready_lines WHERE key IN ({marks}) AND ready_at >= ?",
+                (*keys, time.time() - max_age),
+            ).fetchall()
+        return dict(rows)
+
+    def add_campaign(self, campaign, calls):
+        """Store a new campaign and its calls (dicts with the business fields and a "state")"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO campaigns VALUES (?, ?, ?, ?, ?)",
+                    (campaign["id"], campaign["name"], campaign["priority"], int(campaign["paused"]), campaign["created_at"]),
+                )
+                self._db.executemany(
+                    "INSERT INTO campaign_calls VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+                    [(campaign["id"], index, campaign["priority"] + call.get("priority", 0), call["state"], json.dumps(call))
+                     for index, call in enumerate(calls)],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _campaign(row):
+        campaign_id, name, priority, paused, created_at = row
+        return {"id": campaign_id, "name": name, "priority": priority, "paused": bool(paused), "created_at": created_at}
+
+    @staticmethod
+    def _campaign_call(state, call_sid, dialed_at, data):
+        return {**json.loads(data), "state": state, "call_sid": call_sid, "dialed_at": dialed_at}
+
+    def get_campaign(self, campaign_id):
+        """The campaign with all its calls, or None"""
+        with self._lock:
+            row = self._one("SELECT id, name, priority, paused, created_at FROM campaigns WHERE id = ?", (campaign_id,))
+            if row is None:
+                return None
+            calls = self._db.execute(
+                "SELECT state, call_sid, dialed_at, data FROM campaign_calls WHERE campaign_id = ? ORDER BY idx",
+                (campaign_id,),
+            ).fetchall()
+        return {**self._campaign(row), "calls": [self._campaign_call(*call) for call in calls]}
+
+    def list_campaigns(self):
+        """Every campaign, oldest first, with a count of its calls per state instead of the calls"""
+        with self._lock:
+            rows = self._db.execute("SELECT id, name, priority, paused, created_at FROM campaigns ORDER BY created_at").fetchall()
+            counts = self._db.execute("SELECT campaign_id, state, COUNT(*) FROM campaign_calls GROUP BY campaign_id, state").fetchall()
+        campaigns = {row[0]: {**self._campaign(row), "counts": {}} for row in rows}
+        for campaign_id, state, count in counts:
+            if campaign_id in campaigns:
+                campaigns[campaign_id]["counts"][state] = count
+        return list(campaigns.values())
+
+    def set_campaign_paused(self, campaign_id, paused):
+        """Returns False if there is no such campaign"""
+        with self._lock:
+            return self._db.execute("UPDATE campaigns SET paused = ? WHERE id = ?", (int(paused), campaign_id)).rowcount > 0
+
+    def claim_campaign_call(self):
+        """Mark the best queued call of an unpaused campaign as dialing; returns (campaign id, index, call) or None.
+
+        Higher priority (the campaign's plus the business's) goes first, then older campaigns.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._one(
+                    "SELECT cc.campaign_id, cc.idx, cc.call_sid, cc.data FROM campaign_calls cc "
+                    "JOIN campaigns c ON c.id = cc.campaign_id WHERE cc.state = 'queued' AND c.paused = 0 "
+                    "ORDER BY cc.priority DESC, c.created_at, cc.idx LIMIT 1"
+                )
+                if row is None:
+                    self._db.execute("ROLLBACK")
+                    return None
+                campaign_id, index, call_sid, data = row
+                self._db.execute(
+                    "UPDATE campaign_calls SET state = 'dialing', dialed_at = ? WHERE campaign_id = ? AND idx = ?",
+                    (now, campaign_id, index),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return campaign_id, index, self._campaign_call("dialing", call_sid, now, data)
+
+    def update_campaign_call(self, campaign_id, index, fields):
+        fields = dict(fields)
+        columns = {column: fields.pop(column) for column in ("state", "call_sid", "dialed_at") if column in fields}
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._one("SELECT data FROM campaign_calls WHERE campaign_id = ? AND idx = ?", (campaign_id, index))
+                if row is not None:
+                    columns["data"] = json.dumps({**json.loads(row[0]), **fields})
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    self._db.execute(
+                        f"UPDATE campaign_calls SET {assignments} WHERE campaign_id = ? AND idx = ?",
+                        (*columns.values(), campaign_id, index),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def settle_campaign_calls(self, finished_statuses, timeout):
+        """Finish dialing/live campaign calls whose call has finished, or that started over `timeout` s ago"""
+        now = time.time()
+        settled = 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT campaign_id, idx, state, call_sid, dialed_at, data FROM campaign_calls "
+                    "WHERE state IN ('dialing', 'live')"
+                ).fetchall()
+                for campaign_id, index, state, call_sid, dialed_at, data in rows:
+                    tracked = call_sid and self._one(
+                        "SELECT data FROM calls WHERE call_sid = ? UNION ALL SELECT data FROM calls_archive WHERE call_sid = ?",
+                        (call_sid, call_sid),
+                    )
+                    call = self._campaign_call(state, call_sid, dialed_at, data)
+                    fields = _settle_campaign_call(call, tracked and json.loads(tracked[0]), finished_statuses, timeout, now)
+                    if fields:
+                        state = fields.pop("state")
+                        self._db.execute(
+                            "UPDATE campaign_calls SET state = ?, data = ? WHERE campaign_id = ? AND idx = ?",
+                            (state, json.dumps({**json.loads(data), **fields}), campaign_id, index),
+                        )
+                        settled += 1
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return settled
+
+    def campaign_call_counts(self):
+        """Campaign calls per state, across every campaign"""
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM campaign_calls GROUP BY state").fetchall())
+
+    def acquire_lease(self, name, owner, ttl):
+        """Take or renew the lease `name` for `ttl` seconds; False while another worker holds it"""
+        now = time.time()
+        with self._lock:
+            return self._db.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE "
+                "SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now),
+            ).rowcount > 0
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def stats(self):
+        with self._lock:
+            by_status = dict(self._db.execute("SELECT status, COUNT(*) FROM calls GROUP BY status").fetchall())
+            archived = self._one("SELECT COUNT(*) FROM calls_archive")[0]
+            events = self._one("SELECT COUNT(*) FROM call_events")[0]
+        return {"backend": "sqlite", "live": sum(by_status.values()), "archived": archived,
+                "by_status": by_status, "events": events}
+
+
+def open_call_store(kind=CALL_STORE, path=CALL_STORE_PATH):
+    if kind == "memory":
+        return MemoryCallStore()
+    if kind == "sqlite":
+        return SqliteCallStore(path)
+    raise ValueError(f"Unknown CALL_STORE: {kind}")
@@ -0,0 +1,83 @@
+import contextvars, re, time
+from contextlib import contextmanager
+from metrics import record_stage
+
+_current = contextvars.ContextVar("call_trace", default=None)
+
+
+def parse_server_timing(header):
+    """{"tts": 812.3, ...} from a Server-Timing header (durations in ms)"""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        duration = re.search(r"\bdur=([\d.]+)", params)
+        if name and duration:
+            timings[name] = float(duration.group(1))
+    return timings
+
+
+class CallTrace:
+    """Timed stages of one request about a call: a Twilio webhook or a media stream.
+
+    Used as a context manager, it times the request as a whole (the root
+    span, named `name`) and becomes the current trace, so stage() anywhere
+    below it adds spans to it. Every stage is also observed in the
+    call_stage_seconds histogram, traced or not. On exit, however it exits,
+    `on_finish` is called with the trace, to save `spans` to the call.
+    """
+
+    def __init__(self, call_sid, name, budget=None, on_finish=None, **detail):
+        self.call_sid = call_sid
+        self.name = name
+        self.budget = budget  # seconds; the root span is flagged when it runs over
+        self.on_finish = on_finish
+        self.detail = detail
+        self.spans = []
+        self._root = None
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._root = _start_span(self.name, self.detail)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        span, started = self._root
+        if self.budget is not None:
+            span["over_budget"] = time.perf_counter() - started > self.budget
+        _finish_span(self.name, span, started, exc)
+        self.spans.insert(0, span)
+        if self.on_finish:
+            self.on_finish(self)
+        return False
+
+
+def _start_span(stage, detail):
+    return {"stage": stage, "at": round(time.time(), 3), **detail}, time.perf_counter()
+
+
+def _finish_span(stage, span, started, error=None):
+    elapsed = time.perf_counter() - started
+    record_stage(stage, elapsed, error is not None)
+    span["ms"] = round(1000 * elapsed, 1)
+    span["ok"] = error is None
+    if error is not None:
+        span["error"] = str(error)[:200]
+
+
+@contextmanager
+def stage(name, **detail):
+    """Time a stage of the current call; yields the span so callers can add detail"""
+    trace = _current.get()
+    span, started = _start_span(name, detail)
+    try:
+        yield span
+    except BaseException as e:
+        _finish_span(name, span, started, e)
+        raise
+    else:
+        _finish_span(name, span, started, span.pop("error", None))
+    finally:
+        if trace is not None:
+            trace.spans.append(span)
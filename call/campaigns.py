@@ -0,0 +1,164 @@
+import asyncio, os, socket, sys, time, uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # repo root, for shared/
+from shared.rate_limit import TokenBucket
+
+
+def campaign_summary(campaign):
+    """Progress of a campaign from the store, which carries either its "calls" or their "counts" per state"""
+    counts = campaign.get("counts")
+    if counts is None:
+        counts = {}
+        for call in campaign["calls"]:
+            counts[call["state"]] = counts.get(call["state"], 0) + 1
+    total = sum(counts.values())
+    done = counts.get("finished", 0) + counts.get("failed", 0)
+    if done == total:
+        status = "DONE"
+    else:
+        status = "PAUSED" if campaign["paused"] else "RUNNING"
+    return {
+        "id": campaign["id"],
+        "name": campaign["name"],
+        "status": status,
+        "priority": campaign["priority"],
+        "total": total,
+        "progress": round(done / total, 3) if total else 1.0,
+        "counts": counts,
+        "created_at": campaign["created_at"],
+    }
+
+
+class CampaignDialer:
+    """Dials campaign businesses in priority order within Twilio's limits.
+
+    Campaigns and their calls are kept in the call store, so any worker can
+    create, show, pause or resume them. Every worker runs the dialer, but only
+    the one holding the store's lease dials; if that worker dies, another
+    takes over once the lease expires. So the limits hold across workers: at
+    most `max_concurrent` calls are live at once, and new calls start no
+    faster than `cps` per second. A call's slot is freed when its call
+    reaches a finished status in the store, or after `call_timeout` seconds
+    if no status callback ever arrives.
+    """
+
+    LEASE = "campaign-dialer"
+
+    def __init__(self, place_call, store, events, finished_statuses, max_concurrent=5, cps=1.0, call_timeout=900,
+                 lease_ttl=15, poll_interval=1.0):
+        self.place_call = place_call
+        self.store = store
+        self.events = events
+        self.finished_statuses = set(finished_statuses)
+        self.max_concurrent = max_concurrent
+        self.call_timeout = call_timeout
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval  # how soon campaigns created on other workers are picked up
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.leader = False
+        self._dials = set()  # strong refs so in-flight dials aren't garbage collected
+        self._cps = TokenBucket(cps, capacity=1)  # no bursts: Twilio counts calls per second
+        self._wakeup = asyncio.Event()
+
+    def add_campaign(self, name, businesses, priority=0):
+        """Queue a campaign; `businesses` are dicts with phone_number, business_name and optional priority."""
+        seen, calls = set(), []
+        for business in businesses:
+            if business["phone_number"] in seen:
+                continue
+            seen.add(business["phone_number"])
+            calls.append({**business, "state": "queued", "call_sid": None, "status": None})
+
+        campaign = {"id": uuid.uuid4().hex[:12], "name": name, "priority": priority, "paused": False, "created_at": time.time()}
+        self.store.add_campaign(campaign, calls)
+        self._wakeup.set()
+        return {**campaign, "calls": calls}
+
+    def get(self, campaign_id):
+        """The campaign with its calls, or None"""
+        return self.store.get_campaign(campaign_id)
+
+    def list(self):
+        return self.store.list_campaigns()
+
+    def pause(self, campaign_id):
+        """Stop starting calls for the campaign; False if there is no such campaign"""
+        return self.store.set_campaign_paused(campaign_id, True)
+
+    def resume(self, campaign_id):
+        resumed = self.store.set_campaign_paused(campaign_id, False)
+        self._wakeup.set()
+        return resumed
+
+    async def run(self):
+        """Dial whenever this worker holds the lease and a slot is free; start once in every worker."""
+        watcher = asyncio.create_task(self._watch_calls())
+        try:
+            while True:
+                self.leader = self.store.acquire_lease(self.LEASE, self.owner, self.lease_ttl)
+                if self.leader:
+                    self.store.settle_campaign_calls(self.finished_statuses, self.call_timeout)
+                    counts = self.store.campaign_call_counts()
+                    active = counts.get("dialing", 0) + counts.get("live", 0)
+                    while active < self.max_concurrent:
+                        job = self.store.claim_campaign_call()
+                        if job is None:
+                            break
+                        active += 1
+                        await self._cps.acquire()
+                        task = asyncio.create_task(self._dial(*job))
+                        self._dials.add(task)
+                        task.add_done_callback(self._dials.discard)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            watcher.cancel()
+            if self.leader:
+                self.leader = False
+                self.store.release_lease(self.LEASE, self.owner)
+
+    async def _dial(self, campaign_id, index, call):
+        try:
+            placed = await self.place_call(
+                phone_number=call["phone_number"],
+                business_name=call["business_name"],
+                role=call["role"],
+                employment_type=call["employment_type"],
+                location=call["location"],
+                campaign_id=campaign_id,
+            )
+            self.store.update_campaign_call(campaign_id, index, {"state": "live", "call_sid": placed.sid, "status": "IN_PROGRESS"})
+            print(f"📞 [{campaign_id}] Dialed {call['business_name']} ({call['phone_number']}) -> {placed.sid}")
+        except Exception as e:
+            self.store.update_campaign_call(campaign_id, index, {"state": "failed", "status": "DIAL_FAILED", "error": str(e)})
+            print(f"❌ [{campaign_id}] Could not dial {call['business_name']}: {e}")
+        finally:
+            self._wakeup.set()
+
+    async def _watch_calls(self):
+        """Wake the dialer as soon as any call finishes, rather than at the next poll."""
+        queue = self.events.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:  # fell behind; statuses are re-checked at the next poll
+                    queue = self.events.subscribe()
+                    continue
+                if event["call"].get("status") in self.finished_statuses:
+                    self._wakeup.set()
+        finally:
+            self.events.unsubscribe(queue)
+
+    def stats(self):
+        counts = self.store.campaign_call_counts()
+        return {
+            "campaigns": len(self.store.list_campaigns()),
+            "queued": counts.get("queued", 0),
+            "dialing": counts.get("dialing", 0),
+            "live": counts.get("live", 0),
+            "max_concurrent": self.max_concurrent,
+            "leader": self.leader,
+        }
@@ -0,0 +1,94 @@
+"""Stand-in for Twilio's side of a <Connect><Stream> media stream, for local testing.
+
+Connects to the call service's /media-stream socket the way Twilio does,
+asks it to speak a line, plays the frames back in real time (or as fast as
+they arrive with --no-realtime), acknowledges the final mark, and reports
+how long the first audio took. The received audio is saved as a WAV file.
+
+    python fake_twilio_stream.py "Hi! Are you currently hiring?" --out line.wav
+"""
+import argparse
+import asyncio
+import base64
+import json
+import struct
+import time
+import uuid
+import wave
+
+import websockets
+
+
+def _ulaw_to_linear(code):
+    code = ~code & 0xFF
+    magnitude = ((((code & 0x0F) << 3) + 0x84) << ((code >> 4) & 0x07)) - 0x84
+    return -magnitude if code & 0x80 else magnitude
+
+ULAW_TO_PCM = [struct.pack('<h', _ulaw_to_linear(code)) for code in range(256)]
+
+
+async def fake_call(url, text, voice, out_path, realtime=True, call_sid=None):
+    stream_sid = 'MZ' + uuid.uuid4().hex
+    call_sid = call_sid or 'CA' + uuid.uuid4().hex
+    audio = bytearray()
+    frames = 0
+    first_audio = None
+
+    async with websockets.connect(url) as ws:
+        start = time.time()
+        await ws.send(json.dumps({'event': 'connected', 'protocol': 'Call', 'version': '1.0.0'}))
+        await ws.send(json.dumps({
+            'event': 'start',
+            'sequenceNumber': '1',
+            'streamSid': stream_sid,
+            'start': {
+                'streamSid': stream_sid,
+                'callSid': call_sid,
+                'tracks': ['inbound'],
+                'customParameters': {'text': text, 'voice': voice},
+                'mediaFormat': {'encoding': 'audio/x-mulaw', 'sampleRate': 8000, 'channels': 1},
+            },
+        }))
+
+        async for raw in ws:
+            message = json.loads(raw)
+            if message['event'] == 'media':
+                chunk = base64.b64decode(message['media']['payload'])
+                if first_audio is None:
+                    first_audio = time.time() - start
+                    print(f"first audio after {first_audio:.2f}s")
+                audio += chunk
+                frames += 1
+            elif message['event'] == 'mark':
+                # Twilio only echoes a mark once the audio queued before it has played
+                if realtime:
+                    await asyncio.sleep(max(0.0, start + (first_audio or 0) + len(audio) / 8000 - time.time()))
+                await ws.send(json.dumps({'event': 'mark', 'streamSid': stream_sid, 'mark': message['mark']}))
+        total = time.time() - start
+
+    with wave.open(out_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(b''.join(ULAW_TO_PCM[code] for code in audio))
+
+    print(f"received {len(audio) / 8000:.2f}s of audio in {frames} messages, socket closed after {total:.2f}s")
+    print(f"saved {out_path}")
+    return {'first_audio': first_audio, 'seconds': len(audio) / 8000, 'messages': frames, 'total': total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('text', nargs='?', default="Hi! I'm calling to ask if you're currently hiring.")
+    parser.add_argument('--url', default='ws://localhost:8002/media-stream')
+    parser.add_argument('--voice', default='en_woman_1')
+    parser.add_argument('--out', default='stream_test.wav')
+    parser.add_argument('--no-realtime', dest='realtime', action='store_false',
+                        help="acknowledge the final mark without waiting for playback time")
+    parser.add_argument('--call-sid', help="an existing call's SID, so the stream shows on its /call-status timeline")
+    args = parser.parse_args()
+    asyncio.run(fake_call(args.url, args.text, args.voice, args.out, args.realtime, args.call_sid))
+
+
+if __name__ == '__main__':
+    main()
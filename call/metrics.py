@@ -0,0 +1,27 @@
+import os, sys
+from prometheus_client import Counter, Histogram
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # repo root, for shared/
+from shared import http_metrics
+from shared.http_metrics import add_timing
+
+PREFIX = "call"
+# Seconds; Twilio gives a webhook 15 s before it gives up on the call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 12, 15, 30, 60)
+
+STAGE_SECONDS = Histogram(f"{PREFIX}_stage_seconds", "Duration of one stage of handling a call", ["stage"], buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = Counter(f"{PREFIX}_stage_errors_total", "Call stages that failed", ["stage"])
+AUDIO_FETCHES = Counter(f"{PREFIX}_audio_fetches_total", "Clips fetched by Twilio, by where they were found", ["source"])
+
+
+def record_stage(stage, seconds, error=False):
+    """Observe one stage of handling a call and add it to the request's timings"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if error:
+        STAGE_ERRORS.labels(stage).inc()
+    add_timing(stage, seconds)
+
+
+def instrument(app):
+    """Request metrics, Server-Timing and GET /metrics for this service (see shared/http_metrics.py)"""
+    http_metrics.instrument(app, PREFIX, LATENCY_BUCKETS)
@@ -0,0 +1,184 @@
+import asyncio, re, time
+import httpx
+
+# Lines we can say without asking the LLM, by what the business just said.
+# Rendered per (role, employment_type, location) before the call connects.
+OPENING_LINES = {
+    "greeting": "Hi! I'm calling to ask if you're currently hiring for {employment_type} {role} positions in {location}.",
+    "help": "Hi! I'm just calling to ask if you're currently hiring for {employment_type} {role} positions.",
+    "who": "Hi, I'm a recruiter reaching out on behalf of candidates. Are you currently hiring for {employment_type} {role} positions?",
+    "busy": "No problem, just one quick question. Are you hiring for {employment_type} {role} positions? Just yes or no is fine.",
+}
+CLARIFYING_LINES = {
+    "position": "It's a {employment_type} {role} position in {location}. Is that something you have open?",
+    "repeat": "Sorry, just to confirm, are you currently hiring for {employment_type} {role} positions?",
+    "who": "I'm a recruiter reaching out on behalf of candidates. Are you hiring for {employment_type} {role} positions right now?",
+}
+
+# Phrases that identify each intent, matched on word boundaries
+OPENING_INTENTS = [
+    ("who", r"who (is|am i|are|'s) (this|calling|speaking|you)|who's (this|calling)|what company|where are you calling from"),
+    ("busy", r"\bbusy\b|make it quick|in a (hurry|rush)|not a good time|bad time"),
+    ("help", r"how (can|may) i help|what can i do for you|help you"),
+]
+CLARIFYING_INTENTS = [
+    ("position", r"what (position|role|job|kind of (position|role|job))|which (position|role)|for what"),
+    ("repeat", r"\bsorry\b|\bpardon\b|say (that|it) again|repeat (that|it)|didn't (catch|hear)|come again"),
+    ("who", r"who (is|am i|are) (this|speaking|you)|who's (this|calling)|what company"),
+]
+# Words a plain "Hello, Joe's Diner, this is Sam speaking" greeting is made of,
+# besides the business's own name
+GREETING_WORDS = {
+    "hello", "hi", "hey", "hiya", "good", "morning", "afternoon", "evening", "yes", "yeah", "yep", "speaking",
+    "this", "is", "it's", "thank", "thanks", "you", "for", "calling", "welcome", "to", "the", "at", "here", "how",
+    "are", "ya", "can", "i", "help", "with", "my", "name", "s", "what's", "up",
+}
+MAX_GREETING_WORDS = 14
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9']+", (text or "").lower())
+
+
+def classify(text, intents):
+    lowered = " ".join(_words(text))
+    for intent, pattern in intents:
+        if re.search(pattern, lowered):
+            return intent
+    return None
+
+
+def classify_greeting(greeting, business_name=""):
+    """Which prerendered opening fits this greeting, or None if it's unusual."""
+    intent = classify(greeting, OPENING_INTENTS)
+    if intent:
+        return intent
+    words = _words(greeting)
+    if not words or len(words) > MAX_GREETING_WORDS:
+        return None
+    known = GREETING_WORDS | set(_words(business_name))
+    # Allow one unknown word, e.g. the name of whoever picked up
+    return "greeting" if sum(word not in known for word in words) <= 1 else None
+
+
+class Prerenderer:
+    """Synthesizes a campaign's predictable lines ahead of time.
+
+    Lines are sent through backend-b's /generate_audio, whose TTS cache then
+    returns them instantly during the call. `audio_format` must match the
+    format the call requests, since each format is cached separately. A line only counts as ready once
+    that has finished; until then the call falls back to live generation.
+    With a `store` (the call store), ready lines are recorded there too, so
+    a campaign warmed by one worker is ready on all of them.
+
+    backend-b evicts clips it hasn't served lately once its cache is full, so
+    a line only counts as ready for `ready_ttl` seconds after rendering; a
+    later warm() renders it again, which is a cache hit if the clip survived.
+    """
+
+    def __init__(self, backend_url, voice="en_woman_1", audio_format="wav", concurrency=2, timeout=600.0, store=None, ready_ttl=6 * 3600):
+        self.backend_url = backend_url
+        self.voice = voice
+        self.audio_format = audio_format
+        self.timeout = timeout
+        self.store = store
+        self.ready_ttl = ready_ttl
+        self.rendered = 0
+        self.failed = 0
+        self._ready = {}  # line text -> when it was rendered into the TTS cache
+        self._warming = {}  # context -> task
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @staticmethod
+    def lines(role, employment_type, location):
+        context = {"role": role, "employment_type": employment_type, "location": location}
+        return (
+            {intent: line.format(**context) for intent, line in OPENING_LINES.items()},
+            {intent: line.format(**context) for intent, line in CLARIFYING_LINES.items()},
+        )
+
+    def warm(self, role, employment_type, location):
+        """Start rendering this context's lines in the background, unless that's under way.
+
+        Once done, warming again only renders lines that are no longer ready.
+        """
+        context = (role, employment_type, location)
+        task = self._warming.get(context)
+        if task is None or task.done():
+            task = asyncio.create_task(self._render(*context))
+            self._warming[context] = task
+        return task
+
+    async def _render(self, role, employment_type, location):
+        cutoff = time.time() - self.ready_ttl
+        self._ready = {text: ready_at for text, ready_at in self._ready.items() if ready_at >= cutoff}
+        openings, clarifications = self.lines(role, employment_type, location)
+        texts = [*openings.values(), *clarifications.values()]
+        ready = self._ready_texts(texts)
+        texts = [text for text in texts if text not in ready]
+        results = await asyncio.gather(*(self._render_line(text) for text in texts))
+        return all(results)
+
+    async def _render_line(self, text):
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.post(
+                        f"{self.backend_url}/generate_audio",
+                        json={"text": text, "voice": self.voice, "format": self.audio_format}
+                    )
+                response.raise_for_status()
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Pre-render failed for '{text[:40]}...': {e}")
+                return False
+            self._ready[text] = time.time()
+            self.rendered += 1
+            print(f"🎙️ Pre-rendered in {time.perf_counter() - start:.1f}s: {text[:50]}...")
+        if self.store is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.store.add_ready_lines, [self._key(text)], self.ready_ttl
+                )
+            except Exception as e:
+                print(f"⚠️ Couldn't share pre-rendered line with other workers: {e}")
+        return True
+
+    def _key(self, text):
+        return f"{self.voice}|{self.audio_format}|{text}"
+
+    def _ready_texts(self, texts):
+        """Which of `texts` are in the TTS cache, as known here or recorded in the store by any worker"""
+        cutoff = time.time() - self.ready_ttl
+        ready = {text for text in texts if self._ready.get(text, 0) >= cutoff}
+        missing = {self._key(text): text for text in texts if text not in ready}
+        if missing and self.store is not None:
+            try:
+                shared = {missing[key]: ready_at for key, ready_at in self.store.ready_lines(missing, self.ready_ttl).items()}
+            except Exception as e:
+                print(f"⚠️ Couldn't read pre-rendered lines from the call store: {e}")
+                shared = {}
+            self._ready.update(shared)
+            ready |= shared.keys()
+        return ready
+
+    def opening_line(self, greeting, business_name, role, employment_type, location):
+        """A ready opening line for this greeting, or None to generate one live."""
+        intent = classify_greeting(greeting, business_name)
+        line = self.lines(role, employment_type, location)[0].get(intent)
+        return line if line and self._ready_texts([line]) else None
+
+    def clarifying_line(self, reply, role, employment_type, location):
+        """A ready follow-up for a reply that asks what we mean, or None."""
+        intent = classify(reply, CLARIFYING_INTENTS)
+        line = self.lines(role, employment_type, location)[1].get(intent)
+        return line if line and self._ready_texts([line]) else None
+
+    def stats(self):
+        return {
+            "contexts": len(self._warming),
+            "ready_lines": sum(ready_at >= time.time() - self.ready_ttl for ready_at in self._ready.values()),
+            "rendered": self.rendered,
+            "failed": self.failed,
+        }
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import PreferencesModal from "@/components/PreferencesModal";
 import MapComponent, { Business } from "@/components/MapComponent";
 
@@ -38,6 +38,11 @@ export default function Home() {
     const [businesses, setBusinesses] = useState<Business[]>([]);
     const [selectedBusiness, setSelectedBusiness] = useState<Business | null>(null);
     const [loading, setLoading] = useState(false);
+    // Cursor for the next page of the current search (null when there is none); each
+    // page costs an extra API call plus Google's next-page-token delay, so more are
+    // only requested when the user asks for them
+    const [nextPage, setNextPage] = useState<string | null>(null);
+    const resultCount = useRef(0);
 
     // Helper function to calculate distance between two points (Haversine formula)
     const calculateDistance = (lat1: number, lon1: number, lat2: number, lon2: number): number => {
@@ -55,124 +60,208 @@ export default function Home() {
         return R * c; // Distance in meters
     };
 
-    // Fetch businesses from FastAPI backend
-    const handleSearch = async () => {
+    // Convert a backend business to a table row, or null if it should be hidden
+    const toBusiness = (b: BackendBusiness, i: number): Business | null => {
+        // 1. Exclude businesses without phone numbers
+        if (!b.phone || b.phone === "N/A" || b.phone === "incorrect format") {
+            return null;
+        }
+
+        // 2. Only include businesses within the specified radius
+        const distance = calculateDistance(userLocation.latitude, userLocation.longitude, b.lat, b.lng);
+        if (distance > radius) {
+            return null;
+        }
+
+        return {
+            id: `${b.name}-${i}`,
+            name: b.name,
+            jobRole: keyword || "N/A",
+            status: "Unknown",
+            lastContact: "—",
+            latitude: b.lat,
+            longitude: b.lng,
+            address: b.address,
+            phone: b.phone,
+        };
+    };
+
+    // Fetch businesses from FastAPI backend, streamed as NDJSON so rows appear as they resolve.
+    // With a cursor, only the page after it is fetched and only new businesses are added.
+    const runSearch = async (cursor: string | null) => {
+        const more = cursor !== null;
         setLoading(true);
+        let next: string | null = null;
+        const known = new Set(more ? businesses.map((b) => `${b.name}|${b.address}`) : []);
+        if (!more) {
+            // Always keep BosonAI demo at the top
+            setBusinesses([demoBosonAI]);
+            resultCount.current = 0;
+        }
         try {
             const params = new URLSearchParams({
                 location: address,
                 radius: radius.toString(),
+                stream: "true",
             });
             if (keyword) params.append("keyword", keyword);
+            if (cursor) params.append("cursor", cursor);
 
             const res = await fetch(`http://127.0.0.1:8001/places?${params.toString()}`);
-            const data = await res.json();
-
-            if (res.ok && data && Array.isArray(data.results)) {
-                const formatted: Business[] = data.results
-                    .map((b: BackendBusiness, i: number) => ({
-                        id: `${b.name}-${i}`,
-                        name: b.name,
-                        jobRole: keyword || "N/A",
-                        status: "Unknown",
-                        lastContact: "—",
-                        latitude: b.lat,
-                        longitude: b.lng,
-                        address: b.address,
-                        phone: b.phone,
-                    }))
-                    .filter((b: Business) => {
-                        // 1. Exclude businesses without phone numbers
-                        if (!b.phone || b.phone === "N/A" || b.phone === "incorrect format") {
-                            return false;
-                        }
+            if (!res.ok || !res.body) {
+                console.error("Unexpected response:", res.status, await res.text());
+                if (!more) {
+                    setBusinesses([]);
+                }
+                return;
+            }
 
-                        // 2. Only include businesses within the specified radius
-                        const distance = calculateDistance(
-                            userLocation.latitude,
-                            userLocation.longitude,
-                            b.latitude,
-                            b.longitude
-                        );
-                        return distance <= radius;
-                    });
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
 
-                // Always keep BosonAI demo at the top
-                setBusinesses([demoBosonAI, ...formatted]);
-            } else {
-                console.error("Unexpected response format:", data);
-                setBusinesses([]);
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const lines = buffer.split("\n");
+                buffer = lines.pop() ?? "";
+                const rows = lines
+                    .filter((line) => line.trim())
+                    .map((line) => JSON.parse(line) as BackendBusiness | { next_page: string | null });
+                // The stream ends with the cursor for the next page
+                for (const row of rows) {
+                    if ("next_page" in row) next = row.next_page;
+                }
+                const batch = rows
+                    .filter((b): b is BackendBusiness => !("next_page" in b))
+                    .filter((b) => !known.has(`${b.name}|${b.address}`))
+                    .map((b) => toBusiness(b, resultCount.current++))
+                    .filter((b): b is Business => b !== null);
+
+                if (batch.length > 0) {
+                    setBusinesses((prev) => [...prev, ...batch]);
+                }
             }
         } catch (err) {
             console.error("Fetch failed:", err);
-            setBusinesses([]);
+            if (!more) {
+                setBusinesses([]);
+            }
         } finally {
+            setNextPage(next);
             setLoading(false);
         }
     };
 
-    // Poll for call status and update business when complete
-    const pollCallStatus = async (callSid: string, businessId: string) => {
-        const maxAttempts = 60; // Poll for up to 5 minutes
-        let attempts = 0;
+    const handleSearch = () => runSearch(null);
+    const handleLoadMore = () => runSearch(nextPage);
+
+    // Calls we're waiting on (call_sid -> business id, or phone number -> business id
+    // for campaign calls, whose call_sid we only learn once the dialer gets to them)
+    // and the shared push channel
+    const pendingCalls = useRef<Map<string, string>>(new Map());
+    const pendingCampaignCalls = useRef<Map<string, string>>(new Map());
+    const callEvents = useRef<EventSource | null>(null);
 
-        const poll = async () => {
-            try {
-                const response = await fetch(`http://localhost:8002/call-status/${callSid}`);
+    // Update the business in the table once its call has a result
+    const applyCallResult = (businessId: string, callData: { hiring_status: string; completed_at?: string }) => {
+        setBusinesses(prev => prev.map(business => {
+            if (business.id === businessId) {
+                const hiringStatus = 
+                    callData.hiring_status === 'HIRING' ? 'Hiring' :
+                    callData.hiring_status === 'NOT_HIRING' ? 'Not Hiring' :
+                    'Uncertain';
                 
-                if (response.ok) {
-                    const callData = await response.json();
-                    console.log(`📊 Call status: ${callData.status}, Hiring: ${callData.hiring_status}`);
-                    
-                    if (callData.status === 'COMPLETED' && callData.hiring_status) {
-                        // Update the business in the table
-                        setBusinesses(prev => prev.map(business => {
-                            if (business.id === businessId) {
-                                const hiringStatus = 
-                                    callData.hiring_status === 'HIRING' ? 'Hiring' :
-                                    callData.hiring_status === 'NOT_HIRING' ? 'Not Hiring' :
-                                    'Uncertain';
-                                
-                                const verifiedDate = callData.completed_at 
-                                    ? new Date(callData.completed_at).toLocaleDateString('en-US', { 
-                                        year: 'numeric', 
-                                        month: 'long', 
-                                        day: 'numeric' 
-                                    })
-                                    : new Date().toLocaleDateString('en-US', { 
-                                        year: 'numeric', 
-                                        month: 'long', 
-                                        day: 'numeric' 
-                                    });
-                                
-                                return {
-                                    ...business,
-                                    status: hiringStatus,
-                                    lastVerified: verifiedDate
-                                };
-                            }
-                            return business;
-                        }));
-                        
-                        // Silently update - no alert
-                        console.log(`✅ Call complete! ${businessId} hiring status: ${callData.hiring_status}`);
-                        return; // Stop polling
-                    }
-                }
+                const verifiedDate = (callData.completed_at ? new Date(callData.completed_at) : new Date())
+                    .toLocaleDateString('en-US', { 
+                        year: 'numeric', 
+                        month: 'long', 
+                        day: 'numeric' 
+                    });
                 
-                // Continue polling if not complete and haven't exceeded max attempts
-                attempts++;
-                if (attempts < maxAttempts) {
-                    setTimeout(poll, 5000); // Poll every 5 seconds
+                return {
+                    ...business,
+                    status: hiringStatus,
+                    lastVerified: verifiedDate
+                };
+            }
+            return business;
+        }));
+    };
+
+    // Listen for call status pushes (one EventSource for all calls; the
+    // browser reconnects and resumes from the last event id on its own)
+    const openCallEvents = () => {
+        if (callEvents.current) {
+            return;
+        }
+
+        const source = new EventSource("http://localhost:8002/call-events");
+        source.addEventListener("call", (event) => {
+            const callData = JSON.parse((event as MessageEvent).data);
+            const businessId = pendingCalls.current.get(callData.call_sid)
+                ?? (callData.campaign_id ? pendingCampaignCalls.current.get(callData.phone_number) : undefined);
+            if (!businessId) {
+                return;
+            }
+            console.log(`📊 Call status: ${callData.status}, Hiring: ${callData.hiring_status}`);
+
+            if (callData.status === 'COMPLETED' && callData.hiring_status) {
+                applyCallResult(businessId, callData);
+                console.log(`✅ Call complete! ${businessId} hiring status: ${callData.hiring_status}`);
+            }
+            if (['COMPLETED', 'NO_RESULT', 'FAILED'].includes(callData.status)) {
+                pendingCalls.current.delete(callData.call_sid);
+                pendingCampaignCalls.current.delete(callData.phone_number);
+                if (pendingCalls.current.size === 0 && pendingCampaignCalls.current.size === 0) {
+                    source.close();
+                    callEvents.current = null;
                 }
-            } catch (error) {
-                console.error("Error polling call status:", error);
             }
-        };
-        
-        poll();
+        });
+        callEvents.current = source;
     };
 
+    const watchCall = (callSid: string, businessId: string) => {
+        pendingCalls.current.set(callSid, businessId);
+        openCallEvents();
+    };
+
+    // Run New Calls - queue every business we haven't called yet as one campaign
+    const handleRunCalls = async () => {
+        const toCall = businesses.filter(b => b.phone && b.phone !== "N/A" && b.status === "Unknown");
+        if (toCall.length === 0) {
+            return;
+        }
+
+        try {
+            const response = await fetch("http://localhost:8002/campaigns", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({
+                    name: `${keyword || "Businesses"} in ${address}`,
+                    role: keyword || "positions",
+                    employment_type: "Full-time",
+                    location: address || "your area",
+                    businesses: toCall.map(b => ({ phone_number: b.phone, business_name: b.name })),
+                }),
+            });
+
+            if (response.ok) {
+                const campaign = await response.json();
+                console.log(`📋 Campaign ${campaign.id}: ${campaign.total} calls queued`);
+                toCall.forEach(b => pendingCampaignCalls.current.set(b.phone as string, b.id));
+                openCallEvents();
+            }
+        } catch (error) {
+            console.error("Campaign error:", error);
+        }
+    };
+
+    useEffect(() => () => callEvents.current?.close(), []);
+
     // Call button action - trigger AI call automation
     const handleCall = async (b: Business) => {
         if (!b.phone || b.phone === "N/A") {
@@ -196,8 +285,8 @@ export default function Home() {
             const data = await response.json();
 
             if (response.ok && data.success) {
-                // Start polling for call results silently
-                pollCallStatus(data.call_sid, b.id);
+                // Results arrive silently over the call events stream
+                watchCall(data.call_sid, b.id);
             }
         } catch (error) {
             console.error("Call error:", error);
@@ -241,7 +330,7 @@ export default function Home() {
 
                             {/* Run New Calls Button */}
                             <button
-                                onClick={() => alert("TODO: implement auto-call batch logic")}
+                                onClick={handleRunCalls}
                                 className="px-4 py-2 text-sm font-semibold text-white bg-blue-500 rounded-md hover:bg-blue-700 flex items-center space-x-2 shadow-lg shadow-blue-500/20"
                             >
                                 <span className="material-icons text-base">phone_in_talk</span>
@@ -283,14 +372,25 @@ export default function Home() {
                     <div className="bg-[#111111]/80 backdrop-blur-md shadow-2xl flex flex-col h-full rounded-xl">
                         <div className="p-4 flex justify-between items-center flex-shrink-0">
                             <h2 className="font-semibold">Businesses</h2>
-                            <button
-                                onClick={() => setIsTableExpanded(!isTableExpanded)}
-                                className="p-1 rounded-md hover:bg-[#0a0a0a] text-[#a3a3a3]"
-                            >
+                            <div className="flex items-center space-x-2">
+                                {nextPage && (
+                                    <button
+                                        onClick={handleLoadMore}
+                                        disabled={loading}
+                                        className="px-3 py-1 text-xs font-semibold text-white bg-blue-500/20 rounded-md hover:bg-blue-500/30"
+                                    >
+                                        {loading ? "Loading..." : "Load more"}
+                                    </button>
+                                )}
+                                <button
+                                    onClick={() => setIsTableExpanded(!isTableExpanded)}
+                                    className="p-1 rounded-md hover:bg-[#0a0a0a] text-[#a3a3a3]"
+                                >
                 <span className="material-icons text-xl">
                   {isTableExpanded ? "unfold_more" : "unfold_less"}
                 </span>
-                            </button>
+                                </button>
+                            </div>
         </div>
 
                         <div
@@ -0,0 +1,2 @@
+"""Code used by more than one service. Each service runs from its own directory,
+so modules that import from here first add the repo root to sys.path."""
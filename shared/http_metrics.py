@@ -0,0 +1,63 @@
+"""Request latency and error metrics, a Server-Timing header and GET /metrics for a FastAPI app"""
+import contextvars, os, time
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# The current request's timed stages, for its Server-Timing header
+_timings = contextvars.ContextVar("server_timings", default=None)
+
+
+def add_timing(name, seconds):
+    """Count `seconds` towards `name` in the current request's Server-Timing"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def request_timings():
+    """The stages timed so far in this request, in ms"""
+    return {name: round(1000 * seconds, 1) for name, seconds in (_timings.get() or {}).items()}
+
+
+def instrument(app, prefix, buckets):
+    """Time every HTTP request as `{prefix}_http_request_seconds`, report its stages in a
+    Server-Timing header, and serve GET /metrics.
+
+    Streamed responses send their headers first, so their Server-Timing only
+    covers what finished before the first byte. With several workers, set
+    PROMETHEUS_MULTIPROC_DIR to an empty directory shared by all of them, so
+    every scrape adds up all the workers instead of sampling one.
+    """
+    request_seconds = Histogram(f"{prefix}_http_request_seconds", "HTTP request duration", ["method", "route"], buckets=buckets)
+    request_errors = Counter(f"{prefix}_http_errors_total", "HTTP requests that failed (5xx or exception)", ["method", "route"])
+
+    @app.middleware("http")
+    async def record_request(request, call_next):
+        start = time.perf_counter()
+        _timings.set({})
+        try:
+            response = await call_next(request)
+        except Exception:
+            request_errors.labels(request.method, _route(request)).inc()
+            raise
+        elapsed = time.perf_counter() - start
+        request_seconds.labels(request.method, _route(request)).observe(elapsed)
+        if response.status_code >= 500:
+            request_errors.labels(request.method, _route(request)).inc()
+        entries = [f"{name};dur={ms}" for name, ms in request_timings().items()]
+        response.headers["Server-Timing"] = ", ".join(entries + [f"total;dur={round(1000 * elapsed, 1)}"])
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        registry = REGISTRY
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def _route(request):
+    # The path template ("/audio/{audio_id}"), so ids don't each become a series
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")